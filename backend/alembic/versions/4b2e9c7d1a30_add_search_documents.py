@@ -0,0 +1,93 @@
+"""add search_documents full-text index
+
+Revision ID: 4b2e9c7d1a30
+Revises: dd4b1891995c
+Create Date: 2026-10-17 10:12:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from app.models import SQLITE_SEARCH_DDL
+
+
+# revision identifiers, used by Alembic.
+revision: str = '4b2e9c7d1a30'
+down_revision: Union[str, Sequence[str], None] = 'dd4b1891995c'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# Backfill: (entity_type, table, id column, property column, text columns)
+_SOURCES = [
+    ("property", "properties", "yardi", "yardi", ["address"]),
+    ("suite", "suites", "suite_id", "property_yardi", ["name", "notes"]),
+    ("service", "services", "service_id", "property_yardi", ["vendor"]),
+    ("utility", "utilities", "utility_id", "property_yardi", ["account_number"]),
+    ("code", "codes", "code_id", "property_yardi", ["description"]),
+]
+
+_CONTACT_PROPERTY = """(
+    SELECT MIN(x.property_yardi) FROM (
+        SELECT s.property_yardi FROM suites s
+        JOIN suite_contacts l ON l.suite_id = s.suite_id WHERE l.contact_id = c.contact_id
+        UNION SELECT s.property_yardi FROM services s
+        JOIN service_contacts l ON l.service_id = s.service_id WHERE l.contact_id = c.contact_id
+        UNION SELECT u.property_yardi FROM utilities u
+        JOIN utility_contacts l ON l.utility_id = u.utility_id WHERE l.contact_id = c.contact_id
+    ) x
+)"""
+
+
+def _content(columns, alias=""):
+    parts = [f"COALESCE({alias}{c}, '')" for c in columns]
+    return "TRIM(" + " || ' ' || ".join(parts) + ")"
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'search_documents',
+        sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column('entity_type', sa.String(), nullable=False),
+        sa.Column('entity_id', sa.String(), nullable=False),
+        sa.Column('property_yardi', sa.String(), nullable=True),
+        sa.Column('content', sa.Text(), nullable=False),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('entity_type', 'entity_id', name='uq_search_documents_entity'),
+    )
+    op.create_index(op.f('ix_search_documents_property_yardi'), 'search_documents', ['property_yardi'], unique=False)
+
+    dialect = op.get_bind().dialect.name
+    if dialect == 'postgresql':
+        op.execute(
+            "CREATE INDEX ix_search_documents_tsv ON search_documents "
+            "USING gin (to_tsvector('simple', content))"
+        )
+    elif dialect == 'sqlite':
+        for statement in SQLITE_SEARCH_DDL:
+            op.execute(statement)
+
+    # Backfill from existing rows (the FTS5 triggers index them on SQLite)
+    for entity_type, table, id_col, prop_col, columns in _SOURCES:
+        content = _content(columns)
+        op.execute(
+            "INSERT INTO search_documents (entity_type, entity_id, property_yardi, content) "
+            f"SELECT '{entity_type}', CAST({id_col} AS TEXT), {prop_col}, {content} "
+            f"FROM {table} WHERE {content} <> ''"
+        )
+    content = _content(["name"], "c.")
+    op.execute(
+        "INSERT INTO search_documents (entity_type, entity_id, property_yardi, content) "
+        f"SELECT 'contact', CAST(c.contact_id AS TEXT), {_CONTACT_PROPERTY}, {content} "
+        f"FROM contacts c WHERE {content} <> ''"
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    if op.get_bind().dialect.name == 'sqlite':
+        op.execute("DROP TABLE IF EXISTS search_documents_fts")
+    op.drop_table('search_documents')
@@ -0,0 +1,47 @@
+"""add indexes on child foreign keys
+
+Revision ID: 8f1d3a6c5e21
+Revises: 4b2e9c7d1a30
+Create Date: 2026-10-17 14:05:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8f1d3a6c5e21'
+down_revision: Union[str, Sequence[str], None] = '4b2e9c7d1a30'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# (table, column) pairs looked up per property / per child
+_INDEXES = [
+    ('suites', 'property_yardi'),
+    ('services', 'property_yardi'),
+    ('utilities', 'property_yardi'),
+    ('codes', 'property_yardi'),
+    ('permits', 'property_yardi'),
+    ('property_photos', 'property_yardi'),
+    ('suite_contacts', 'suite_id'),
+    ('suite_contacts', 'contact_id'),
+    ('service_contacts', 'service_id'),
+    ('service_contacts', 'contact_id'),
+    ('utility_contacts', 'utility_id'),
+    ('utility_contacts', 'contact_id'),
+]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    for table, column in _INDEXES:
+        op.create_index(op.f(f'ix_{table}_{column}'), table, [column], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for table, column in reversed(_INDEXES):
+        op.drop_index(op.f(f'ix_{table}_{column}'), table_name=table)
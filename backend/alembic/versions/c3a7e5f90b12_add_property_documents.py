@@ -0,0 +1,39 @@
+"""add materialized property documents
+
+Revision ID: c3a7e5f90b12
+Revises: 8f1d3a6c5e21
+Create Date: 2026-10-17 16:20:00.000000
+
+The table starts empty; fill it after upgrading with
+`python -m app.rebuild_documents` (the API builds missing documents
+on the fly until then).
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c3a7e5f90b12'
+down_revision: Union[str, Sequence[str], None] = '8f1d3a6c5e21'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'property_documents',
+        sa.Column('yardi', sa.String(), nullable=False),
+        sa.Column('version', sa.Integer(), nullable=False),
+        sa.Column('body', sa.Text(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(['yardi'], ['properties.yardi'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('yardi'),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('property_documents')
@@ -0,0 +1,57 @@
+"""add updated_at tracking and tombstones for delta sync
+
+Revision ID: d5a1f7c2b934
+Revises: c3a7e5f90b12
+Create Date: 2026-10-17 18:05:00.000000
+
+Existing rows start with updated_at NULL (set on their next write).
+The stored documents now carry updated_at, so refresh them after
+upgrading with `python -m app.rebuild_documents`.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd5a1f7c2b934'
+down_revision: Union[str, Sequence[str], None] = 'c3a7e5f90b12'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+TRACKED_TABLES = (
+    'properties', 'contacts', 'suites', 'services',
+    'utilities', 'codes', 'permits', 'property_photos',
+)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    for table in TRACKED_TABLES:
+        op.add_column(table, sa.Column('updated_at', sa.DateTime(), nullable=True))
+
+    op.create_table(
+        'tombstones',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('entity_type', sa.String(), nullable=False),
+        sa.Column('entity_id', sa.String(), nullable=False),
+        sa.Column('property_yardi', sa.String(), nullable=True),
+        sa.Column('deleted_at', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index('ix_tombstones_property_yardi', 'tombstones', ['property_yardi'])
+    op.create_index('ix_tombstones_deleted_at', 'tombstones', ['deleted_at'])
+    op.create_index(
+        'ix_property_documents_updated_at', 'property_documents', ['updated_at', 'yardi']
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_property_documents_updated_at', table_name='property_documents')
+    op.drop_index('ix_tombstones_deleted_at', table_name='tombstones')
+    op.drop_index('ix_tombstones_property_yardi', table_name='tombstones')
+    op.drop_table('tombstones')
+    for table in TRACKED_TABLES:
+        op.drop_column(table, 'updated_at')
@@ -0,0 +1,97 @@
+from fastapi import APIRouter, Depends, Query
+from app.database import get_pool_stats
+from app.auth import verify_token, get_auth_cache_stats
+from app import instrumentation
+from app.cache import response_cache
+from app.events import broker
+import os
+
+router = APIRouter()
+
+# -------------------------------------------------------------------
+# Admin / Diagnostics Endpoints
+# Read-only runtime metrics for the worker process that serves the
+# request. Under gunicorn each worker reports its own numbers (see pid).
+# -------------------------------------------------------------------
+
+@router.get("/admin/db-pool")
+async def get_db_pool(user=Depends(verify_token)):
+    """
+    Database connection pool statistics for this worker.
+
+    Args:
+        user (dict): Authenticated user.
+
+    Returns:
+        dict: Worker pid plus checkout counts, in-use/peak connections,
+        pool timeouts and checkout wait times.
+    """
+    return {"pid": os.getpid(), **get_pool_stats()}
+
+
+@router.get("/admin/auth-cache")
+async def get_auth_cache(user=Depends(verify_token)):
+    """
+    Token/JWKS cache statistics for this worker.
+
+    Args:
+        user (dict): Authenticated user.
+
+    Returns:
+        dict: Worker pid plus token cache hit/miss counters and key set state.
+    """
+    return {"pid": os.getpid(), **get_auth_cache_stats()}
+
+
+@router.get("/admin/response-cache")
+async def get_response_cache(user=Depends(verify_token)):
+    """
+    Per-property response cache statistics for this worker.
+
+    Args:
+        user (dict): Authenticated user.
+
+    Returns:
+        dict: Worker pid plus entry/byte usage against the limits and
+        hit, miss, eviction and invalidation counters.
+    """
+    return {"pid": os.getpid(), **await response_cache.stats()}
+
+
+@router.get("/admin/events")
+async def get_event_broker(user=Depends(verify_token)):
+    """
+    Change event broker statistics for this worker.
+
+    Args:
+        user (dict): Authenticated user.
+
+    Returns:
+        dict: Worker pid plus connected subscribers and counts of
+        published events and dropped slow consumers.
+    """
+    return {"pid": os.getpid(), **broker.stats()}
+
+
+@router.get("/admin/slow-queries")
+async def get_slow_queries(
+    limit: int = Query(50, ge=1, le=1000),
+    user=Depends(verify_token),
+):
+    """
+    Recent slow SQL statements recorded by this worker.
+
+    Args:
+        limit (int): Max entries to return (newest first).
+        user (dict): Authenticated user.
+
+    Returns:
+        dict: Thresholds plus entries with SQL, parameter shapes,
+        duration, route and (for very slow ones) the query plan.
+    """
+    return {
+        "pid": os.getpid(),
+        "threshold_ms": instrumentation.SLOW_QUERY_MS,
+        "explain_threshold_ms": instrumentation.SLOW_QUERY_EXPLAIN_MS,
+        "entries": instrumentation.slow_query_log.entries(limit),
+    }
@@ -1,9 +1,14 @@
-from fastapi import APIRouter, Depends, HTTPException, Body
-from sqlalchemy.orm import Session
-from app.database import get_db
-from app.models import Code
+from fastapi import APIRouter, Depends, HTTPException, Body, Request
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.database import get_async_db, get_read_db
+from app.models import Code, TRACKING_COLUMNS
 from app.auth import verify_token
 from app.helpers import log_add, log_edit, log_delete
+from app.search import index_entity, remove_entity
+from app.changes import record_deletion, record_property_changes
+from app.etags import etag_matches, not_modified, property_etag
+from app.cache import cache_response, cached_response, render_body
 
 router = APIRouter()
 
@@ -16,7 +21,8 @@ router = APIRouter()
 @router.get("/codes")
 async def get_codes(
     property_yardi: str,
-    db: Session = Depends(get_db),
+    request: Request,
+    db: AsyncSession = Depends(get_read_db),
     user=Depends(verify_token),
 ):
     """
@@ -24,25 +30,38 @@ async def get_codes(
 
     Args:
         property_yardi (str): Unique identifier for the property.
-        db (Session): Database session (injected by FastAPI).
+        request (Request): Incoming request (If-None-Match, cache key).
+        db (AsyncSession): Database session (injected by FastAPI).
         user (dict): Authenticated user (from token).
 
     Returns:
         list[dict]: All codes linked to the property.
+        Response: Empty 304 when If-None-Match names the current ETag.
+        Bodies are served from the response cache while the property
+        is unchanged.
     """
+    etag = await property_etag(db, property_yardi)
+    if etag_matches(request, etag):
+        return not_modified(request, etag)
+    cached = await cached_response(request, property_yardi, etag)
+    if cached is not None:
+        return cached
+
     codes = (
-        db.query(Code)
-        .filter(Code.property_yardi == property_yardi)
-        .order_by(Code.code.asc())
-        .all()
-    )
-    return [c.__dict__ for c in codes]
+        await db.scalars(
+            select(Code)
+            .where(Code.property_yardi == property_yardi)
+            .order_by(Code.code.asc())
+        )
+    ).all()
+    body = render_body(request, [c.__dict__ for c in codes])
+    return await cache_response(request, property_yardi, etag, body)
 
 
 @router.post("/codes", status_code=201)
 async def create_code(
     code: dict = Body(...),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     user=Depends(verify_token),
 ):
     """
@@ -50,7 +69,7 @@ async def create_code(
 
     Args:
         code (dict): Request body containing code fields.
-        db (Session): Database session.
+        db (AsyncSession): Database session.
         user (dict): Authenticated user.
 
     Returns:
@@ -58,11 +77,13 @@ async def create_code(
     """
     new_code = Code(**code)
     db.add(new_code)
-    db.commit()
-    db.refresh(new_code)  # refresh to get generated fields like code_id
+    await db.flush()  # assigns generated fields like code_id
 
     # Log creation for audit purposes
-    log_add(db, user["name"], "code", new_code.code_id, new_code.__dict__, new_code)
+    await index_entity(db, "code", new_code)
+    await record_property_changes(db, new_code.property_yardi, entity=("code", new_code.code_id))
+    await log_add(db, user["name"], "code", new_code.code_id, new_code.__dict__, new_code)
+    await db.commit()
 
     # Return cleaned dict (removes private fields like _sa_instance_state)
     return {k: v for k, v in new_code.__dict__.items() if not k.startswith("_")}
@@ -72,7 +93,7 @@ async def create_code(
 async def update_code(
     code_id: int,
     updated: dict = Body(...),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     user=Depends(verify_token),
 ):
     """
@@ -81,36 +102,39 @@ async def update_code(
     Args:
         code_id (int): ID of the code to update.
         updated (dict): Fields and values to update.
-        db (Session): Database session.
+        db (AsyncSession): Database session.
         user (dict): Authenticated user.
 
     Returns:
         dict: Confirmation message and updated code object.
     """
-    code = db.query(Code).filter(Code.code_id == code_id).first()
+    code = await db.scalar(select(Code).where(Code.code_id == code_id))
     if not code:
         raise HTTPException(status_code=404, detail="Code not found")
+    old_yardi = code.property_yardi
 
     # Apply updates field by field, logging only real changes
     for key, value in updated.items():
-        if hasattr(code, key):
+        if hasattr(code, key) and key not in TRACKING_COLUMNS:
             old_value = getattr(code, key)
             if old_value != value:
                 setattr(code, key, value)
-                log_edit(
+                await log_edit(
                     db, user["name"], "code",
                     code.code_id, key, old_value, value, code
                 )
 
-    db.commit()
-    db.refresh(code)
+    await index_entity(db, "code", code)
+    await record_property_changes(db, old_yardi, code.property_yardi, entity=("code", code_id))
+    await db.commit()
+    await db.refresh(code)
     return {"message": "Code updated successfully", "code": code}
 
 
 @router.delete("/codes/{code_id}")
 async def delete_code(
     code_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     user=Depends(verify_token),
 ):
     """
@@ -118,19 +142,22 @@ async def delete_code(
 
     Args:
         code_id (int): ID of the code to delete.
-        db (Session): Database session.
+        db (AsyncSession): Database session.
         user (dict): Authenticated user.
 
     Returns:
         dict: Confirmation message after deletion.
     """
-    code = db.query(Code).filter(Code.code_id == code_id).first()
+    code = await db.scalar(select(Code).where(Code.code_id == code_id))
     if not code:
         raise HTTPException(status_code=404, detail="Code not found")
 
     # Log before deletion so we capture the data
-    log_delete(db, user["name"], "code", code.code_id, code.__dict__, code)
+    await log_delete(db, user["name"], "code", code.code_id, code.__dict__, code)
 
-    db.delete(code)
-    db.commit()
+    await db.delete(code)
+    await remove_entity(db, "code", code_id)
+    record_deletion(db, "code", code_id, code.property_yardi)
+    await record_property_changes(db, code.property_yardi, entity=("code", code_id))
+    await db.commit()
     return {"detail": "Code deleted"}
@@ -1,9 +1,12 @@
 from fastapi import APIRouter, Depends, HTTPException, Body
-from sqlalchemy.orm import Session
-from app.database import get_db
-from app.models import SuiteContact, ServiceContact, UtilityContact, Contact
+from sqlalchemy import select, delete
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.database import get_async_db
+from app.models import SuiteContact, ServiceContact, UtilityContact, Contact, TRACKING_COLUMNS
 from app.auth import verify_token
 from app.helpers import log_add, log_edit, log_delete
+from app.search import index_entity, remove_entity
+from app.changes import contact_property_yardis, record_deletion, record_property_changes
 
 router = APIRouter()
 
@@ -18,7 +21,7 @@ router = APIRouter()
 async def update_contact(
     contact_id: int,
     updated: dict = Body(...),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     user=Depends(verify_token),
 ):
     """
@@ -27,36 +30,40 @@ async def update_contact(
     Args:
         contact_id (int): ID of the contact to update.
         updated (dict): Fields and values to update.
-        db (Session): Database session.
+        db (AsyncSession): Database session.
         user (dict): Authenticated user.
 
     Returns:
         dict: Updated contact (cleaned of SQLAlchemy internals).
     """
-    contact = db.query(Contact).filter(Contact.contact_id == contact_id).first()
+    contact = await db.scalar(select(Contact).where(Contact.contact_id == contact_id))
     if not contact:
         raise HTTPException(status_code=404, detail="Contact not found")
 
     # Apply updates field by field, logging only changes
     for key, value in updated.items():
-        if hasattr(contact, key):
+        if hasattr(contact, key) and key not in TRACKING_COLUMNS:
             old_value = getattr(contact, key)
             if old_value != value:
                 setattr(contact, key, value)
-                log_edit(
+                await log_edit(
                     db, user["name"], "contact",
                     contact.contact_id, key, old_value, value, contact
                 )
 
-    db.commit()
-    db.refresh(contact)
+    await index_entity(db, "contact", contact)
+    await record_property_changes(
+        db, *await contact_property_yardis(db, contact_id), entity=("contact", contact_id)
+    )
+    await db.commit()
+    await db.refresh(contact)
     return {k: v for k, v in contact.__dict__.items() if not k.startswith("_")}
 
 
 @router.post("/contacts", status_code=201)
 async def create_contact(
     contact: dict = Body(...),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     user=Depends(verify_token),
 ):
     """
@@ -64,7 +71,7 @@ async def create_contact(
 
     Args:
         contact (dict): Request body containing contact fields + optional suite_id/service_id/utility_id.
-        db (Session): Database session.
+        db (AsyncSession): Database session.
         user (dict): Authenticated user.
 
     Returns:
@@ -74,11 +81,10 @@ async def create_contact(
     contact_data = {k: v for k, v in contact.items() if k not in ["suite_id", "service_id", "utility_id"]}
     new_contact = Contact(**contact_data)
     db.add(new_contact)
-    db.commit()
-    db.refresh(new_contact)
+    await db.flush()  # assigns contact_id
 
     # Log creation for audit purposes
-    log_add(db, user["name"], "contact", new_contact.contact_id, new_contact.__dict__, new_contact)
+    await log_add(db, user["name"], "contact", new_contact.contact_id, new_contact.__dict__, new_contact)
 
     # Link to suite/service/utility if provided
     if "suite_id" in contact and contact["suite_id"]:
@@ -87,7 +93,13 @@ async def create_contact(
         db.add(ServiceContact(service_id=contact["service_id"], contact_id=new_contact.contact_id))
     if "utility_id" in contact and contact["utility_id"]:
         db.add(UtilityContact(utility_id=contact["utility_id"], contact_id=new_contact.contact_id))
-    db.commit()
+    await index_entity(db, "contact", new_contact)
+    await record_property_changes(
+        db,
+        *await contact_property_yardis(db, new_contact.contact_id),
+        entity=("contact", new_contact.contact_id),
+    )
+    await db.commit()
 
     return {k: v for k, v in new_contact.__dict__.items() if not k.startswith("_")}
 
@@ -95,7 +107,7 @@ async def create_contact(
 @router.delete("/contacts/{contact_id}")
 async def delete_contact(
     contact_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     user=Depends(verify_token),
 ):
     """
@@ -103,24 +115,28 @@ async def delete_contact(
 
     Args:
         contact_id (int): ID of the contact to delete.
-        db (Session): Database session.
+        db (AsyncSession): Database session.
         user (dict): Authenticated user.
 
     Returns:
         dict: Confirmation message after deletion.
     """
-    contact = db.query(Contact).filter(Contact.contact_id == contact_id).first()
+    contact = await db.scalar(select(Contact).where(Contact.contact_id == contact_id))
     if not contact:
         raise HTTPException(status_code=404, detail="Contact not found")
+    yardis = await contact_property_yardis(db, contact_id)
 
     # Remove links from join tables first
-    db.query(SuiteContact).filter(SuiteContact.contact_id == contact_id).delete()
-    db.query(ServiceContact).filter(ServiceContact.contact_id == contact_id).delete()
-    db.query(UtilityContact).filter(UtilityContact.contact_id == contact_id).delete()
+    await db.execute(delete(SuiteContact).where(SuiteContact.contact_id == contact_id))
+    await db.execute(delete(ServiceContact).where(ServiceContact.contact_id == contact_id))
+    await db.execute(delete(UtilityContact).where(UtilityContact.contact_id == contact_id))
 
     # Log before deleting the contact itself
-    log_delete(db, user["name"], "contact", contact.contact_id, contact.__dict__, contact)
+    await log_delete(db, user["name"], "contact", contact.contact_id, contact.__dict__, contact)
 
-    db.delete(contact)
-    db.commit()
+    await db.delete(contact)
+    await remove_entity(db, "contact", contact_id)
+    record_deletion(db, "contact", contact_id)
+    await record_property_changes(db, *yardis, entity=("contact", contact_id))
+    await db.commit()
     return {"detail": "Contact deleted"}
@@ -1,8 +1,10 @@
 from app.models import EditHistory
-from fastapi import APIRouter, Depends
-from sqlalchemy.orm import Session
-from app.database import get_db
+from fastapi import APIRouter, Depends, Request
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.database import get_read_db
 from app.auth import verify_token
+from app.formats import format_response, response_format
 from datetime import timezone
 
 router = APIRouter()
@@ -15,26 +17,29 @@ router = APIRouter()
 
 @router.get("/edit-history")
 async def get_all_edit_history(
-    db: Session = Depends(get_db),
+    request: Request,
+    db: AsyncSession = Depends(get_read_db),
     user=Depends(verify_token),
 ):
     """
     Retrieve the full edit history log, ordered by most recent first.
 
     Args:
-        db (Session): Database session.
+        request (Request): Incoming request (Accept: JSON or MessagePack).
+        db (AsyncSession): Database session.
         user (dict): Authenticated user.
 
     Returns:
         dict: List of edit history records with metadata.
     """
     history = (
-        db.query(EditHistory)
-        .order_by(EditHistory.edited_at.desc())
-        .all()
-    )
+        await db.scalars(
+            select(EditHistory)
+            .order_by(EditHistory.edited_at.desc())
+        )
+    ).all()
 
-    return {
+    return format_response({
         "edit_history": [
             {
                 "id": h.id,
@@ -50,4 +55,4 @@ async def get_all_edit_history(
             }
             for h in history
         ]
-    }
+    }, response_format(request))
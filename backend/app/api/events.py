@@ -0,0 +1,40 @@
+from fastapi import APIRouter, Depends
+from fastapi.responses import StreamingResponse
+from app.auth import verify_token
+from app.events import event_stream
+
+router = APIRouter()
+
+# -------------------------------------------------------------------
+# Live Change Events
+# Server-Sent Events stream of committed writes, so open clients can
+# invalidate exactly the queries a change affects (see app.events for
+# the event shape and slow-consumer handling).
+# -------------------------------------------------------------------
+
+@router.get("/events")
+async def stream_events(user=Depends(verify_token)):
+    """
+    Subscribe to change notifications (text/event-stream).
+
+    Each committed create/update/delete sends a "change" event per
+    affected property:
+
+        event: change
+        data: {"entity_type": "suite", "entity_id": "12",
+               "property_yardi": "P100", "version": 7}
+
+    A client that cannot keep up receives a "dropped" event and the
+    stream ends; it should reconnect and refetch what it displays.
+
+    Args:
+        user (dict): Authenticated user.
+
+    Returns:
+        StreamingResponse: Open event stream (keepalive comments while idle).
+    """
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -1,9 +1,13 @@
-from fastapi import APIRouter, Depends, HTTPException, Body
-from sqlalchemy.orm import Session
-from app.database import get_db
-from app.models import Permit
+from fastapi import APIRouter, Depends, HTTPException, Body, Request
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.database import get_async_db, get_read_db
+from app.models import Permit, TRACKING_COLUMNS
 from app.auth import verify_token
 from app.helpers import log_add, log_edit, log_delete
+from app.changes import record_deletion, record_property_changes
+from app.etags import etag_matches, not_modified, property_etag
+from app.cache import cache_response, cached_response, render_body
 
 router = APIRouter()
 
@@ -16,7 +20,8 @@ router = APIRouter()
 @router.get("/permits")
 async def get_permits(
     property_yardi: str,
-    db: Session = Depends(get_db),
+    request: Request,
+    db: AsyncSession = Depends(get_read_db),
     user=Depends(verify_token),
 ):
     """
@@ -24,25 +29,38 @@ async def get_permits(
 
     Args:
         property_yardi (str): Unique identifier for the property.
-        db (Session): Database session (injected by FastAPI).
+        request (Request): Incoming request (If-None-Match, cache key).
+        db (AsyncSession): Database session (injected by FastAPI).
         user (dict): Authenticated user (from token).
 
     Returns:
         list[dict]: All permits linked to the property.
+        Response: Empty 304 when If-None-Match names the current ETag.
+        Bodies are served from the response cache while the property
+        is unchanged.
     """
+    etag = await property_etag(db, property_yardi)
+    if etag_matches(request, etag):
+        return not_modified(request, etag)
+    cached = await cached_response(request, property_yardi, etag)
+    if cached is not None:
+        return cached
+
     permits = (
-        db.query(Permit)
-        .filter(Permit.property_yardi == property_yardi)
-        .order_by(Permit.municipality.asc())
-        .all()
-    )
-    return [p.__dict__ for p in permits]
+        await db.scalars(
+            select(Permit)
+            .where(Permit.property_yardi == property_yardi)
+            .order_by(Permit.municipality.asc())
+        )
+    ).all()
+    body = render_body(request, [p.__dict__ for p in permits])
+    return await cache_response(request, property_yardi, etag, body)
 
 
 @router.post("/permits", status_code=201)
 async def create_permit(
     permit: dict = Body(...),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     user=Depends(verify_token),
 ):
     """
@@ -50,7 +68,7 @@ async def create_permit(
 
     Args:
         permit (dict): Request body containing permit fields.
-        db (Session): Database session.
+        db (AsyncSession): Database session.
         user (dict): Authenticated user.
 
     Returns:
@@ -58,11 +76,14 @@ async def create_permit(
     """
     new_permit = Permit(**permit)
     db.add(new_permit)
-    db.commit()
-    db.refresh(new_permit)  # refresh to get generated fields like permit_id
+    await db.flush()  # assigns generated fields like permit_id
+
+    await record_property_changes(
+        db, new_permit.property_yardi, entity=("permit", new_permit.permit_id)
+    )
 
     # Log creation for audit purposes
-    log_add(
+    await log_add(
         db,
         user["name"],
         "permit",
@@ -70,6 +91,7 @@ async def create_permit(
         new_permit.__dict__,
         new_permit,
     )
+    await db.commit()
 
     # Return cleaned dict (removes private fields like _sa_instance_state)
     return {k: v for k, v in new_permit.__dict__.items() if not k.startswith("_")}
@@ -79,7 +101,7 @@ async def create_permit(
 async def update_permit(
     permit_id: int,
     updated: dict = Body(...),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     user=Depends(verify_token),
 ):
     """
@@ -88,23 +110,24 @@ async def update_permit(
     Args:
         permit_id (int): ID of the permit to update.
         updated (dict): Fields and values to update.
-        db (Session): Database session.
+        db (AsyncSession): Database session.
         user (dict): Authenticated user.
 
     Returns:
         dict: Confirmation message and updated permit object.
     """
-    permit = db.query(Permit).filter(Permit.permit_id == permit_id).first()
+    permit = await db.scalar(select(Permit).where(Permit.permit_id == permit_id))
     if not permit:
         raise HTTPException(status_code=404, detail="Permit not found")
+    old_yardi = permit.property_yardi
 
     # Apply updates field by field, logging only real changes
     for key, value in updated.items():
-        if hasattr(permit, key):
+        if hasattr(permit, key) and key not in TRACKING_COLUMNS:
             old_value = getattr(permit, key)
             if old_value != value:
                 setattr(permit, key, value)
-                log_edit(
+                await log_edit(
                     db,
                     user["name"],
                     "permit",
@@ -115,15 +138,18 @@ async def update_permit(
                     permit,
                 )
 
-    db.commit()
-    db.refresh(permit)
+    await record_property_changes(
+        db, old_yardi, permit.property_yardi, entity=("permit", permit_id)
+    )
+    await db.commit()
+    await db.refresh(permit)
     return {"message": "Permit updated successfully", "permit": permit}
 
 
 @router.delete("/permits/{permit_id}")
 async def delete_permit(
     permit_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     user=Depends(verify_token),
 ):
     """
@@ -131,18 +157,18 @@ async def delete_permit(
 
     Args:
         permit_id (int): ID of the permit to delete.
-        db (Session): Database session.
+        db (AsyncSession): Database session.
         user (dict): Authenticated user.
 
     Returns:
         dict: Confirmation message after deletion.
     """
-    permit = db.query(Permit).filter(Permit.permit_id == permit_id).first()
+    permit = await db.scalar(select(Permit).where(Permit.permit_id == permit_id))
     if not permit:
         raise HTTPException(status_code=404, detail="Permit not found")
 
     # Log before deletion so we capture the data
-    log_delete(
+    await log_delete(
         db,
         user["name"],
         "permit",
@@ -151,6 +177,8 @@ async def delete_permit(
         permit,
     )
 
-    db.delete(permit)
-    db.commit()
+    await db.delete(permit)
+    record_deletion(db, "permit", permit_id, permit.property_yardi)
+    await record_property_changes(db, permit.property_yardi, entity=("permit", permit_id))
+    await db.commit()
     return {"detail": "Permit deleted"}
@@ -1,22 +1,30 @@
-from fastapi import APIRouter, Depends, HTTPException, Body, Query
-from sqlalchemy.orm import Session
-from sqlalchemy import func
-from app.database import get_db
-from app.models import (
-    Property,
-    Suite,
-    Service,
-    Utility,
-    Permit,
-    Code,
-    SuiteContact,
-    ServiceContact,
-    UtilityContact,
-    Contact,
-)
+from fastapi import APIRouter, Depends, HTTPException, Body, Query, Request
+from fastapi.responses import Response, StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import and_, func, or_, select
+from app.database import get_async_db, get_read_db, get_read_session_factory
+from app.models import Property, PropertyDocument, TRACKING_COLUMNS
 from app.auth import verify_token
+from app.documents import (
+    build_property_documents,
+    dump_document,
+    property_columns,
+    property_document_column,
+    sql_engine_enabled,
+    PROPERTY_CHILDREN,
+    PROPERTY_FIELDS,
+)
+from app.counts import count_cache, estimate_rows, filter_signature
 from app.helpers import log_edit, log_add
-from collections import defaultdict
+from app.search import index_entity
+from app.changes import record_property_changes
+from app.etags import etag_matches, not_modified, property_etag
+from app.cache import cache_response, cached_response
+from app.sync import property_changes, SYNC_PAGE_SIZE
+from app.formats import MEDIA_TYPES, dump, json_to_format, response_format
+from typing import List, Literal, Optional
+import base64
+import orjson
 
 router = APIRouter()
 
@@ -31,192 +39,554 @@ router = APIRouter()
 #   - Contacts (linked indirectly via join tables)
 #
 # This router supports:
-#   - Listing properties with pagination
+#   - Listing properties with pagination (page numbers or keyset cursor),
+#     filters on indexed columns and whitelisted sort keys
+#   - Streaming the whole portfolio as NDJSON
+#   - Fetching many properties by yardi in one request (batch-get)
+#   - Delta sync: documents changed (and rows deleted) since a token
+#     from the previous sync (see app.sync)
 #   - Fetching a property (with nested data)
+#   - Sparse selectors on reads: `fields=` picks Property columns,
+#     `include=` picks child collections (default: everything)
+#   - Full documents are served from property_documents (kept current
+#     by every write route); sparse ones are built per request
+#   - ETag / If-None-Match and a response cache on GET /properties/{yardi}
+#     (see app.etags, app.cache)
+#   - JSON or MessagePack bodies by Accept header (see app.formats)
 #   - Creating a property
 #   - Updating a property
 # -------------------------------------------------------------------
 
+# Label of the sort value selected for keyset cursors (never returned)
+_SORT_VALUE = "_sort_value"
+
+# Properties per server-side cursor fetch on /properties/stream
+STREAM_CHUNK_SIZE = 200
+
+# Most yardi codes accepted by one POST /properties/batch-get
+BATCH_GET_MAX = 500
+
+# Sort keys accepted by GET /properties (all indexed columns)
+SORT_KEYS = ("yardi", "address", "city", "zip", "building_type", "prop_manager")
+
+
+def _encode_cursor(values):
+    """
+    Encode keyset values into an opaque, URL-safe cursor string.
+
+    Example:
+        ["P100"] → "WyJQMTAwIl0"
+    """
+    return base64.urlsafe_b64encode(orjson.dumps(values)).rstrip(b"=").decode()
+
+
+def _decode_cursor(cursor):
+    """
+    Decode a cursor produced by _encode_cursor.
+
+    Raises:
+        HTTPException: If the cursor is malformed (400 Bad Request).
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = orjson.loads(base64.urlsafe_b64decode(padded))
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    if not isinstance(values, list) or not values:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return values
+
+
+def _parse_selector(value, allowed, name):
+    """
+    Parse a comma-separated selector such as `fields=` or `include=`.
+
+    Example:
+        "yardi, city" → ["yardi", "city"]
+
+    Args:
+        value (str | None): Raw query value; None selects everything.
+        allowed (tuple[str]): Valid names.
+        name (str): Parameter name, for the error message.
+
+    Returns:
+        list[str] | None: Selected names, or None if not given.
+
+    Raises:
+        HTTPException: If an unknown name is requested (400 Bad Request).
+    """
+    if value is None:
+        return None
+    names = [v.strip() for v in value.split(",") if v.strip()]
+    unknown = [v for v in names if v not in allowed]
+    if unknown:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unknown {name}: {', '.join(unknown)}",
+        )
+    return names
+
+
+def property_filters(
+    city: Optional[List[str]] = Query(None),
+    zip: Optional[List[int]] = Query(None),
+    building_type: Optional[List[str]] = Query(None),
+    prop_manager: Optional[List[str]] = Query(None),
+    active: Optional[bool] = Query(None),
+):
+    """
+    Dependency that turns property filter parameters into WHERE clauses.
+
+    Repeat a parameter to match any of several values, e.g.
+    `?city=Davis&city=Sacramento` → `city IN ('Davis', 'Sacramento')`.
+
+    Returns:
+        list: SQLAlchemy conditions (empty when no filter is given).
+    """
+    conditions = []
+    for column, values in (
+        (Property.city, city),
+        (Property.zip, zip),
+        (Property.building_type, building_type),
+        (Property.prop_manager, prop_manager),
+    ):
+        if values:
+            conditions.append(column.in_(values))
+    if active is not None:
+        conditions.append(Property.active == active)
+    return conditions
+
+
+def _parse_sort(sort):
+    """
+    Parse a `sort` value into (key, descending).
+
+    Example:
+        "-city" → ("city", True)
+
+    Raises:
+        HTTPException: If the key is not in SORT_KEYS (400 Bad Request).
+    """
+    descending = sort.startswith("-")
+    key = sort.lstrip("-")
+    if key not in SORT_KEYS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Invalid sort key: {key} (allowed: {', '.join(SORT_KEYS)})",
+        )
+    return key, descending
+
+
+def _keyset_after(column, descending, cursor):
+    """
+    WHERE clause selecting rows after `cursor` in (column, yardi) order.
+
+    NULL sort values come last ascending and first descending (the
+    natural order of a Postgres b-tree index).
+    """
+    yardi_after = Property.yardi < cursor[-1] if descending else Property.yardi > cursor[-1]
+    if column.key == "yardi":
+        return yardi_after
+    if len(cursor) != 2:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    value = cursor[0]
+    if value is None:
+        if descending:
+            return or_(and_(column.is_(None), yardi_after), column.is_not(None))
+        return and_(column.is_(None), yardi_after)
+    beyond = column < value if descending else column > value
+    tie = and_(column == value, yardi_after)
+    if descending:
+        return or_(beyond, tie)
+    return or_(beyond, tie, column.is_(None))
+
+
+def _json_page(envelope, documents):
+    """
+    JSON response for a page whose documents are already JSON text
+    (stored or SQL-rendered): splice them in instead of re-serializing.
+    """
+    head = orjson.dumps(envelope)[:-1]  # drop the closing brace
+    body = b"".join([head, b',"properties":[', ",".join(documents).encode(), b"]}"])
+    return Response(body, media_type="application/json")
+
+
+def _page_response(request, envelope, documents):
+    """
+    Page response in the request's format. JSON splices the documents'
+    text in (_json_page); MessagePack decodes them in one pass and
+    packs the page.
+    """
+    fmt = response_format(request)
+    if fmt == "json":
+        return _json_page(envelope, documents)
+    page = {**envelope, "properties": orjson.loads("[" + ",".join(documents) + "]")}
+    return Response(dump(page, fmt), media_type=MEDIA_TYPES[fmt])
+
+
+async def _count_properties(db, filters, mode):
+    """
+    Total for a filtered property listing.
+
+    Args:
+        db (AsyncSession): Database session.
+        filters (list): Conditions from property_filters().
+        mode (str): "exact" (cached count), "estimate" (planner estimate
+            when unfiltered on Postgres, else exact) or "none".
+
+    Returns:
+        tuple[int | None, bool]: (total, whether it is an estimate).
+    """
+    if mode == "none":
+        return None, False
+    if mode == "estimate" and not filters:
+        estimate = await estimate_rows(db, Property.__table__)
+        if estimate is not None:
+            return estimate, True
+
+    signature = filter_signature(filters)
+    generation = await count_cache.generation("properties")
+    total = await count_cache.get("properties", signature, generation)
+    if total is None:
+        total = await db.scalar(select(func.count(Property.yardi)).where(*filters)) or 0
+        await count_cache.put("properties", signature, total, generation)
+    return total, False
+
+
+def _parse_include(include):
+    names = _parse_selector(include, PROPERTY_CHILDREN, "include")
+    return PROPERTY_CHILDREN if names is None else names
+
+
+def _is_full_document(fields, include):
+    """True when the request asks for the whole stored document."""
+    return fields is None and set(include) == set(PROPERTY_CHILDREN)
+
+
+async def _stored_documents(db, rows):
+    """
+    JSON text for rows selected with PropertyDocument.body as `stored`.
+
+    Properties without a stored document yet (e.g. loaded outside the
+    API, before a rebuild) are built on the fly.
+    """
+    missing = [row.yardi for row in rows if row.stored is None]
+    built = {}
+    if missing:
+        fresh = (
+            await db.execute(select(*property_columns()).where(Property.yardi.in_(missing)))
+        ).all()
+        built = {doc["yardi"]: dump_document(doc) for doc in await build_property_documents(db, fresh)}
+    return [row.stored if row.stored is not None else built[row.yardi] for row in rows]
+
+
+def _document_source(fields, include):
+    """
+    Where a request's documents come from: "stored" (full documents),
+    else the PROPERTY_DOCUMENT_ENGINE ("sql" or "python").
+    """
+    if _is_full_document(fields, include):
+        return "stored"
+    return "sql" if sql_engine_enabled() else "python"
+
+
+def _select_documents(db, columns, include, source):
+    """
+    select() over Property for `columns`, plus the column holding each
+    row's document for `source` (stored body or SQL-rendered JSON).
+    """
+    if source == "stored":
+        return select(*columns, PropertyDocument.body.label("stored")).outerjoin(
+            PropertyDocument, PropertyDocument.yardi == Property.yardi
+        )
+    if source == "sql":
+        dialect = db.get_bind().dialect.name
+        return select(*columns, property_document_column(dialect, columns, include))
+    return select(*columns)
+
+
+async def _row_documents(db, rows, include, source):
+    """JSON text of each row's document, for rows from _select_documents()."""
+    if source == "stored":
+        return await _stored_documents(db, rows)
+    if source == "sql":
+        return [row.document for row in rows]
+    docs = await build_property_documents(db, rows, include)
+    for doc in docs:
+        doc.pop(_SORT_VALUE, None)
+    return [dump_document(doc) for doc in docs]
+
 
 @router.get("/properties")
 async def get_properties(
+    request: Request,
     page: int = Query(1, ge=1),
     per_page: int = Query(10, ge=1, le=100),
-    db: Session = Depends(get_db),
+    after: Optional[str] = Query(None),
+    fields: Optional[str] = Query(None),
+    include: Optional[str] = Query(None),
+    sort: str = Query("yardi"),
+    count: Literal["exact", "estimate", "none"] = Query("exact"),
+    filters: list = Depends(property_filters),
+    db: AsyncSession = Depends(get_read_db),
     user=Depends(verify_token),
 ):
     """
     Get paginated list of properties with nested suites, services,
     utilities, codes, and contacts.
 
+    Filters (repeat a parameter for an `IN` match): city, zip,
+    building_type, prop_manager, active. Sort with `sort=<key>` or
+    `sort=-<key>` for descending, where key is one of SORT_KEYS; yardi
+    breaks ties. Filters and sort compose with both paging modes and
+    `total` counts the filtered rows.
+
+    Totals: `count=exact` (default) is cached per filter set and reset
+    by property writes; `count=estimate` uses the planner's estimate for
+    the unfiltered table on Postgres; `count=none` skips counting (for
+    clients that already know the total; total/total_pages are null).
+
+    Two paging modes:
+    - Page numbers (`page`): kept for compatibility; later pages
+      cost more because skipped rows are still scanned.
+    - Keyset cursor (`after`): pass the previous response's
+      `next_cursor`. Seeks on (sort key, yardi), so every page costs
+      the same and concurrent inserts do not shift page boundaries.
+
+    Sparse selectors: `fields=yardi,address,city&include=` loads just
+    those columns and skips every child fetch (one narrow query).
+
+    Full documents (no `fields`/`include`) come from property_documents;
+    sparse ones are assembled by the PROPERTY_DOCUMENT_ENGINE setting:
+    bulk fetches in Python, or one SQL statement rendering JSON.
+
     Args:
-        page (int): Page number (1-indexed).
+        request (Request): Incoming request (Accept: response format).
+        page (int): Page number (1-indexed). Ignored when `after` is set.
         per_page (int): Number of items per page (max 100).
-        db (Session): Database session.
+        after (str, optional): Opaque cursor from `next_cursor`.
+        fields (str, optional): Comma-separated Property columns.
+        include (str, optional): Comma-separated child collections
+            (suites, services, utilities, permits, codes). Empty for none.
+        sort (str): Sort key, `-` prefixed for descending.
+        count (str): How to compute `total`: exact, estimate or none.
+        filters (list): Conditions built by property_filters().
+        db (AsyncSession): Database session.
         user (dict): Authenticated user.
 
     Returns:
-        dict: Paginated response with total counts and property data.
-    """
-    # Count total properties
-    total = db.query(func.count(Property.yardi)).scalar() or 0
-
-    # Fetch paginated properties
-    props = (
-        db.query(Property)
-        .order_by(Property.yardi)
-        .offset((page - 1) * per_page)
-        .limit(per_page)
-        .all()
+        Response: Paginated JSON response with total counts (`total_estimated`
+        tells whether `total` is an estimate), property data and
+        `next_cursor` (None on the last page).
+    """
+    sort_key, descending = _parse_sort(sort)
+    sort_column = getattr(Property, sort_key)
+    columns = property_columns(_parse_selector(fields, PROPERTY_FIELDS, "fields"))
+    include = _parse_include(include)
+    source = _document_source(fields, include)
+
+    # Count matching properties
+    total, estimated = await _count_properties(db, filters, count)
+    total_pages = (total + per_page - 1) // per_page if total is not None else None
+
+    if sort_key == "yardi":
+        order_by = [Property.yardi.desc() if descending else Property.yardi]
+    elif descending:
+        order_by = [sort_column.desc().nulls_first(), Property.yardi.desc()]
+    else:
+        order_by = [sort_column.asc().nulls_last(), Property.yardi]
+
+    # Fetch one extra row to learn whether another page follows
+    stmt = (
+        _select_documents(db, columns, include, source)
+        .where(*filters)
+        .order_by(*order_by)
+        .limit(per_page + 1)
     )
-    if not props:
-        return {
-            "page": page,
-            "per_page": per_page,
-            "total": total,
-            "total_pages": (total + per_page - 1) // per_page if total else 0,
-            "properties": [],
-        }
+    if sort_key != "yardi":
+        # The cursor needs the last row's sort value, requested or not
+        stmt = stmt.add_columns(sort_column.label(_SORT_VALUE))
+    if after is not None:
+        stmt = stmt.where(_keyset_after(sort_column, descending, _decode_cursor(after)))
+        page = None
+    else:
+        stmt = stmt.offset((page - 1) * per_page)
+    props = (await db.execute(stmt)).all()
+
+    next_cursor = None
+    if len(props) > per_page:
+        props = props[:per_page]
+        last = props[-1]
+        if sort_key == "yardi":
+            next_cursor = _encode_cursor([last.yardi])
+        else:
+            next_cursor = _encode_cursor([last._mapping[_SORT_VALUE], last.yardi])
+
+    envelope = {
+        "page": page,
+        "per_page": per_page,
+        "total": total,
+        "total_pages": total_pages,
+        "total_estimated": estimated,
+        "next_cursor": next_cursor,
+    }
+    # Documents are JSON text already: splice them into the envelope
+    # instead of letting FastAPI walk them with jsonable_encoder
+    return _page_response(request, envelope, await _row_documents(db, props, include, source))
+
+
+@router.get("/properties/stream")
+async def stream_properties(
+    chunk_size: int = Query(STREAM_CHUNK_SIZE, ge=1, le=1000),
+    fields: Optional[str] = Query(None),
+    include: Optional[str] = Query(None),
+    filters: list = Depends(property_filters),
+    open_db=Depends(get_read_session_factory),
+    user=Depends(verify_token),
+):
+    """
+    Stream every property, with the same nested data as GET /properties,
+    as newline-delimited JSON (one property document per line).
 
-    yardis = [p.yardi for p in props]
+    Properties are read from a server-side cursor `chunk_size` rows at a
+    time; each chunk's children are bulk-fetched, serialized with orjson
+    and flushed before the next chunk is read, so memory stays flat
+    regardless of portfolio size and the first lines arrive right away.
 
-    # Bulk fetch related children
-    suites = db.query(Suite).filter(Suite.property_yardi.in_(yardis)).all()
-    services = db.query(Service).filter(Service.property_yardi.in_(yardis)).all()
-    utilities = db.query(Utility).filter(Utility.property_yardi.in_(yardis)).all()
-    permits = db.query(Permit).filter(Permit.property_yardi.in_(yardis)).all()
-    codes = db.query(Code).filter(Code.property_yardi.in_(yardis)).all()
+    Args:
+        chunk_size (int): Properties per fetch/flush (max 1000).
+        fields (str, optional): Comma-separated Property columns.
+        include (str, optional): Comma-separated child collections.
+        filters (list): Conditions built by property_filters().
+        open_db (callable): Opens a read session for the stream.
+        user (dict): Authenticated user.
 
-    # Collect IDs for join lookups
-    suite_ids = [s.suite_id for s in suites] or [None]
-    service_ids = [sv.service_id for sv in services] or [None]
-    utility_ids = [u.utility_id for u in utilities] or [None]
+    Returns:
+        StreamingResponse: `application/x-ndjson` body, ordered by yardi.
+    """
+    columns = property_columns(_parse_selector(fields, PROPERTY_FIELDS, "fields"))
+    include = _parse_include(include)
+
+    source = _document_source(fields, include)
+
+    async def generate():
+        async with open_db() as db:
+            stmt = (
+                _select_documents(db, columns, include, source)
+                .where(*filters)
+                .order_by(Property.yardi)
+                .execution_options(yield_per=chunk_size)
+            )
+            rows = await db.stream(stmt)
+            async for props in rows.partitions():
+                docs = await _row_documents(db, props, include, source)
+                yield "".join(doc + "\n" for doc in docs).encode()
+
+    return StreamingResponse(generate(), media_type="application/x-ndjson")
+
+
+@router.post("/properties/batch-get")
+async def batch_get_properties(
+    request: Request,
+    yardis: List[str] = Body(..., embed=True),
+    fields: Optional[str] = Query(None),
+    include: Optional[str] = Query(None),
+    db: AsyncSession = Depends(get_read_db),
+    user=Depends(verify_token),
+):
+    """
+    Get many properties by yardi ID in one request, with nested data.
 
-    # Fetch join table records
-    suite_links = (
-        db.query(SuiteContact).filter(SuiteContact.suite_id.in_(suite_ids)).all()
-    )
-    service_links = (
-        db.query(ServiceContact)
-        .filter(ServiceContact.service_id.in_(service_ids))
-        .all()
-    )
-    utility_links = (
-        db.query(UtilityContact)
-        .filter(UtilityContact.utility_id.in_(utility_ids))
-        .all()
-    )
+    Meant for views that show a grid of properties: one call instead of
+    one GET /properties/{yardi} per card. Documents are fetched with the
+    same bulk `IN (...)` queries as GET /properties, so the query count
+    does not grow with the number of ids.
 
-    # Collect all contact IDs across join tables
-    contact_ids = (
-        {l.contact_id for l in suite_links}
-        | {l.contact_id for l in service_links}
-        | {l.contact_id for l in utility_links}
-    )
-    contacts = (
-        db.query(Contact).filter(Contact.contact_id.in_(contact_ids or [None])).all()
-    )
-    contacts_by_id = {c.contact_id: c.__dict__.copy() for c in contacts}
-
-    # Map contacts per suite/service/utility
-    suite_contacts = defaultdict(list)
-    for l in suite_links:
-        c = contacts_by_id.get(l.contact_id)
-        if c:
-            suite_contacts[l.suite_id].append(c)
-
-    service_contacts = defaultdict(list)
-    for l in service_links:
-        c = contacts_by_id.get(l.contact_id)
-        if c:
-            service_contacts[l.service_id].append(c)
-
-    utility_contacts = defaultdict(list)
-    for l in utility_links:
-        c = contacts_by_id.get(l.contact_id)
-        if c:
-            utility_contacts[l.utility_id].append(c)
-
-    # Group children by property_yardi
-    suites_by_yardi = defaultdict(list)
-    for s in suites:
-        d = s.__dict__.copy()
-        d["contacts"] = suite_contacts.get(s.suite_id, [])
-        suites_by_yardi[s.property_yardi].append(d)
-
-    services_by_yardi = defaultdict(list)
-    for sv in services:
-        d = sv.__dict__.copy()
-        d["contacts"] = service_contacts.get(sv.service_id, [])
-        services_by_yardi[sv.property_yardi].append(d)
-
-    utilities_by_yardi = defaultdict(list)
-    for u in utilities:
-        d = u.__dict__.copy()
-        d["contacts"] = utility_contacts.get(u.utility_id, [])
-        utilities_by_yardi[u.property_yardi].append(d)
-
-    permits_by_yardi = defaultdict(list)
-    for p in permits:
-        permits_by_yardi[p.property_yardi].append(p.__dict__.copy())
-
-    codes_by_yardi = defaultdict(list)
-    for c in codes:
-        codes_by_yardi[c.property_yardi].append(c.__dict__.copy())
-
-    # Assemble final response
-    result = []
-    for prop in props:
-        result.append(
-            {
-                "yardi": prop.yardi,
-                "address": prop.address,
-                "prop_photo": prop.prop_photo,
-                "city": prop.city,
-                "state": prop.state,
-                "zip": prop.zip,
-                "building_type": prop.building_type,
-                "total_sq_ft": prop.total_sq_ft,
-                "prop_manager": prop.prop_manager,
-                "coe": prop.coe,
-                "year_built": prop.year_built,
-                "year_rent": prop.year_rent,
-                "num_buildings": prop.num_buildings,
-                "num_stories": prop.num_stories,
-                "apn": prop.apn,
-                "prop_tax_id": prop.prop_tax_id,
-                "parking": prop.parking,
-                "fire_sprinklers": prop.fire_sprinklers,
-                "net_rentable_area": prop.net_rentable_area,
-                "land_area": prop.land_area,
-                "structural_frame": prop.structural_frame,
-                "foundation": prop.foundation,
-                "roof_type": prop.roof_type,
-                "roof_cover": prop.roof_cover,
-                "heat_cooling_source": prop.heat_cooling_source,
-                "misc": prop.misc,
-                "active": prop.active,
-                "suites": suites_by_yardi.get(prop.yardi, []),
-                "services": services_by_yardi.get(prop.yardi, []),
-                "utilities": utilities_by_yardi.get(prop.yardi, []),
-                "permits": permits_by_yardi.get(prop.yardi, []),
-                "codes": codes_by_yardi.get(prop.yardi, []),
-            }
+    Args:
+        request (Request): Incoming request (Accept: response format).
+        yardis (List[str]): Property identifiers (max BATCH_GET_MAX).
+            Duplicates are returned once.
+        fields (str, optional): Comma-separated Property columns.
+        include (str, optional): Comma-separated child collections.
+        db (AsyncSession): Database session.
+        user (dict): Authenticated user.
+
+    Returns:
+        dict: {
+            "properties": [...],   # in request order
+            "not_found": [...]     # requested ids with no property
+        }
+
+    Raises:
+        HTTPException: If more than BATCH_GET_MAX ids are given (400).
+    """
+    wanted = list(dict.fromkeys(yardis))
+    if len(wanted) > BATCH_GET_MAX:
+        raise HTTPException(
+            status_code=400, detail=f"At most {BATCH_GET_MAX} yardi codes per request"
         )
+    columns = property_columns(_parse_selector(fields, PROPERTY_FIELDS, "fields"))
+    include = _parse_include(include)
+    source = _document_source(fields, include)
+
+    docs = {}
+    if wanted:
+        stmt = _select_documents(db, columns, include, source).where(Property.yardi.in_(wanted))
+        props = (await db.execute(stmt)).all()
+        docs = dict(zip((p.yardi for p in props), await _row_documents(db, props, include, source)))
+
+    not_found = [y for y in wanted if y not in docs]
+    found = [docs[y] for y in wanted if y in docs]
+    return _page_response(request, {"not_found": not_found}, found)
+
+
+@router.get("/sync")
+async def sync_properties(
+    request: Request,
+    since: Optional[str] = Query(None),
+    limit: int = Query(SYNC_PAGE_SIZE, ge=1, le=5000),
+    db: AsyncSession = Depends(get_read_db),
+    user=Depends(verify_token),
+):
+    """
+    Property documents changed since a previous sync, for client caches.
 
-    return {
-        "page": page,
-        "per_page": per_page,
-        "total": total,
-        "total_pages": (total + per_page - 1) // per_page if total else 0,
-        "properties": result,
-    }
+    Without `since` this is a full sync of every stored document. Pass
+    the returned token as `since` next time (or right away while
+    `has_more` is true) to get only the documents written since then,
+    plus the ids of deleted rows. Apply `deleted` before `properties`.
+
+    Args:
+        request (Request): Incoming request (Accept: response format).
+        since (str, optional): Token from the previous response.
+        limit (int): Documents (and tombstones) per page (max 5000).
+        db (AsyncSession): Database session.
+        user (dict): Authenticated user.
+
+    Returns:
+        dict: {
+            "token": "...",        # `since` for the next call
+            "has_more": bool,      # more pages follow right away
+            "deleted": {...},      # entity type -> deleted ids
+            "properties": [...]    # full documents, oldest change first
+        }
+
+    Raises:
+        HTTPException: If the token is malformed (400), or too old to
+            list every delete since (410: drop the local copy and run a
+            full sync).
+    """
+    envelope, documents = await property_changes(db, since, limit)
+    return _page_response(request, envelope, documents)
 
 
 @router.get("/properties/{yardi}")
 async def get_property_by_yardi(
     yardi: str,
-    db: Session = Depends(get_db),
+    request: Request,
+    fields: Optional[str] = Query(None),
+    include: Optional[str] = Query(None),
+    db: AsyncSession = Depends(get_read_db),
     user=Depends(verify_token),
 ):
     """
@@ -224,115 +594,53 @@ async def get_property_by_yardi(
 
     Args:
         yardi (str): Property identifier.
-        db (Session): Database session.
+        fields (str, optional): Comma-separated Property columns.
+        include (str, optional): Comma-separated child collections
+            (suites, services, utilities, permits, codes). Empty for none.
+        request (Request): Incoming request (If-None-Match, cache key).
+        db (AsyncSession): Database session.
         user (dict): Authenticated user.
 
     Returns:
-        dict: Property details with suites, services, utilities, and codes.
+        dict: Property details with the requested columns and child
+        collections (all of them by default). The full document is
+        served straight from property_documents when stored.
+        Response: Empty 304 when If-None-Match names the current ETag.
+        Bodies are served from the response cache while the property
+        is unchanged.
     """
-    prop = db.query(Property).filter(Property.yardi == yardi).first()
+    columns = property_columns(_parse_selector(fields, PROPERTY_FIELDS, "fields"))
+    include = _parse_include(include)
+
+    # Version check first: a current client costs one key lookup
+    etag = await property_etag(db, yardi)
+    if etag_matches(request, etag):
+        return not_modified(request, etag)
+    cached = await cached_response(request, yardi, etag)
+    if cached is not None:
+        return cached
+
+    if _is_full_document(fields, include):
+        stored = await db.scalar(select(PropertyDocument.body).where(PropertyDocument.yardi == yardi))
+        if stored is not None:
+            body = json_to_format(stored, response_format(request))
+            return await cache_response(request, yardi, etag, body)
+
+    prop = (await db.execute(select(*columns).where(Property.yardi == yardi))).first()
     if not prop:
         raise HTTPException(status_code=404, detail="Property not found")
 
-    # Suites with contacts
-    suites = db.query(Suite).filter(Suite.property_yardi == prop.yardi).all()
-    suites_data = []
-    for s in suites:
-        contact_links = (
-            db.query(SuiteContact).filter(SuiteContact.suite_id == s.suite_id).all()
-        )
-        contact_ids = [link.contact_id for link in contact_links]
-        contacts = (
-            db.query(Contact).filter(Contact.contact_id.in_(contact_ids)).all()
-            if contact_ids
-            else []
-        )
-        suite_dict = s.__dict__.copy()
-        suite_dict["contacts"] = [c.__dict__ for c in contacts]
-        suites_data.append(suite_dict)
-
-    # Services with contacts
-    services = db.query(Service).filter(Service.property_yardi == prop.yardi).all()
-    services_data = []
-    for sv in services:
-        contact_links = (
-            db.query(ServiceContact)
-            .filter(ServiceContact.service_id == sv.service_id)
-            .all()
-        )
-        contact_ids = [link.contact_id for link in contact_links]
-        contacts = (
-            db.query(Contact).filter(Contact.contact_id.in_(contact_ids)).all()
-            if contact_ids
-            else []
-        )
-        service_dict = sv.__dict__.copy()
-        service_dict["contacts"] = [c.__dict__ for c in contacts]
-        services_data.append(service_dict)
-
-    # Utilities with contacts
-    utilities = db.query(Utility).filter(Utility.property_yardi == prop.yardi).all()
-    utilities_data = []
-    for u in utilities:
-        contact_links = (
-            db.query(UtilityContact)
-            .filter(UtilityContact.utility_id == u.utility_id)
-            .all()
-        )
-        contact_ids = [link.contact_id for link in contact_links]
-        contacts = (
-            db.query(Contact).filter(Contact.contact_id.in_(contact_ids)).all()
-            if contact_ids
-            else []
-        )
-        utility_dict = u.__dict__.copy()
-        utility_dict["contacts"] = [c.__dict__ for c in contacts]
-        utilities_data.append(utility_dict)
-
-    permits = db.query(Permit).filter(Permit.property_yardi == prop.yardi).all()   
-    codes = db.query(Code).filter(Code.property_yardi == prop.yardi).all()
-
-    return {
-        "yardi": prop.yardi,
-        "address": prop.address,
-        "prop_photo": prop.prop_photo,
-        "city": prop.city,
-        "state": prop.state,
-        "zip": prop.zip,
-        "building_type": prop.building_type,
-        "total_sq_ft": prop.total_sq_ft,
-        "prop_manager": prop.prop_manager,
-        "coe": prop.coe,
-        "year_built": prop.year_built,
-        "year_rent": prop.year_rent,
-        "num_buildings": prop.num_buildings,
-        "num_stories": prop.num_stories,
-        "apn": prop.apn,
-        "prop_tax_id": prop.prop_tax_id,
-        "parking": prop.parking,
-        "fire_sprinklers": prop.fire_sprinklers,
-        "net_rentable_area": prop.net_rentable_area,
-        "land_area": prop.land_area,
-        "structural_frame": prop.structural_frame,
-        "foundation": prop.foundation,
-        "roof_type": prop.roof_type,
-        "roof_cover": prop.roof_cover,
-        "heat_cooling_source": prop.heat_cooling_source,
-        "misc": prop.misc,
-        "active": prop.active,
-        "suites": suites_data,
-        "services": services_data,
-        "utilities": utilities_data,
-        "permits": [p.__dict__ for p in permits],
-        "codes": [c.__dict__ for c in codes],
-    }
+    # Same bulk builder as the list: a fixed number of queries however
+    # many children (and contacts) the property has
+    result = (await build_property_documents(db, [prop], include))[0]
+    return await cache_response(request, yardi, etag, dump(result, response_format(request)))
 
 
 @router.put("/properties/{yardi}")
 async def update_property(
     yardi: str,
     updated: dict = Body(...),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     user=Depends(verify_token),
 ):
     """
@@ -341,23 +649,23 @@ async def update_property(
     Args:
         yardi (str): Property identifier.
         updated (dict): Fields and values to update.
-        db (Session): Database session.
+        db (AsyncSession): Database session.
         user (dict): Authenticated user.
 
     Returns:
         dict: Confirmation message and updated property.
     """
-    property = db.query(Property).filter(Property.yardi == yardi).first()
+    property = await db.scalar(select(Property).where(Property.yardi == yardi))
     if not property:
         raise HTTPException(status_code=404, detail="Property not found")
 
     for key, value in updated.items():
-        if hasattr(property, key):
+        if hasattr(property, key) and key not in TRACKING_COLUMNS:
             old_value = getattr(property, key)
             if old_value != value:
                 setattr(property, key, value)
                 # Log only real changes
-                log_edit(
+                await log_edit(
                     db,
                     user["name"],
                     "property",
@@ -368,15 +676,18 @@ async def update_property(
                     entity_obj=property,
                 )
 
-    db.commit()
-    db.refresh(property)
+    await index_entity(db, "property", property)
+    await record_property_changes(db, yardi, property.yardi)
+    await db.commit()
+    await count_cache.invalidate("properties")
+    await db.refresh(property)
     return {"message": "Property updated successfully", "property": property}
 
 
 @router.post("/properties", status_code=201)
 async def create_property(
     property: dict = Body(...),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     user=Depends(verify_token),
 ):
     """
@@ -384,7 +695,7 @@ async def create_property(
 
     Args:
         property (dict): Request body containing property fields.
-        db (Session): Database session.
+        db (AsyncSession): Database session.
         user (dict): Authenticated user.
 
     Returns:
@@ -392,11 +703,13 @@ async def create_property(
     """
     new_property = Property(**property)
     db.add(new_property)
-    db.commit()
-    db.refresh(new_property)
+    await db.flush()
+
+    await index_entity(db, "property", new_property)
+    await record_property_changes(db, new_property.yardi)
 
     # Log creation for audit history
-    log_add(
+    await log_add(
         db,
         user["name"],
         "property",
@@ -404,5 +717,7 @@ async def create_property(
         new_property,
         entity_obj=new_property,
     )
+    await db.commit()
+    await count_cache.invalidate("properties")
 
     return {k: v for k, v in new_property.__dict__.items() if not k.startswith("_")}
@@ -1,8 +1,12 @@
-from fastapi import APIRouter, UploadFile, File, Form, HTTPException, Depends
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, UploadFile, File, Form, HTTPException, Depends, Request
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from app.models import PropertyPhoto
-from app.database import get_db
+from app.database import get_async_db, get_read_db
 from app.auth import verify_token
+from app.changes import record_deletion, record_property_changes
+from app.etags import etag_matches, not_modified, property_etag
+from app.cache import cache_response, cached_response, render_body
 import shutil
 import os
 
@@ -45,11 +49,11 @@ def upload_photo(
 
 
 @router.post("/property-photos")
-def add_property_photo(
+async def add_property_photo(
     property_yardi: str = Form(...),
     photo_url: str = Form(...),
     caption: str = Form(""),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     user=Depends(verify_token),
 ):
     """
@@ -59,7 +63,7 @@ def add_property_photo(
         property_yardi (str): ID of property this photo belongs to.
         photo_url (str): URL of the uploaded photo.
         caption (str): Optional caption/description for the photo.
-        db (Session): Database session.
+        db (AsyncSession): Database session.
         user (dict): Authenticated user.
 
     Returns:
@@ -71,16 +75,19 @@ def add_property_photo(
         caption=caption,
     )
     db.add(photo)
-    db.commit()
-    db.refresh(photo)
+    await db.flush()
+    await record_property_changes(db, property_yardi, entity=("photo", photo.id))
+    await db.commit()
+    await db.refresh(photo)
 
     return photo
 
 
 @router.get("/property-photos/{property_yardi}")
-def get_property_photos(
+async def get_property_photos(
     property_yardi: str,
-    db: Session = Depends(get_db),
+    request: Request,
+    db: AsyncSession = Depends(get_read_db),
     user=Depends(verify_token),
 ):
     """
@@ -88,20 +95,34 @@ def get_property_photos(
 
     Args:
         property_yardi (str): Property identifier.
-        db (Session): Database session.
+        request (Request): Incoming request (If-None-Match, cache key).
+        db (AsyncSession): Database session.
         user (dict): Authenticated user.
 
     Returns:
         list[PropertyPhoto]: List of photo records.
+        Response: Empty 304 when If-None-Match names the current ETag.
+        Bodies are served from the response cache while the property
+        is unchanged.
     """
-    photos = db.query(PropertyPhoto).filter_by(property_yardi=property_yardi).all()
-    return photos
+    etag = await property_etag(db, property_yardi)
+    if etag_matches(request, etag):
+        return not_modified(request, etag)
+    cached = await cached_response(request, property_yardi, etag)
+    if cached is not None:
+        return cached
+
+    photos = (
+        await db.scalars(select(PropertyPhoto).where(PropertyPhoto.property_yardi == property_yardi))
+    ).all()
+    body = render_body(request, photos)
+    return await cache_response(request, property_yardi, etag, body)
 
 
 @router.delete("/property-photos/{photo_id}")
-def delete_property_photo(
+async def delete_property_photo(
     photo_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     user=Depends(verify_token),
 ):
     """
@@ -109,16 +130,18 @@ def delete_property_photo(
 
     Args:
         photo_id (int): ID of the photo to delete.
-        db (Session): Database session.
+        db (AsyncSession): Database session.
         user (dict): Authenticated user.
 
     Returns:
         dict: Confirmation message after deletion.
     """
-    photo = db.query(PropertyPhoto).get(photo_id)
+    photo = await db.get(PropertyPhoto, photo_id)
     if not photo:
         raise HTTPException(status_code=404, detail="Photo not found")
 
-    db.delete(photo)
-    db.commit()
+    await db.delete(photo)
+    record_deletion(db, "photo", photo_id, photo.property_yardi)
+    await record_property_changes(db, photo.property_yardi, entity=("photo", photo_id))
+    await db.commit()
     return {"success": True}
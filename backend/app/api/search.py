@@ -0,0 +1,39 @@
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.database import get_read_db
+from app.auth import verify_token
+from app.search import search, SEARCH_MAX_RESULTS
+
+router = APIRouter()
+
+# -------------------------------------------------------------------
+# Search Endpoint
+# Ranked full-text search over property addresses, suite names/notes,
+# service vendors, utility account numbers, code descriptions and
+# contact names (see app.search for the index and backends).
+# -------------------------------------------------------------------
+
+@router.get("/search")
+async def search_entities(
+    q: str = Query(..., min_length=1),
+    limit: int = Query(20, ge=1, le=SEARCH_MAX_RESULTS),
+    db: AsyncSession = Depends(get_read_db),
+    user=Depends(verify_token),
+):
+    """
+    Search across entities.
+
+    Example:
+        GET /search?q=acme → suites, contacts, ... mentioning "Acme"
+
+    Args:
+        q (str): Search text; all words must match, the last as a prefix.
+        limit (int): Maximum number of hits (max 100).
+        db (AsyncSession): Database session.
+        user (dict): Authenticated user.
+
+    Returns:
+        dict: The query and its hits (entity_type, entity_id,
+        property_yardi, content, score), best first.
+    """
+    return {"query": q, "results": await search(db, q, limit)}
@@ -1,9 +1,15 @@
-from fastapi import APIRouter, Depends, HTTPException, Body
-from sqlalchemy.orm import Session
-from app.database import get_db
-from app.models import Service, Contact, ServiceContact
+from fastapi import APIRouter, Depends, HTTPException, Body, Request
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.database import get_async_db, get_read_db
+from app.models import Service, Contact, ServiceContact, TRACKING_COLUMNS
 from app.auth import verify_token
 from app.helpers import log_add, log_edit, log_delete
+from app.search import index_entity, remove_entity
+from app.changes import record_deletion, record_property_changes
+from app.etags import etag_matches, not_modified, property_etag
+from app.cache import cache_response, cached_response, render_body
+from app.loaders import ContactLoader
 
 router = APIRouter()
 
@@ -17,7 +23,8 @@ router = APIRouter()
 @router.get("/services")
 async def get_services(
     property_yardi: str,
-    db: Session = Depends(get_db),
+    request: Request,
+    db: AsyncSession = Depends(get_read_db),
     user=Depends(verify_token),
 ):
     """
@@ -25,37 +32,49 @@ async def get_services(
 
     Args:
         property_yardi (str): Property identifier.
-        db (Session): Database session.
+        request (Request): Incoming request (If-None-Match, cache key).
+        db (AsyncSession): Database session.
         user (dict): Authenticated user.
 
     Returns:
         list[dict]: List of services with nested contacts.
+        Response: Empty 304 when If-None-Match names the current ETag.
+        Bodies are served from the response cache while the property
+        is unchanged.
     """
+    etag = await property_etag(db, property_yardi)
+    if etag_matches(request, etag):
+        return not_modified(request, etag)
+    cached = await cached_response(request, property_yardi, etag)
+    if cached is not None:
+        return cached
+
     services = (
-        db.query(Service)
-        .filter(Service.property_yardi == property_yardi)
-        .order_by(Service.service_type.asc(), Service.vendor.asc())
-        .all()
-    )
+        await db.scalars(
+            select(Service)
+            .where(Service.property_yardi == property_yardi)
+            .order_by(Service.service_type.asc(), Service.vendor.asc())
+        )
+    ).all()
+
+    # Contacts for all services in one joined query
+    contacts = await ContactLoader(db, "services").load_many([sv.service_id for sv in services])
 
     services_data = []
     for sv in services:
-        # Fetch linked contacts for this service
-        contact_links = db.query(ServiceContact).filter(ServiceContact.service_id == sv.service_id).all()
-        contact_ids = [link.contact_id for link in contact_links]
-        contacts = db.query(Contact).filter(Contact.contact_id.in_(contact_ids)).all() if contact_ids else []
-
         service_dict = sv.__dict__.copy()
-        service_dict["contacts"] = [c.__dict__ for c in contacts]
+        service_dict["contacts"] = contacts[sv.service_id]
         services_data.append(service_dict)
 
-    return services_data
+    body = render_body(request, services_data)
+
+    return await cache_response(request, property_yardi, etag, body)
 
 
 @router.post("/services", status_code=201)
 async def create_service(
     service: dict = Body(...),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     user=Depends(verify_token),
 ):
     """
@@ -63,7 +82,7 @@ async def create_service(
 
     Args:
         service (dict): Request body containing service fields.
-        db (Session): Database session.
+        db (AsyncSession): Database session.
         user (dict): Authenticated user.
 
     Returns:
@@ -73,21 +92,24 @@ async def create_service(
 
     new_service = Service(**service)
     db.add(new_service)
-    db.commit()
-    db.refresh(new_service)
+    await db.flush()  # assigns the id
 
     # Link contacts
     for c in contacts:
         new_contact = Contact(**c)
         db.add(new_contact)
-        db.commit()
-        db.refresh(new_contact)
+        await db.flush()
 
         link = ServiceContact(service_id=new_service.service_id, contact_id=new_contact.contact_id)
         db.add(link)
-        db.commit()
+        await index_entity(db, "contact", new_contact)
 
-    log_add(db, user["name"], "service", new_service.service_id, new_service.__dict__, new_service)
+    await index_entity(db, "service", new_service)
+    await record_property_changes(
+        db, new_service.property_yardi, entity=("service", new_service.service_id)
+    )
+    await log_add(db, user["name"], "service", new_service.service_id, new_service.__dict__, new_service)
+    await db.commit()
     return {k: v for k, v in new_service.__dict__.items() if not k.startswith("_")}
 
 
@@ -95,7 +117,7 @@ async def create_service(
 async def update_service(
     service_id: int,
     updated: dict = Body(...),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     user=Depends(verify_token),
 ):
     """
@@ -104,36 +126,41 @@ async def update_service(
     Args:
         service_id (int): ID of the service to update.
         updated (dict): Fields and values to update.
-        db (Session): Database session.
+        db (AsyncSession): Database session.
         user (dict): Authenticated user.
 
     Returns:
         dict: Confirmation message and updated service.
     """
-    service = db.query(Service).filter(Service.service_id == service_id).first()
+    service = await db.scalar(select(Service).where(Service.service_id == service_id))
     if not service:
         raise HTTPException(status_code=404, detail="Service not found")
+    old_yardi = service.property_yardi
 
     # Apply updates field by field, logging only real changes
     for key, value in updated.items():
-        if hasattr(service, key):
+        if hasattr(service, key) and key not in TRACKING_COLUMNS:
             old_value = getattr(service, key)
             if old_value != value:
                 setattr(service, key, value)
-                log_edit(
+                await log_edit(
                     db, user["name"], "service",
                     service.service_id, key, old_value, value, service
                 )
 
-    db.commit()
-    db.refresh(service)
+    await index_entity(db, "service", service)
+    await record_property_changes(
+        db, old_yardi, service.property_yardi, entity=("service", service_id)
+    )
+    await db.commit()
+    await db.refresh(service)
     return {"message": "Service updated successfully", "service": service}
 
 
 @router.delete("/services/{service_id}")
 async def delete_service(
     service_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     user=Depends(verify_token),
 ):
     """
@@ -141,19 +168,22 @@ async def delete_service(
 
     Args:
         service_id (int): ID of the service to delete.
-        db (Session): Database session.
+        db (AsyncSession): Database session.
         user (dict): Authenticated user.
 
     Returns:
         dict: Confirmation message after deletion.
     """
-    service = db.query(Service).filter(Service.service_id == service_id).first()
+    service = await db.scalar(select(Service).where(Service.service_id == service_id))
     if not service:
         raise HTTPException(status_code=404, detail="Service not found")
 
     # Log before deletion
-    log_delete(db, user["name"], "service", service.service_id, service.__dict__, service)
+    await log_delete(db, user["name"], "service", service.service_id, service.__dict__, service)
 
-    db.delete(service)
-    db.commit()
+    await db.delete(service)
+    await remove_entity(db, "service", service_id)
+    record_deletion(db, "service", service_id, service.property_yardi)
+    await record_property_changes(db, service.property_yardi, entity=("service", service_id))
+    await db.commit()
     return {"detail": "Service deleted"}
@@ -1,9 +1,15 @@
-from fastapi import APIRouter, Depends, HTTPException, Body
-from sqlalchemy.orm import Session
-from app.database import get_db
-from app.models import Suite, Contact, SuiteContact
+from fastapi import APIRouter, Depends, HTTPException, Body, Request
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.database import get_async_db, get_read_db
+from app.models import Suite, Contact, SuiteContact, TRACKING_COLUMNS
 from app.auth import verify_token
 from app.helpers import log_add, log_edit, log_delete
+from app.search import index_entity, remove_entity
+from app.changes import record_deletion, record_property_changes
+from app.etags import etag_matches, not_modified, property_etag
+from app.cache import cache_response, cached_response, render_body
+from app.loaders import ContactLoader
 
 router = APIRouter()
 
@@ -17,7 +23,8 @@ router = APIRouter()
 @router.get("/suites")
 async def get_suites(
     property_yardi: str,
-    db: Session = Depends(get_db),
+    request: Request,
+    db: AsyncSession = Depends(get_read_db),
     user=Depends(verify_token),
 ):
     """
@@ -25,37 +32,49 @@ async def get_suites(
 
     Args:
         property_yardi (str): Property identifier.
-        db (Session): Database session.
+        request (Request): Incoming request (If-None-Match, cache key).
+        db (AsyncSession): Database session.
         user (dict): Authenticated user.
 
     Returns:
         list[dict]: List of suites with nested contacts.
+        Response: Empty 304 when If-None-Match names the current ETag.
+        Bodies are served from the response cache while the property
+        is unchanged.
     """
+    etag = await property_etag(db, property_yardi)
+    if etag_matches(request, etag):
+        return not_modified(request, etag)
+    cached = await cached_response(request, property_yardi, etag)
+    if cached is not None:
+        return cached
+
     suites = (
-        db.query(Suite)
-        .filter(Suite.property_yardi == property_yardi)
-        .order_by(Suite.suite.asc())
-        .all()
-    )
+        await db.scalars(
+            select(Suite)
+            .where(Suite.property_yardi == property_yardi)
+            .order_by(Suite.suite.asc())
+        )
+    ).all()
+
+    # Contacts for all suites in one joined query
+    contacts = await ContactLoader(db, "suites").load_many([s.suite_id for s in suites])
 
     suites_data = []
     for s in suites:
-        # Fetch linked contacts for this suite
-        contact_links = db.query(SuiteContact).filter(SuiteContact.suite_id == s.suite_id).all()
-        contact_ids = [link.contact_id for link in contact_links]
-        contacts = db.query(Contact).filter(Contact.contact_id.in_(contact_ids)).all() if contact_ids else []
-
         suite_dict = s.__dict__.copy()
-        suite_dict["contacts"] = [c.__dict__ for c in contacts]
+        suite_dict["contacts"] = contacts[s.suite_id]
         suites_data.append(suite_dict)
 
-    return suites_data
+    body = render_body(request, suites_data)
+
+    return await cache_response(request, property_yardi, etag, body)
 
 
 @router.post("/suites", status_code=201)
 async def create_suite(
     suite: dict = Body(...),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     user=Depends(verify_token),
 ):
     """
@@ -63,7 +82,7 @@ async def create_suite(
 
     Args:
         suite (dict): Request body containing suite fields.
-        db (Session): Database session.
+        db (AsyncSession): Database session.
         user (dict): Authenticated user.
 
     Returns:
@@ -74,21 +93,24 @@ async def create_suite(
 
     new_suite = Suite(**suite)
     db.add(new_suite)
-    db.commit()
-    db.refresh(new_suite)
+    await db.flush()  # assigns the id
 
     # Link contacts
     for c in contacts:
         new_contact = Contact(**c)
         db.add(new_contact)
-        db.commit()
-        db.refresh(new_contact)
+        await db.flush()
 
         link = SuiteContact(suite_id=new_suite.suite_id, contact_id=new_contact.contact_id)
         db.add(link)
-        db.commit()
+        await index_entity(db, "contact", new_contact)
 
-    log_add(db, user["name"], "suite", new_suite.suite_id, new_suite.__dict__, new_suite)
+    await index_entity(db, "suite", new_suite)
+    await record_property_changes(
+        db, new_suite.property_yardi, entity=("suite", new_suite.suite_id)
+    )
+    await log_add(db, user["name"], "suite", new_suite.suite_id, new_suite.__dict__, new_suite)
+    await db.commit()
     return {k: v for k, v in new_suite.__dict__.items() if not k.startswith("_")}
 
 
@@ -96,7 +118,7 @@ async def create_suite(
 async def update_suite(
     suite_id: int,
     updated: dict = Body(...),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     user=Depends(verify_token),
 ):
     """
@@ -105,36 +127,39 @@ async def update_suite(
     Args:
         suite_id (int): ID of the suite to update.
         updated (dict): Fields and values to update.
-        db (Session): Database session.
+        db (AsyncSession): Database session.
         user (dict): Authenticated user.
 
     Returns:
         dict: Updated suite (cleaned of SQLAlchemy internals).
     """
-    suite = db.query(Suite).filter(Suite.suite_id == suite_id).first()
+    suite = await db.scalar(select(Suite).where(Suite.suite_id == suite_id))
     if not suite:
         raise HTTPException(status_code=404, detail="Suite not found")
+    old_yardi = suite.property_yardi
 
     # Apply updates field by field, logging only real changes
     for key, value in updated.items():
-        if hasattr(suite, key):
+        if hasattr(suite, key) and key not in TRACKING_COLUMNS:
             old_value = getattr(suite, key)
             if old_value != value:
                 setattr(suite, key, value)
-                log_edit(
+                await log_edit(
                     db, user["name"], "suite",
                     suite.suite_id, key, old_value, value, suite
                 )
 
-    db.commit()
-    db.refresh(suite)
+    await index_entity(db, "suite", suite)
+    await record_property_changes(db, old_yardi, suite.property_yardi, entity=("suite", suite_id))
+    await db.commit()
+    await db.refresh(suite)
     return {k: v for k, v in suite.__dict__.items() if not k.startswith("_")}
 
 
 @router.delete("/suites/{suite_id}")
 async def delete_suite(
     suite_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     user=Depends(verify_token),
 ):
     """
@@ -142,19 +167,22 @@ async def delete_suite(
 
     Args:
         suite_id (int): ID of the suite to delete.
-        db (Session): Database session.
+        db (AsyncSession): Database session.
         user (dict): Authenticated user.
 
     Returns:
         dict: Confirmation message after deletion.
     """
-    suite = db.query(Suite).filter(Suite.suite_id == suite_id).first()
+    suite = await db.scalar(select(Suite).where(Suite.suite_id == suite_id))
     if not suite:
         raise HTTPException(status_code=404, detail="Suite not found")
 
     # Log before deletion
-    log_delete(db, user["name"], "suite", suite.suite_id, suite.__dict__, suite)
+    await log_delete(db, user["name"], "suite", suite.suite_id, suite.__dict__, suite)
 
-    db.delete(suite)
-    db.commit()
+    await db.delete(suite)
+    await remove_entity(db, "suite", suite_id)
+    record_deletion(db, "suite", suite_id, suite.property_yardi)
+    await record_property_changes(db, suite.property_yardi, entity=("suite", suite_id))
+    await db.commit()
     return {"detail": "Suite deleted"}
@@ -1,9 +1,15 @@
-from fastapi import APIRouter, Depends, HTTPException, Body
-from sqlalchemy.orm import Session
-from app.database import get_db
-from app.models import Utility, Contact, UtilityContact
+from fastapi import APIRouter, Depends, HTTPException, Body, Request
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.database import get_async_db, get_read_db
+from app.models import Utility, Contact, UtilityContact, TRACKING_COLUMNS
 from app.auth import verify_token
 from app.helpers import log_add, log_edit, log_delete
+from app.search import index_entity, remove_entity
+from app.changes import record_deletion, record_property_changes
+from app.etags import etag_matches, not_modified, property_etag
+from app.cache import cache_response, cached_response, render_body
+from app.loaders import ContactLoader
 
 router = APIRouter()
 
@@ -17,7 +23,8 @@ router = APIRouter()
 @router.get("/utilities")
 async def get_utilities(
     property_yardi: str,
-    db: Session = Depends(get_db),
+    request: Request,
+    db: AsyncSession = Depends(get_read_db),
     user=Depends(verify_token),
 ):
     """
@@ -25,37 +32,49 @@ async def get_utilities(
 
     Args:
         property_yardi (str): Property identifier.
-        db (Session): Database session.
+        request (Request): Incoming request (If-None-Match, cache key).
+        db (AsyncSession): Database session.
         user (dict): Authenticated user.
 
     Returns:
         list[dict]: List of utilities with nested contacts.
+        Response: Empty 304 when If-None-Match names the current ETag.
+        Bodies are served from the response cache while the property
+        is unchanged.
     """
+    etag = await property_etag(db, property_yardi)
+    if etag_matches(request, etag):
+        return not_modified(request, etag)
+    cached = await cached_response(request, property_yardi, etag)
+    if cached is not None:
+        return cached
+
     utilities = (
-        db.query(Utility)
-        .filter(Utility.property_yardi == property_yardi)
-        .order_by(Utility.service.asc(), Utility.vendor.asc())
-        .all()
-    )
+        await db.scalars(
+            select(Utility)
+            .where(Utility.property_yardi == property_yardi)
+            .order_by(Utility.service.asc(), Utility.vendor.asc())
+        )
+    ).all()
+
+    # Contacts for all utilities in one joined query
+    contacts = await ContactLoader(db, "utilities").load_many([u.utility_id for u in utilities])
 
     utilities_data = []
     for u in utilities:
-        # Fetch linked contacts for this utility
-        contact_links = db.query(UtilityContact).filter(UtilityContact.utility_id == u.utility_id).all()
-        contact_ids = [link.contact_id for link in contact_links]
-        contacts = db.query(Contact).filter(Contact.contact_id.in_(contact_ids)).all() if contact_ids else []
-
         utility_dict = u.__dict__.copy()
-        utility_dict["contacts"] = [c.__dict__ for c in contacts]
+        utility_dict["contacts"] = contacts[u.utility_id]
         utilities_data.append(utility_dict)
 
-    return utilities_data
+    body = render_body(request, utilities_data)
+
+    return await cache_response(request, property_yardi, etag, body)
 
 
 @router.post("/utilities", status_code=201)
 async def create_utility(
     utility: dict = Body(...),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     user=Depends(verify_token),
 ):
     """
@@ -63,7 +82,7 @@ async def create_utility(
 
     Args:
         utility (dict): Request body containing utility fields.
-        db (Session): Database session.
+        db (AsyncSession): Database session.
         user (dict): Authenticated user.
 
     Returns:
@@ -73,21 +92,24 @@ async def create_utility(
 
     new_utility = Utility(**utility)
     db.add(new_utility)
-    db.commit()
-    db.refresh(new_utility)
+    await db.flush()  # assigns the id
 
     # Link contacts
     for c in contacts:
         new_contact = Contact(**c)
         db.add(new_contact)
-        db.commit()
-        db.refresh(new_contact)
+        await db.flush()
 
         link = UtilityContact(utility_id=new_utility.utility_id, contact_id=new_contact.contact_id)
         db.add(link)
-        db.commit()
+        await index_entity(db, "contact", new_contact)
 
-    log_add(db, user["name"], "utility", new_utility.utility_id, new_utility.__dict__, new_utility)
+    await index_entity(db, "utility", new_utility)
+    await record_property_changes(
+        db, new_utility.property_yardi, entity=("utility", new_utility.utility_id)
+    )
+    await log_add(db, user["name"], "utility", new_utility.utility_id, new_utility.__dict__, new_utility)
+    await db.commit()
     return {k: v for k, v in new_utility.__dict__.items() if not k.startswith("_")}
 
 
@@ -95,7 +117,7 @@ async def create_utility(
 async def update_utility(
     utility_id: int,
     updated: dict = Body(...),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     user=Depends(verify_token),
 ):
     """
@@ -104,29 +126,34 @@ async def update_utility(
     Args:
         utility_id (int): ID of the utility to update.
         updated (dict): Fields and values to update.
-        db (Session): Database session.
+        db (AsyncSession): Database session.
         user (dict): Authenticated user.
 
     Returns:
         dict: Confirmation message and updated utility (cleaned).
     """
-    utility = db.query(Utility).filter(Utility.utility_id == utility_id).first()
+    utility = await db.scalar(select(Utility).where(Utility.utility_id == utility_id))
     if not utility:
         raise HTTPException(status_code=404, detail="Utility not found")
+    old_yardi = utility.property_yardi
 
     # Apply updates field by field, logging only real changes
     for key, value in updated.items():
-        if hasattr(utility, key):
+        if hasattr(utility, key) and key not in TRACKING_COLUMNS:
             old_value = getattr(utility, key)
             if old_value != value:
                 setattr(utility, key, value)
-                log_edit(
+                await log_edit(
                     db, user["name"], "utility",
                     utility.utility_id, key, old_value, value, utility
                 )
 
-    db.commit()
-    db.refresh(utility)
+    await index_entity(db, "utility", utility)
+    await record_property_changes(
+        db, old_yardi, utility.property_yardi, entity=("utility", utility_id)
+    )
+    await db.commit()
+    await db.refresh(utility)
     return {
         "message": "Utility updated successfully",
         "utility": {k: v for k, v in utility.__dict__.items() if not k.startswith("_")},
@@ -136,7 +163,7 @@ async def update_utility(
 @router.delete("/utilities/{utility_id}")
 async def delete_utility(
     utility_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     user=Depends(verify_token),
 ):
     """
@@ -144,19 +171,22 @@ async def delete_utility(
 
     Args:
         utility_id (int): ID of the utility to delete.
-        db (Session): Database session.
+        db (AsyncSession): Database session.
         user (dict): Authenticated user.
 
     Returns:
         dict: Confirmation message after deletion.
     """
-    utility = db.query(Utility).filter(Utility.utility_id == utility_id).first()
+    utility = await db.scalar(select(Utility).where(Utility.utility_id == utility_id))
     if not utility:
         raise HTTPException(status_code=404, detail="Utility not found")
 
     # Log before deletion
-    log_delete(db, user["name"], "utility", utility.utility_id, utility.__dict__, utility)
+    await log_delete(db, user["name"], "utility", utility.utility_id, utility.__dict__, utility)
 
-    db.delete(utility)
-    db.commit()
+    await db.delete(utility)
+    await remove_entity(db, "utility", utility_id)
+    record_deletion(db, "utility", utility_id, utility.property_yardi)
+    await record_property_changes(db, utility.property_yardi, entity=("utility", utility_id))
+    await db.commit()
     return {"detail": "Utility deleted"}
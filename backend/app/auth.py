@@ -1,7 +1,14 @@
 from fastapi import Depends, HTTPException
 from fastapi.security import OAuth2PasswordBearer
 from jose import jwt, jwk
+from requests.adapters import HTTPAdapter
+from collections import OrderedDict
+import asyncio
+import contextlib
 import requests
+import hashlib
+import threading
+import time
 import os
 
 # -------------------------------------------------------------------
@@ -17,18 +24,384 @@ oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
 AZURE_AD_TENANT_ID = os.getenv("AZURE_AD_TENANT_ID")
 AZURE_AD_CLIENT_ID = os.getenv("AZURE_AD_CLIENT_ID")
 
+# JWKS endpoint (overridable so tests/local dev can point at a stand-in)
+AZURE_AD_JWKS_URL = os.getenv(
+    "AZURE_AD_JWKS_URL",
+    f"https://login.microsoftonline.com/{AZURE_AD_TENANT_ID}/discovery/v2.0/keys",
+)
+
+# Key cache tuning
+JWKS_CACHE_TTL_SECONDS = float(os.getenv("JWKS_CACHE_TTL_SECONDS", "3600"))
+JWKS_MIN_REFRESH_INTERVAL_SECONDS = float(os.getenv("JWKS_MIN_REFRESH_INTERVAL_SECONDS", "30"))
+JWKS_HTTP_TIMEOUT_SECONDS = float(os.getenv("JWKS_HTTP_TIMEOUT_SECONDS", "5"))
+
+# Background refresher (started from the app lifespan)
+JWKS_REFRESH_INTERVAL_SECONDS = float(os.getenv("JWKS_REFRESH_INTERVAL_SECONDS", "900"))
+JWKS_PREWARM_TIMEOUT_SECONDS = float(os.getenv("JWKS_PREWARM_TIMEOUT_SECONDS", "10"))
+
+# Max number of verified tokens remembered per process
+TOKEN_CACHE_SIZE = int(os.getenv("TOKEN_CACHE_SIZE", "1024"))
+
+
+def _build_http_session():
+    """
+    Create a pooled HTTP session for talking to the JWKS endpoint.
+
+    Reusing one session keeps the TLS connection to Azure AD alive
+    between refreshes instead of re-handshaking every time.
+    """
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=4, max_retries=1)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+class JWKSCache:
+    """
+    In-process cache of Azure AD signing keys (JWKS).
+
+    - Keys are served from memory until `ttl` seconds have passed.
+    - An unknown `kid` triggers at most one refetch, and refetches are
+      rate limited to one per `min_refresh_interval` seconds.
+    - If Azure AD is unreachable, the last good key set keeps being
+      served (stale) rather than failing every request.
+    """
+
+    def __init__(
+        self,
+        url,
+        ttl=JWKS_CACHE_TTL_SECONDS,
+        min_refresh_interval=JWKS_MIN_REFRESH_INTERVAL_SECONDS,
+        timeout=JWKS_HTTP_TIMEOUT_SECONDS,
+        session=None,
+    ):
+        self.url = url
+        self.ttl = ttl
+        self.min_refresh_interval = min_refresh_interval
+        self.timeout = timeout
+        self.session = session or _build_http_session()
+        self._keys = {}              # kid -> JWK dict
+        self._public_keys = {}       # kid -> constructed RSA key
+        self._fetched_at = None      # monotonic time of last successful fetch
+        self._last_attempt = None    # monotonic time of last fetch attempt
+        self._lock = threading.Lock()
+        # When set (by JWKSRefresher), refreshes are handed off to the
+        # background task instead of blocking the calling request.
+        self.background_refresh = None
+
+    def _fetch(self):
+        """Download the JWKS document and index keys by `kid`."""
+        resp = self.session.get(self.url, timeout=self.timeout)
+        resp.raise_for_status()
+        return {k["kid"]: k for k in resp.json()["keys"] if "kid" in k}
+
+    @staticmethod
+    def _construct(keys):
+        """Pre-build RSA key objects so verification skips jwk.construct."""
+        public_keys = {}
+        for kid, key in keys.items():
+            try:
+                public_keys[kid] = jwk.construct(key, algorithm="RS256")
+            except Exception as e:
+                print("JWKS key construct error:", kid, e)
+        return public_keys
+
+    def _is_fresh(self, now):
+        return self._fetched_at is not None and now - self._fetched_at < self.ttl
+
+    def _can_attempt(self, now):
+        return (
+            self._last_attempt is None
+            or now - self._last_attempt >= self.min_refresh_interval
+        )
+
+    def refresh(self, force=False):
+        """
+        Refetch the key set.
+
+        Concurrent callers share a single fetch. Unless `force` is set,
+        attempts are rate limited by `min_refresh_interval`.
+
+        Returns:
+            bool: True if a new key set was loaded.
+        """
+        with self._lock:
+            now = time.monotonic()
+            if not force and not self._can_attempt(now):
+                return False
+            self._last_attempt = now
+            try:
+                keys = self._fetch()
+                public_keys = self._construct(keys)
+            except Exception as e:
+                # Keep serving whatever we already have
+                print("JWKS refresh error:", e)
+                return False
+            self._keys = keys
+            self._public_keys = public_keys
+            self._fetched_at = time.monotonic()
+            return True
+
+    def _request_refresh(self):
+        """Refresh inline, or just schedule it if a background task owns refreshing."""
+        if self.background_refresh is not None:
+            self.background_refresh()
+            return False
+        return self.refresh()
+
+    @property
+    def ready(self):
+        """True once at least one key set has been loaded."""
+        return bool(self._keys)
+
+    def get_keys(self):
+        """
+        Return the cached key set, refreshing it first if the TTL expired.
+
+        Returns:
+            list[dict]: JWK dictionaries (possibly stale if Azure AD is down).
+        """
+        if not self._is_fresh(time.monotonic()):
+            self._request_refresh()
+        return list(self._keys.values())
+
+    def get_key(self, kid):
+        """
+        Look up a signing key by `kid`.
+
+        An unknown `kid` usually means Azure AD rotated its keys, so the
+        key set is refetched once (subject to rate limiting). With a
+        background refresher running the refetch is only scheduled.
+
+        Returns:
+            dict | None: Matching JWK, or None if it does not exist.
+        """
+        if not self._is_fresh(time.monotonic()):
+            self._request_refresh()
+        key = self._keys.get(kid)
+        if key is None and self._request_refresh():
+            key = self._keys.get(kid)
+        return key
+
+    def get_public_key(self, kid):
+        """
+        Same lookup rules as get_key, but returns the pre-constructed key.
+
+        Returns:
+            Key | None: RSA public key object ready for jwt.decode.
+        """
+        if self.get_key(kid) is None:
+            return None
+        return self._public_keys.get(kid)
+
+    def has_kid(self, kid):
+        """Check whether `kid` is in the current key set (no fetching)."""
+        return kid in self._keys
+
+    def stats(self):
+        """Return a snapshot of cache state for diagnostics."""
+        now = time.monotonic()
+        return {
+            "url": self.url,
+            "kids": sorted(self._keys),
+            "age_seconds": None if self._fetched_at is None else round(now - self._fetched_at, 3),
+            "fresh": self._is_fresh(now),
+            "background": self.background_refresh is not None,
+        }
+
+
+class JWKSRefresher:
+    """
+    Async background task that keeps a JWKSCache warm.
+
+    The blocking HTTP fetch runs in a worker thread, so the event loop is
+    never stalled by a slow Azure AD response. While running, request
+    paths never fetch keys themselves; a TTL expiry or unknown `kid`
+    just wakes this task up early.
+    """
+
+    def __init__(self, cache, interval=JWKS_REFRESH_INTERVAL_SECONDS):
+        self.cache = cache
+        self.interval = interval
+        self._task = None
+        self._loop = None
+        self._wake = None
+
+    @property
+    def running(self):
+        return self._task is not None and not self._task.done()
+
+    async def start(self, prewarm_timeout=JWKS_PREWARM_TIMEOUT_SECONDS):
+        """
+        Prewarm the key set, then start the refresh loop.
+
+        Prewarming is bounded by `prewarm_timeout`; if Azure AD does not
+        answer in time the app still starts, but reports not ready.
+        """
+        self._loop = asyncio.get_running_loop()
+        self._wake = asyncio.Event()
+        try:
+            await asyncio.wait_for(
+                asyncio.to_thread(self.cache.refresh, True), prewarm_timeout
+            )
+        except asyncio.TimeoutError:
+            print("JWKS prewarm timed out after", prewarm_timeout, "seconds")
+        self.cache.background_refresh = self.nudge
+        self._task = asyncio.create_task(self._run())
+
+    def nudge(self):
+        """Ask for an early refresh. Safe to call from any thread."""
+        if self._loop is not None and not self._loop.is_closed():
+            self._loop.call_soon_threadsafe(self._wake.set)
+
+    async def _run(self):
+        while True:
+            # Retry sooner while we have no fresh keys
+            if self.cache.stats()["fresh"]:
+                timeout = self.interval
+            else:
+                timeout = max(self.cache.min_refresh_interval, 1.0)
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout)
+                scheduled = False
+            except asyncio.TimeoutError:
+                scheduled = True
+            self._wake.clear()
+            # Scheduled refreshes always fetch; nudges obey the rate limit
+            await asyncio.to_thread(self.cache.refresh, scheduled)
+
+    async def stop(self):
+        """Cancel the refresh loop and return to inline refreshing."""
+        self.cache.background_refresh = None
+        if self._task is not None:
+            self._task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._task
+            self._task = None
+
+
+class TokenCache:
+    """
+    Bounded LRU of already-verified token payloads.
+
+    Entries are keyed by a SHA-256 digest of the raw token (the token
+    itself is never stored) and are dropped once the token's `exp`
+    passes, so a cache hit skips signature verification entirely.
+    """
+
+    def __init__(self, maxsize=TOKEN_CACHE_SIZE):
+        self.maxsize = maxsize
+        self._entries = OrderedDict()   # digest -> (exp, kid, payload)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def digest(token):
+        return hashlib.sha256(token.encode()).digest()
+
+    def get(self, digest, is_valid_kid=None):
+        """
+        Return the cached payload for `digest`, or None on a miss.
+
+        Args:
+            digest (bytes): Token digest from TokenCache.digest.
+            is_valid_kid (callable, optional): Rejects entries whose
+                signing key has since been removed from the JWKS.
+        """
+        with self._lock:
+            entry = self._entries.get(digest)
+            if entry is not None:
+                exp, kid, payload = entry
+                if exp > time.time() and (is_valid_kid is None or is_valid_kid(kid)):
+                    self._entries.move_to_end(digest)
+                    self.hits += 1
+                    return payload
+                del self._entries[digest]
+            self.misses += 1
+            return None
+
+    def put(self, digest, kid, payload):
+        """Remember a verified payload until its `exp` claim."""
+        exp = payload.get("exp")
+        if not isinstance(exp, (int, float)) or self.maxsize <= 0:
+            return
+        with self._lock:
+            self._entries[digest] = (exp, kid, payload)
+            self._entries.move_to_end(digest)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        """Return hit/miss counters and current size."""
+        return {
+            "size": len(self._entries),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
+
+
+# Process-wide caches used by verify_token
+_jwks_cache = JWKSCache(AZURE_AD_JWKS_URL)
+_token_cache = TokenCache()
+_jwks_refresher = None
+
 
 def get_azure_public_keys():
     """
     Retrieve Azure AD public signing keys (JWKS).
 
     These keys are used to validate JWT signatures issued by Azure AD.
+    Served from the in-process cache; see JWKSCache.
 
     Returns:
         list[dict]: A list of JWK (JSON Web Key) dictionaries.
     """
-    jwks_url = f"https://login.microsoftonline.com/{AZURE_AD_TENANT_ID}/discovery/v2.0/keys"
-    return requests.get(jwks_url).json()["keys"]
+    return _jwks_cache.get_keys()
+
+
+async def start_jwks_refresher():
+    """Start the background JWKS refresher (called from the app lifespan)."""
+    global _jwks_refresher
+    _jwks_refresher = JWKSRefresher(_jwks_cache)
+    await _jwks_refresher.start()
+
+
+async def stop_jwks_refresher():
+    """Stop the background JWKS refresher, if running."""
+    global _jwks_refresher
+    if _jwks_refresher is not None:
+        await _jwks_refresher.stop()
+        _jwks_refresher = None
+
+
+def jwks_ready():
+    """
+    Readiness signal for auth.
+
+    Returns:
+        bool: True if signing keys are loaded and tokens can be verified.
+    """
+    return _jwks_cache.ready
+
+
+def get_auth_cache_stats():
+    """
+    Snapshot of the auth caches for this worker process.
+
+    Returns:
+        dict: `tokens` (hit/miss counters) and `jwks` (key set state).
+    """
+    return {"tokens": _token_cache.stats(), "jwks": _jwks_cache.stats()}
 
 
 def verify_token(token: str = Depends(oauth2_scheme)):
@@ -36,8 +409,9 @@ def verify_token(token: str = Depends(oauth2_scheme)):
     Validate an Azure AD JWT token.
 
     Steps:
+    - Return the cached payload if this exact token was already verified.
     - Extract unverified header to identify which key was used.
-    - Match against Azure AD's published keys.
+    - Match against Azure AD's published keys (cached).
     - Decode and validate the token's signature, audience, and issuer.
 
     Args:
@@ -50,14 +424,20 @@ def verify_token(token: str = Depends(oauth2_scheme)):
         HTTPException: If validation fails (401 Unauthorized).
     """
     try:
-        keys = get_azure_public_keys()
+        # Fast path: this token was already verified and has not expired
+        digest = _token_cache.digest(token)
+        cached = _token_cache.get(digest, _jwks_cache.has_kid)
+        if cached is not None:
+            return dict(cached)
 
         # Extract header without verifying signature
         unverified_header = jwt.get_unverified_header(token)
+        kid = unverified_header["kid"]
 
-        # Find matching public key by 'kid'
-        key = next(k for k in keys if k["kid"] == unverified_header["kid"])
-        public_key = jwk.construct(key, algorithm="RS256")
+        # Find matching (pre-constructed) public key by 'kid'
+        public_key = _jwks_cache.get_public_key(kid)
+        if public_key is None:
+            raise ValueError(f"Unknown signing key: {kid}")
 
         # Decode and validate the token
         payload = jwt.decode(
@@ -68,7 +448,8 @@ def verify_token(token: str = Depends(oauth2_scheme)):
             issuer=f"https://sts.windows.net/{AZURE_AD_TENANT_ID}/"
         )
 
-        return payload
+        _token_cache.put(digest, kid, payload)
+        return dict(payload)
 
     except Exception as e:
         # Log error for debugging
@@ -0,0 +1,141 @@
+from fastapi import Response
+from app.etags import etag_headers
+from app.cache_backends import cache_backend
+from app.formats import MEDIA_TYPES, render, response_format
+import threading
+
+# -------------------------------------------------------------------
+# Response Cache
+# Per-property GET endpoints (/properties/{yardi}, /suites, /services,
+# /utilities, /codes, /permits, /property-photos/{yardi}) depend only
+# on one property's rows, so their serialized bodies are cached per
+# (endpoint, property_yardi, property version). JSON and MessagePack
+# bodies (app.formats) are separate entries.
+#
+# The version is the property's ETag (app.etags), looked up by the
+# route anyway, so an entry can never be served after a write: the
+# write bumps the version and the next lookup misses. Writes also drop
+# the property's entries right away (invalidate(), via app.changes) so
+# stale bodies do not sit in the cache until evicted.
+#
+# Bodies live in the shared cache backend (app.cache_backends); with
+# CACHE_BACKEND=sqlite or redis every worker sees the same entries and
+# invalidations. Size and count limits are the backend's.
+# -------------------------------------------------------------------
+
+
+class ResponseCache:
+    """
+    Response bodies keyed by (endpoint, yardi, version) in a cache backend.
+
+    Entries are tagged with their property, so invalidate() drops all
+    of a property's endpoints at once. Hit/miss counters are per worker.
+    """
+
+    def __init__(self, backend):
+        self.backend = backend
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    @staticmethod
+    def _key(endpoint, yardi, version):
+        return f"response:{yardi}:{version}:{endpoint}"
+
+    @staticmethod
+    def _tag(yardi):
+        return f"property:{yardi}"
+
+    async def get(self, endpoint, yardi, version):
+        """Return the cached body, or None."""
+        body = await self.backend.get(self._key(endpoint, yardi, version))
+        with self._lock:
+            if body is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return body
+
+    async def put(self, endpoint, yardi, version, body):
+        await self.backend.set(self._key(endpoint, yardi, version), body, tags=(self._tag(yardi),))
+
+    async def invalidate(self, yardi):
+        """Drop every cached response of one property (in all workers)."""
+        await self.backend.invalidate(self._tag(yardi))
+        with self._lock:
+            self.invalidations += 1
+
+    async def stats(self):
+        with self._lock:
+            counters = {
+                "hits": self.hits,
+                "misses": self.misses,
+                "invalidations": self.invalidations,
+            }
+        return {**counters, **await self.backend.stats()}
+
+
+response_cache = ResponseCache(cache_backend)
+
+
+def request_endpoint(request):
+    """
+    Cache key for the requested representation: format, path and
+    sorted query.
+
+    Example:
+        /suites?property_yardi=P1 → "json:/suites?property_yardi=P1"
+    """
+    query = "&".join(f"{k}={v}" for k, v in sorted(request.query_params.multi_items()))
+    return f"{response_format(request)}:{request.url.path}?{query}"
+
+
+def render_body(request, content):
+    """Serialize `content` in the request's format (see app.formats.render)."""
+    return render(content, response_format(request))
+
+
+def _response(request, body, etag):
+    fmt = response_format(request)
+    return Response(
+        body,
+        media_type=MEDIA_TYPES[fmt],
+        headers=etag_headers(etag, fmt) if etag is not None else None,
+    )
+
+
+async def cached_response(request, yardi, etag):
+    """
+    Cached response for this request at the property's current version.
+
+    Args:
+        request (Request): Incoming request.
+        yardi (str): Property the endpoint depends on.
+        etag (str | None): Current property ETag (None: not cacheable).
+
+    Returns:
+        Response | None: Tagged response, or None on a miss.
+    """
+    if etag is None:
+        return None
+    body = await response_cache.get(request_endpoint(request), yardi, etag)
+    return _response(request, body, etag) if body is not None else None
+
+
+async def cache_response(request, yardi, etag, body):
+    """
+    Store a freshly built body and return it as a tagged response.
+
+    Args:
+        request (Request): Incoming request.
+        yardi (str): Property the endpoint depends on.
+        etag (str | None): Property ETag read before building the body.
+        body (bytes): Body in the request's format (see render_body).
+
+    Returns:
+        Response: Response carrying the ETag.
+    """
+    if etag is not None:
+        await response_cache.put(request_endpoint(request), yardi, etag, body)
+    return _response(request, body, etag)
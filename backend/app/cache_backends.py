@@ -0,0 +1,424 @@
+from abc import ABC, abstractmethod
+from collections import OrderedDict, defaultdict
+import asyncio
+import hashlib
+import math
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from app.database import DATABASE_URL
+
+# -------------------------------------------------------------------
+# Cache Backends
+# Key/value stores behind the response cache (app.cache) and the row
+# count cache (app.counts). Values are bytes; entries can carry a TTL
+# and tags, and invalidate(tag) drops every entry with that tag.
+# Counters (incr) are never evicted; the caches use them as generation
+# numbers.
+#
+# CACHE_BACKEND selects the store:
+#   memory  in-process LRU (default). Each gunicorn worker has its own,
+#           so hit rates drop and invalidations stay in one worker.
+#   sqlite  SQLite file in WAL mode (CACHE_SQLITE_PATH), shared by every
+#           worker on the host; no external service needed. Evicts the
+#           least recently stored entries. The default path is named
+#           after DATABASE_URL, so deployments on one host sharing a
+#           temp dir never share counters or entries.
+#   redis   Redis or any RESP-compatible server (CACHE_REDIS_URL),
+#           shared across hosts. Needs the optional `redis` package;
+#           size limits come from the server's maxmemory policy.
+#
+# Limits for memory/sqlite: CACHE_MAX_ENTRIES (0 disables caching) and
+# CACHE_MAX_BYTES.
+# -------------------------------------------------------------------
+
+CACHE_BACKEND = os.getenv("CACHE_BACKEND", "memory")
+CACHE_MAX_ENTRIES = int(os.getenv("CACHE_MAX_ENTRIES", "4096"))
+CACHE_MAX_BYTES = int(os.getenv("CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+CACHE_SQLITE_PATH = os.getenv("CACHE_SQLITE_PATH") or os.path.join(
+    tempfile.gettempdir(),
+    f"pis-cache-{hashlib.sha1((DATABASE_URL or '').encode()).hexdigest()[:12]}.sqlite3",
+)
+CACHE_REDIS_URL = os.getenv("CACHE_REDIS_URL", "redis://localhost:6379/0")
+CACHE_KEY_PREFIX = os.getenv("CACHE_KEY_PREFIX", "pis:")
+
+
+class CacheBackend(ABC):
+    """
+    Interface shared by all backends (all methods are coroutines).
+
+    get(key) -> bytes | None
+    set(key, value, ttl=None, tags=())
+    invalidate(tag)         drop every entry tagged `tag`
+    counter(key) -> int     current counter value (0 if unset)
+    incr(key) -> int        increment a counter, return the new value
+    clear()                 drop all entries and counters
+    stats() -> dict
+    """
+
+    name = None
+
+    @abstractmethod
+    async def get(self, key):
+        ...
+
+    @abstractmethod
+    async def set(self, key, value, ttl=None, tags=()):
+        ...
+
+    @abstractmethod
+    async def invalidate(self, tag):
+        ...
+
+    @abstractmethod
+    async def counter(self, key):
+        ...
+
+    @abstractmethod
+    async def incr(self, key):
+        ...
+
+    @abstractmethod
+    async def clear(self):
+        ...
+
+    @abstractmethod
+    async def stats(self):
+        ...
+
+
+class MemoryBackend(CacheBackend):
+    """Bounded in-process LRU (count and byte limits)."""
+
+    name = "memory"
+
+    def __init__(self, max_entries=CACHE_MAX_ENTRIES, max_bytes=CACHE_MAX_BYTES):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()        # key -> (value, expires, tags)
+        self._tags = defaultdict(set)        # tag -> keys
+        self._counters = {}
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.evictions = 0
+
+    async def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[1] is not None and entry[1] <= time.monotonic():
+                self._remove(key)
+                return None
+            self._entries.move_to_end(key)
+            return entry[0]
+
+    async def set(self, key, value, ttl=None, tags=()):
+        if self.max_entries <= 0 or len(value) > self.max_bytes:
+            return
+        expires = time.monotonic() + ttl if ttl else None
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (value, expires, tuple(tags))
+            for tag in tags:
+                self._tags[tag].add(key)
+            self._bytes += len(value)
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+
+    async def invalidate(self, tag):
+        with self._lock:
+            for key in list(self._tags.get(tag, ())):
+                self._remove(key)
+
+    async def counter(self, key):
+        with self._lock:
+            return self._counters.get(key, 0)
+
+    async def incr(self, key):
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + 1
+            return self._counters[key]
+
+    async def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._tags.clear()
+            self._counters.clear()
+            self._bytes = 0
+
+    def _remove(self, key):
+        value, _, tags = self._entries.pop(key)
+        self._bytes -= len(value)
+        for tag in tags:
+            keys = self._tags[tag]
+            keys.discard(key)
+            if not keys:
+                del self._tags[tag]
+
+    async def stats(self):
+        with self._lock:
+            return {
+                "backend": self.name,
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "evictions": self.evictions,
+            }
+
+
+_SQLITE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS cache_entries (
+    key TEXT PRIMARY KEY,
+    value BLOB NOT NULL,
+    size INTEGER NOT NULL,
+    expires REAL,
+    stored REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS ix_cache_entries_stored ON cache_entries (stored);
+CREATE TABLE IF NOT EXISTS cache_tags (
+    tag TEXT NOT NULL,
+    key TEXT NOT NULL REFERENCES cache_entries (key) ON DELETE CASCADE,
+    PRIMARY KEY (tag, key)
+);
+CREATE INDEX IF NOT EXISTS ix_cache_tags_key ON cache_tags (key);
+CREATE TABLE IF NOT EXISTS cache_counters (
+    key TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+);
+"""
+
+
+class SQLiteBackend(CacheBackend):
+    """
+    Cache in a local SQLite file, shared by all processes on the host.
+
+    Each process opens its own connection on first use (so nothing is
+    inherited across a gunicorn fork). WAL mode lets readers proceed
+    while one process writes, but a writer can still wait up to the 5 s
+    busy timeout, so every call runs in a worker thread (asyncio.to_thread)
+    instead of on the event loop.
+    """
+
+    name = "sqlite"
+
+    def __init__(self, path=CACHE_SQLITE_PATH, max_entries=CACHE_MAX_ENTRIES, max_bytes=CACHE_MAX_BYTES):
+        self.path = path
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._conn = None
+        self._pid = None
+        self._lock = threading.Lock()
+        self.evictions = 0
+
+    def _connection(self):
+        if self._conn is None or self._pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA foreign_keys=ON")
+            conn.executescript(_SQLITE_SCHEMA)
+            self._conn, self._pid = conn, os.getpid()
+        return self._conn
+
+    async def _run(self, fn, *args):
+        """Run `fn(conn, *args)` under the lock in a worker thread."""
+        def call():
+            with self._lock:
+                return fn(self._connection(), *args)
+        return await asyncio.to_thread(call)
+
+    async def get(self, key):
+        return await self._run(self._get, key)
+
+    @staticmethod
+    def _get(conn, key):
+        row = conn.execute(
+            "SELECT value, expires FROM cache_entries WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None:
+            return None
+        if row[1] is not None and row[1] <= time.time():
+            conn.execute("DELETE FROM cache_entries WHERE key = ?", (key,))
+            return None
+        return row[0]
+
+    async def set(self, key, value, ttl=None, tags=()):
+        if self.max_entries <= 0 or len(value) > self.max_bytes:
+            return
+        await self._run(self._set, key, value, ttl, tuple(tags))
+
+    def _set(self, conn, key, value, ttl, tags):
+        now = time.time()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute(
+                "INSERT INTO cache_entries (key, value, size, expires, stored) "
+                "VALUES (?, ?, ?, ?, ?) "
+                "ON CONFLICT (key) DO UPDATE SET value = excluded.value, "
+                "size = excluded.size, expires = excluded.expires, stored = excluded.stored",
+                (key, value, len(value), now + ttl if ttl else None, now),
+            )
+            conn.executemany(
+                "INSERT OR IGNORE INTO cache_tags (tag, key) VALUES (?, ?)",
+                [(tag, key) for tag in tags],
+            )
+            self._evict(conn)
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+
+    def _evict(self, conn):
+        count, size = conn.execute(
+            "SELECT count(*), coalesce(sum(size), 0) FROM cache_entries"
+        ).fetchone()
+        if count <= self.max_entries and size <= self.max_bytes:
+            return
+        victims = []
+        for key, entry_size in conn.execute("SELECT key, size FROM cache_entries ORDER BY stored"):
+            if count <= self.max_entries and size <= self.max_bytes:
+                break
+            victims.append((key,))
+            count -= 1
+            size -= entry_size
+        conn.executemany("DELETE FROM cache_entries WHERE key = ?", victims)
+        self.evictions += len(victims)
+
+    async def invalidate(self, tag):
+        await self._run(self._invalidate, tag)
+
+    @staticmethod
+    def _invalidate(conn, tag):
+        conn.execute(
+            "DELETE FROM cache_entries WHERE key IN (SELECT key FROM cache_tags WHERE tag = ?)",
+            (tag,),
+        )
+
+    async def counter(self, key):
+        return await self._run(self._counter, key)
+
+    @staticmethod
+    def _counter(conn, key):
+        row = conn.execute(
+            "SELECT value FROM cache_counters WHERE key = ?", (key,)
+        ).fetchone()
+        return row[0] if row else 0
+
+    async def incr(self, key):
+        return await self._run(self._incr, key)
+
+    @staticmethod
+    def _incr(conn, key):
+        return conn.execute(
+            "INSERT INTO cache_counters (key, value) VALUES (?, 1) "
+            "ON CONFLICT (key) DO UPDATE SET value = value + 1 RETURNING value",
+            (key,),
+        ).fetchone()[0]
+
+    async def clear(self):
+        await self._run(self._clear)
+
+    @staticmethod
+    def _clear(conn):
+        conn.execute("DELETE FROM cache_entries")
+        conn.execute("DELETE FROM cache_counters")
+
+    async def stats(self):
+        count, size = await self._run(self._totals)
+        return {
+            "backend": self.name,
+            "path": self.path,
+            "entries": count,
+            "max_entries": self.max_entries,
+            "bytes": size,
+            "max_bytes": self.max_bytes,
+            "evictions": self.evictions,   # by this worker
+        }
+
+    @staticmethod
+    def _totals(conn):
+        return conn.execute(
+            "SELECT count(*), coalesce(sum(size), 0) FROM cache_entries"
+        ).fetchone()
+
+
+class RedisBackend(CacheBackend):
+    """
+    Cache on a Redis-protocol server (requires the `redis` package).
+
+    Tags are Redis sets of member keys; counters are INCR keys. All keys
+    share CACHE_KEY_PREFIX so clear() only touches this app's keys.
+    """
+
+    name = "redis"
+
+    def __init__(self, url=CACHE_REDIS_URL, prefix=CACHE_KEY_PREFIX):
+        try:
+            import redis.asyncio as redis
+        except ImportError:
+            raise RuntimeError("CACHE_BACKEND=redis requires the redis package (pip install redis)")
+        self.prefix = prefix
+        self._client = redis.from_url(url)
+
+    def _key(self, kind, key):
+        return f"{self.prefix}{kind}:{key}"
+
+    async def get(self, key):
+        return await self._client.get(self._key("entry", key))
+
+    async def set(self, key, value, ttl=None, tags=()):
+        entry_key = self._key("entry", key)
+        pipe = self._client.pipeline(transaction=True)
+        pipe.set(entry_key, value, ex=math.ceil(ttl) if ttl else None)
+        for tag in tags:
+            pipe.sadd(self._key("tag", tag), entry_key)
+        await pipe.execute()
+
+    async def invalidate(self, tag):
+        tag_key = self._key("tag", tag)
+        members = await self._client.smembers(tag_key)
+        await self._client.delete(tag_key, *members)
+
+    async def counter(self, key):
+        value = await self._client.get(self._key("counter", key))
+        return int(value) if value is not None else 0
+
+    async def incr(self, key):
+        return await self._client.incr(self._key("counter", key))
+
+    async def clear(self):
+        keys = [k async for k in self._client.scan_iter(match=f"{self.prefix}*")]
+        if keys:
+            await self._client.delete(*keys)
+
+    async def stats(self):
+        keys = 0
+        async for _ in self._client.scan_iter(match=self._key("entry", "*")):
+            keys += 1
+        return {"backend": self.name, "entries": keys}
+
+
+def make_backend(name=CACHE_BACKEND):
+    """
+    Build the backend selected by CACHE_BACKEND.
+
+    Raises:
+        ValueError: If `name` is not a known backend.
+    """
+    if name == "memory":
+        return MemoryBackend()
+    if name == "sqlite":
+        return SQLiteBackend()
+    if name == "redis":
+        return RedisBackend()
+    raise ValueError(f"Unknown CACHE_BACKEND: {name} (use memory, sqlite or redis)")
+
+
+# Shared by the response and count caches
+cache_backend = make_backend()
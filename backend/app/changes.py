@@ -0,0 +1,110 @@
+from sqlalchemy import select, union
+from datetime import datetime
+from app.models import (
+    Suite, Service, Utility, SuiteContact, ServiceContact, UtilityContact, Tombstone,
+)
+from app.documents import refresh_property_documents
+from app.cache import response_cache
+from app.events import queue_change_events
+
+# -------------------------------------------------------------------
+# Property Changes
+# Single hook for "these properties' data changed". Every write route
+# calls record_property_changes() with the affected yardis before its
+# final commit, so derived data (the materialized property documents)
+# is updated in the same transaction as the change itself, drops the
+# properties' cached responses and, once committed, notifies GET /events
+# subscribers (see app.events).
+#
+# Delete routes also call record_deletion(), leaving a tombstone that
+# GET /sync reports to clients holding a copy of the row.
+# -------------------------------------------------------------------
+
+
+async def contact_property_yardis(db, contact_id):
+    """
+    Properties a contact is linked to (via suites, services or utilities).
+
+    Args:
+        db (AsyncSession): Database session.
+        contact_id (int): Contact identifier.
+
+    Returns:
+        list[str]: Property yardis, sorted.
+    """
+    linked = union(
+        select(Suite.property_yardi)
+        .join(SuiteContact, SuiteContact.suite_id == Suite.suite_id)
+        .where(SuiteContact.contact_id == contact_id),
+        select(Service.property_yardi)
+        .join(ServiceContact, ServiceContact.service_id == Service.service_id)
+        .where(ServiceContact.contact_id == contact_id),
+        select(Utility.property_yardi)
+        .join(UtilityContact, UtilityContact.utility_id == Utility.utility_id)
+        .where(UtilityContact.contact_id == contact_id),
+    ).subquery()
+    return list(
+        await db.scalars(select(linked.c.property_yardi).order_by(linked.c.property_yardi))
+    )
+
+
+async def record_property_changes(db, *yardis, entity=None):
+    """
+    Update everything derived from the given properties (not committed).
+
+    Args:
+        db (AsyncSession): Database session with the pending change.
+        *yardis (str): Affected properties; None values are ignored, so
+            callers can pass an old and new property_yardi as is.
+        entity (tuple, optional): (entity_type, entity_id) of the row
+            written, for change events; defaults to the property itself.
+    """
+    changed = await refresh_property_documents(db, yardis)
+    # Entries are keyed by version, so this only frees memory early:
+    # readers of the old version can never hit them after the commit
+    affected = sorted({y for y in yardis if y})
+    for yardi in affected:
+        await response_cache.invalidate(yardi)
+
+    versions = {doc.yardi: doc.version for doc in changed}
+    entity_type, entity_id = entity or ("property", None)
+    events = [
+        {
+            "entity_type": entity_type,
+            "entity_id": str(entity_id) if entity_id is not None else yardi,
+            "property_yardi": yardi,
+            "version": versions.get(yardi),
+        }
+        for yardi in affected
+    ]
+    if entity and not affected:
+        # e.g. a contact not linked to any property
+        events.append(
+            {
+                "entity_type": entity_type,
+                "entity_id": str(entity_id),
+                "property_yardi": None,
+                "version": None,
+            }
+        )
+    queue_change_events(db, events)
+
+
+def record_deletion(db, entity_type, entity_id, property_yardi=None):
+    """
+    Leave a tombstone for a deleted row (not committed).
+
+    Args:
+        db (AsyncSession): Database session with the pending delete.
+        entity_type (str): e.g. "suite", "contact".
+        entity_id: Identifier of the deleted row.
+        property_yardi (str, optional): Property the row belonged to.
+    """
+    db.add(
+        Tombstone(
+            entity_type=entity_type,
+            entity_id=str(entity_id),
+            property_yardi=property_yardi,
+            deleted_at=datetime.now(),
+        )
+    )
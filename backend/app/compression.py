@@ -0,0 +1,42 @@
+from starlette.middleware.gzip import GZipMiddleware, GZipResponder, IdentityResponder
+from starlette.datastructures import Headers
+
+# -------------------------------------------------------------------
+# Response Compression
+# Starlette's GZipMiddleware buffers a streamed body inside its
+# GzipFile: with Accept-Encoding: gzip (every browser) the first
+# message of a stream is just the gzip header and the data only leaves
+# when the stream ends, which defeats GET /properties/stream.
+#
+# StreamingGZipMiddleware compresses the same responses, but flushes
+# the compressor after each streamed chunk (a zlib sync flush), so
+# every chunk reaches the client as soon as the route yields it.
+# Whole (non-streamed) bodies compress exactly as before.
+# -------------------------------------------------------------------
+
+
+class _FlushingGZipResponder(GZipResponder):
+    def apply_compression(self, body, *, more_body):
+        if not more_body:
+            return super().apply_compression(body, more_body=more_body)
+        self.gzip_file.write(body)
+        self.gzip_file.flush()
+        body = self.gzip_buffer.getvalue()
+        self.gzip_buffer.seek(0)
+        self.gzip_buffer.truncate()
+        return body
+
+
+class StreamingGZipMiddleware(GZipMiddleware):
+    """GZipMiddleware that sends each streamed chunk without delay."""
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        if "gzip" in Headers(scope=scope).get("Accept-Encoding", ""):
+            responder = _FlushingGZipResponder(self.app, self.minimum_size, compresslevel=self.compresslevel)
+        else:
+            responder = IdentityResponder(self.app, self.minimum_size)
+        await responder(scope, receive, send)
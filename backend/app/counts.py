@@ -0,0 +1,106 @@
+from sqlalchemy import and_, text
+from app.cache_backends import cache_backend
+import hashlib
+import os
+import threading
+
+# -------------------------------------------------------------------
+# Row Counts
+# Total counts for paginated endpoints, cached per filter signature.
+#
+# - Exact counts live in the shared cache backend (app.cache_backends)
+#   for COUNT_CACHE_TTL_SECONDS. Each table has a generation counter in
+#   the backend, part of every count's key; a write bumps it
+#   (invalidate()), which retires the table's counts in every worker
+#   sharing the backend. The TTL bounds staleness from writes made
+#   outside the API.
+# - Estimated counts read the planner's row estimate (pg_class.reltuples)
+#   on Postgres; they cost no table scan at all.
+# -------------------------------------------------------------------
+
+COUNT_CACHE_TTL_SECONDS = float(os.getenv("COUNT_CACHE_TTL_SECONDS", "60"))
+
+
+class CountCache:
+    """
+    Row counts keyed by (table, generation, filter signature).
+
+    A count computed before a write carries the old generation in its
+    key, so it can never be read back after the write.
+    """
+
+    def __init__(self, backend, ttl=COUNT_CACHE_TTL_SECONDS):
+        self.backend = backend
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _key(table, generation, signature):
+        digest = hashlib.sha1(signature.encode()).hexdigest()
+        return f"count:{table}:{generation}:{digest}"
+
+    async def generation(self, table):
+        """Current generation of `table`; pass it to get() and put()."""
+        return await self.backend.counter(f"count-generation:{table}")
+
+    async def get(self, table, signature, generation):
+        """Return the cached count, or None if missing or expired."""
+        value = await self.backend.get(self._key(table, generation, signature))
+        with self._lock:
+            if value is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return int(value) if value is not None else None
+
+    async def put(self, table, signature, count, generation):
+        """Cache `count`, computed while `table` was at `generation`."""
+        await self.backend.set(self._key(table, generation, signature), str(count).encode(), ttl=self.ttl)
+
+    async def invalidate(self, table):
+        """Retire every cached count for `table` (call after writing to it)."""
+        await self.backend.incr(f"count-generation:{table}")
+
+    async def stats(self):
+        with self._lock:
+            return {"ttl_seconds": self.ttl, "hits": self.hits, "misses": self.misses}
+
+
+count_cache = CountCache(cache_backend)
+
+
+def filter_signature(conditions):
+    """
+    Stable text key for a list of WHERE conditions.
+
+    Example:
+        [Property.city.in_(["Davis"])] → "properties.city IN ('Davis')"
+    """
+    if not conditions:
+        return ""
+    return str(and_(*conditions).compile(compile_kwargs={"literal_binds": True}))
+
+
+async def estimate_rows(db, table):
+    """
+    Planner row estimate for `table`, without scanning it.
+
+    Args:
+        db (AsyncSession): Database session.
+        table (Table): Table to estimate.
+
+    Returns:
+        int | None: Estimated row count, or None if unavailable (not
+        Postgres, or the table has never been analyzed).
+    """
+    if db.get_bind().dialect.name != "postgresql":
+        return None
+    reltuples = await db.scalar(
+        text("SELECT reltuples FROM pg_class WHERE oid = CAST(:table AS regclass)"),
+        {"table": table.name},
+    )
+    if reltuples is None or reltuples < 0:
+        return None
+    return int(reltuples)
@@ -1,12 +1,27 @@
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy import create_engine, event, exc
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+from sqlalchemy.orm import sessionmaker, Session
 import os
+import contextlib
+import hashlib
+import hmac
+import threading
+import time
 from dotenv import load_dotenv
+from fastapi import Depends, Request
+from app.auth import verify_token
 
 # -------------------------------------------------------------------
 # Database Connection
-# Creates SQLAlchemy engine + session factory from DATABASE_URL.
-# Provides get_db() dependency for FastAPI routes.
+# Creates SQLAlchemy engines + session factories from DATABASE_URL.
+# - Async engine/session (asyncpg / aiosqlite) for FastAPI routes,
+#   provided by the get_async_db() dependency.
+# - Sync engine/session for scripts (init_db, alembic) via get_db().
+# - Pool sizing from env + per-worker pool statistics (PoolStats).
+# - Optional read replica (DATABASE_READ_URL) for GET routes via
+#   get_read_db() / get_read_session_factory(), with read-your-writes
+#   stickiness per user (carried by the client, see below).
 # -------------------------------------------------------------------
 
 # Load environment variables (from .env file)
@@ -15,23 +30,389 @@ load_dotenv()
 # Database connection string (e.g., Postgres on DigitalOcean)
 DATABASE_URL = os.environ.get("DATABASE_URL")
 
-# Create SQLAlchemy engine
-engine = create_engine(DATABASE_URL)
+# Optional read replica; GET routes read from it when set
+DATABASE_READ_URL = os.environ.get("DATABASE_READ_URL")
 
-# Session factory — generates DB sessions for requests
+# After a user writes, their reads stay on the primary for this long
+DB_READ_STICKY_SECONDS = float(os.environ.get("DB_READ_STICKY_SECONDS", "5"))
+
+# Key signing read-your-writes tokens; must be the same in every worker
+# (defaults to one derived from DATABASE_URL)
+DB_READ_STICKY_SECRET = os.environ.get("DB_READ_STICKY_SECRET")
+
+# Connection pool settings (per worker process; ignored for SQLite)
+DB_POOL_SIZE = int(os.environ.get("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(os.environ.get("DB_MAX_OVERFLOW", "10"))
+DB_POOL_TIMEOUT = float(os.environ.get("DB_POOL_TIMEOUT", "30"))
+DB_POOL_RECYCLE = int(os.environ.get("DB_POOL_RECYCLE", "1800"))
+DB_POOL_PRE_PING = os.environ.get("DB_POOL_PRE_PING", "true").lower() in ("1", "true", "yes")
+
+# Sync driver -> async driver used by the API
+_ASYNC_DRIVERS = {
+    "postgres": "postgresql+asyncpg",
+    "postgresql": "postgresql+asyncpg",
+    "postgresql+psycopg2": "postgresql+asyncpg",
+    "sqlite": "sqlite+aiosqlite",
+    "sqlite+pysqlite": "sqlite+aiosqlite",
+}
+
+
+def to_async_url(url):
+    """
+    Translate a sync database URL into its async-driver equivalent.
+
+    Example:
+        postgresql://u:p@host/db?sslmode=require
+            → postgresql+asyncpg://u:p@host/db?ssl=require
+
+    Args:
+        url (str): Sync SQLAlchemy URL (as stored in DATABASE_URL).
+
+    Returns:
+        URL: URL using asyncpg (Postgres) or aiosqlite (SQLite).
+    """
+    u = make_url(url)
+    drivername = _ASYNC_DRIVERS.get(u.drivername, u.drivername)
+    query = dict(u.query)
+    # asyncpg spells libpq's "sslmode" as "ssl"
+    if drivername == "postgresql+asyncpg" and "sslmode" in query:
+        query["ssl"] = query.pop("sslmode")
+    return u.set(drivername=drivername, query=query)
+
+
+def pool_options(url):
+    """
+    Connection pool keyword arguments for create_engine.
+
+    SQLite keeps SQLAlchemy's defaults (it picks a pool suited to
+    file vs. in-memory databases on its own).
+
+    Args:
+        url (str | URL): Database URL the engine is built for.
+
+    Returns:
+        dict: Pool options read from the DB_POOL_* environment variables.
+    """
+    if make_url(url).get_backend_name() == "sqlite":
+        return {}
+    return {
+        "pool_size": DB_POOL_SIZE,
+        "max_overflow": DB_MAX_OVERFLOW,
+        "pool_timeout": DB_POOL_TIMEOUT,
+        "pool_recycle": DB_POOL_RECYCLE,
+        "pool_pre_ping": DB_POOL_PRE_PING,
+    }
+
+
+class PoolStats:
+    """
+    Live connection pool counters for one engine in this worker.
+
+    Pool events track connects, checkouts and how many connections are
+    in use; get_async_db records how long each request waited to get a
+    connection (and how many gave up with a pool timeout).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.connects = 0
+        self.checkouts = 0
+        self.checkins = 0
+        self.invalidations = 0
+        self.in_use = 0
+        self.peak_in_use = 0
+        self.timeouts = 0
+        self.wait_count = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+
+    def attach(self, sync_engine):
+        """Register pool event listeners on `sync_engine`."""
+        event.listen(sync_engine, "connect", self._on_connect)
+        event.listen(sync_engine, "checkout", self._on_checkout)
+        event.listen(sync_engine, "checkin", self._on_checkin)
+        event.listen(sync_engine, "invalidate", self._on_invalidate)
+
+    def _on_connect(self, dbapi_connection, connection_record):
+        with self._lock:
+            self.connects += 1
+
+    def _on_checkout(self, dbapi_connection, connection_record, connection_proxy):
+        with self._lock:
+            self.checkouts += 1
+            self.in_use += 1
+            self.peak_in_use = max(self.peak_in_use, self.in_use)
+
+    def _on_checkin(self, dbapi_connection, connection_record):
+        with self._lock:
+            self.checkins += 1
+            self.in_use = max(self.in_use - 1, 0)
+
+    def _on_invalidate(self, dbapi_connection, connection_record, exception):
+        with self._lock:
+            self.invalidations += 1
+
+    def record_wait(self, seconds):
+        """Record how long a request waited for a pooled connection."""
+        with self._lock:
+            self.wait_count += 1
+            self.wait_total += seconds
+            self.wait_max = max(self.wait_max, seconds)
+
+    def record_timeout(self):
+        with self._lock:
+            self.timeouts += 1
+
+    def snapshot(self, pool=None):
+        """
+        Return the counters (plus live pool status, if given) as a dict.
+
+        Args:
+            pool (Pool, optional): Pool to read size/overflow from.
+        """
+        with self._lock:
+            data = {
+                "connects": self.connects,
+                "checkouts": self.checkouts,
+                "checkins": self.checkins,
+                "invalidations": self.invalidations,
+                "in_use": self.in_use,
+                "peak_in_use": self.peak_in_use,
+                "timeouts": self.timeouts,
+                "checkout_wait_ms": {
+                    "count": self.wait_count,
+                    "avg": round(self.wait_total / self.wait_count * 1000, 3) if self.wait_count else 0.0,
+                    "max": round(self.wait_max * 1000, 3),
+                },
+            }
+        if pool is not None:
+            data["pool"] = {
+                "class": type(pool).__name__,
+                "size": pool.size() if hasattr(pool, "size") else None,
+                "checked_in": pool.checkedin() if hasattr(pool, "checkedin") else None,
+                "checked_out": pool.checkedout() if hasattr(pool, "checkedout") else None,
+                "overflow": pool.overflow() if hasattr(pool, "overflow") else None,
+            }
+        return data
+
+
+# Create SQLAlchemy engines
+engine = create_engine(DATABASE_URL, **pool_options(DATABASE_URL))
+async_engine = create_async_engine(to_async_url(DATABASE_URL), **pool_options(DATABASE_URL))
+
+# Read engine: the replica if configured, otherwise the primary
+READ_REPLICA_ENABLED = bool(DATABASE_READ_URL)
+if READ_REPLICA_ENABLED:
+    read_async_engine = create_async_engine(
+        to_async_url(DATABASE_READ_URL), **pool_options(DATABASE_READ_URL)
+    )
+else:
+    read_async_engine = async_engine
+
+# Pool statistics for the API engines (exposed on /admin/db-pool)
+pool_stats = PoolStats()
+pool_stats.attach(async_engine.sync_engine)
+read_pool_stats = PoolStats() if READ_REPLICA_ENABLED else pool_stats
+if READ_REPLICA_ENABLED:
+    read_pool_stats.attach(read_async_engine.sync_engine)
+
+# Session factories — generate DB sessions for requests/scripts
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+AsyncSessionLocal = async_sessionmaker(
+    bind=async_engine, autoflush=False, expire_on_commit=False
+)
+AsyncReadSessionLocal = async_sessionmaker(
+    bind=read_async_engine, autoflush=False, expire_on_commit=False
+)
+
+
+# -------------------------------------------------------------------
+# Read-your-writes stickiness
+# A user who just committed a write reads from the primary for
+# DB_READ_STICKY_SECONDS, so replica lag never hides their own edit.
+#
+# The state travels with the client, so it holds whichever worker the
+# next request reaches: write responses carry a signed token (user +
+# commit time) as the READ_STICKY_COOKIE cookie and the
+# READ_STICKY_HEADER header; reads present either one back.
+# -------------------------------------------------------------------
+
+READ_STICKY_COOKIE = "pis_read_primary"
+READ_STICKY_HEADER = "X-Read-Primary"
+
+_sticky_key = (
+    DB_READ_STICKY_SECRET or f"read-sticky:{DATABASE_URL}"
+).encode()
+
+
+def _user_key(user):
+    """Stable identifier for the authenticated user (None if unknown)."""
+    if not isinstance(user, dict):
+        return None
+    return user.get("oid") or user.get("preferred_username") or user.get("name")
+
+
+def _sign(user_key, issued):
+    message = f"{user_key}:{issued}".encode()
+    return hmac.new(_sticky_key, message, hashlib.sha256).hexdigest()[:32]
+
+
+def make_sticky_token(user_key):
+    """
+    Token saying `user_key` committed a write just now.
+
+    Format:
+        "<issued, ms since epoch>.<HMAC of user and issued time>"
+    """
+    issued = int(time.time() * 1000)
+    return f"{issued}.{_sign(user_key, issued)}"
+
+
+def wrote_recently(request, user_key):
+    """
+    True if the request carries a valid token for `user_key` issued
+    within the sticky window.
+    """
+    if user_key is None or request is None:
+        return False
+    token = request.headers.get(READ_STICKY_HEADER) or request.cookies.get(READ_STICKY_COOKIE)
+    if not token:
+        return False
+    issued, _, signature = token.partition(".")
+    if not issued.isdigit() or not hmac.compare_digest(signature, _sign(user_key, int(issued))):
+        return False
+    return time.time() * 1000 - int(issued) < DB_READ_STICKY_SECONDS * 1000
+
+
+def set_sticky_token(request, response):
+    """
+    Attach the read-your-writes token to `response` if the request
+    committed a write (called by the app middleware).
+    """
+    token = getattr(request.state, "read_sticky_token", None)
+    if token is None:
+        return
+    response.headers[READ_STICKY_HEADER] = token
+    response.set_cookie(
+        READ_STICKY_COOKIE,
+        token,
+        max_age=max(1, int(DB_READ_STICKY_SECONDS)),
+        httponly=True,
+        secure=request.url.scheme == "https",
+        samesite="none" if request.url.scheme == "https" else "lax",
+    )
+
+
+@event.listens_for(Session, "after_commit")
+def _track_commit(session):
+    # get_async_db tags primary sessions with the requesting user and
+    # the request's state, where the middleware picks the token up
+    user_key = session.info.get("user_key")
+    state = session.info.get("request_state")
+    if user_key is not None and state is not None:
+        state.read_sticky_token = make_sticky_token(user_key)
+
 
 def get_db():
     """
-    FastAPI dependency that yields a database session.
+    Sync session generator for scripts and maintenance tasks.
 
     Usage:
-        db: Session = Depends(get_db)
+        db = next(get_db())
 
-    Ensures the session is closed after the request.
+    Ensures the session is closed after use.
     """
     db = SessionLocal()
     try:
         yield db
     finally:
         db.close()
+
+
+@contextlib.asynccontextmanager
+async def _open_session(factory, stats, user_key=None, request_state=None):
+    """
+    Open a session and check its connection out up front, so the time
+    spent waiting on the pool (and pool timeouts) can be recorded.
+    """
+    async with factory() as db:
+        db.info["user_key"] = user_key
+        db.info["request_state"] = request_state
+        t0 = time.perf_counter()
+        try:
+            await db.connection()
+        except exc.TimeoutError:
+            stats.record_timeout()
+            raise
+        stats.record_wait(time.perf_counter() - t0)
+        yield db
+
+
+async def get_async_db(request: Request, user=Depends(verify_token)):
+    """
+    FastAPI dependency that yields an async session on the primary.
+
+    Usage:
+        db: AsyncSession = Depends(get_async_db)
+
+    Used by routes that write. Queries are awaited, so a slow query no
+    longer blocks the event loop. Commits give the response a
+    read-your-writes token. Ensures the session is closed after the
+    request.
+    """
+    async with _open_session(AsyncSessionLocal, pool_stats, _user_key(user), request.state) as db:
+        yield db
+
+
+def _read_target(request, user):
+    """Session factory and pool stats to read from for this request."""
+    if READ_REPLICA_ENABLED and not wrote_recently(request, _user_key(user)):
+        return AsyncReadSessionLocal, read_pool_stats
+    return AsyncSessionLocal, pool_stats
+
+
+async def get_read_db(request: Request, user=Depends(verify_token)):
+    """
+    FastAPI dependency that yields an async session for reads.
+
+    Usage:
+        db: AsyncSession = Depends(get_read_db)
+
+    Reads go to the replica (DATABASE_READ_URL) unless none is
+    configured or the request carries the user's token from a write
+    within DB_READ_STICKY_SECONDS, in which case the primary is used.
+    """
+    factory, stats = _read_target(request, user)
+    async with _open_session(factory, stats) as db:
+        yield db
+
+
+async def get_read_session_factory(request: Request, user=Depends(verify_token)):
+    """
+    FastAPI dependency that returns a callable opening a read session.
+
+    Usage:
+        open_db = Depends(get_read_session_factory)
+        async with open_db() as db:
+            ...
+
+    For streaming responses: dependency cleanup runs before the body
+    is sent, so the generator opens (and closes) its own session. The
+    replica/primary choice is the same as get_read_db().
+    """
+    factory, stats = _read_target(request, user)
+    return lambda: _open_session(factory, stats)
+
+
+def get_pool_stats():
+    """
+    Pool statistics for this worker process.
+
+    Returns:
+        dict: PoolStats counters plus live pool status for the primary,
+        and under `read_replica` the same for the replica (if any).
+    """
+    stats = pool_stats.snapshot(async_engine.pool)
+    if READ_REPLICA_ENABLED:
+        stats["read_replica"] = read_pool_stats.snapshot(read_async_engine.pool)
+    return stats
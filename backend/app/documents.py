@@ -0,0 +1,435 @@
+from collections import defaultdict
+from sqlalchemy import Boolean, DateTime, Text, case, cast, func, literal_column, select
+from sqlalchemy.dialects.postgresql import aggregate_order_by
+from datetime import datetime
+import orjson
+import os
+from app.models import (
+    Property,
+    Suite,
+    Service,
+    Utility,
+    Permit,
+    Code,
+    SuiteContact,
+    ServiceContact,
+    UtilityContact,
+    Contact,
+    PropertyDocument,
+    Tombstone,
+)
+from app.loaders import ContactLoader
+
+# -------------------------------------------------------------------
+# Property Documents
+# Builds the nested property documents (suites, services, utilities,
+# permits, codes and their contacts) returned by the property list
+# endpoints. Children are bulk-fetched per batch of properties, so a
+# batch costs a fixed number of queries regardless of its size.
+#
+# Rows are selected as plain tuples of explicit columns (no ORM objects)
+# and turned into dicts by precomputed per-table serializers; the result
+# is ready for orjson as is.
+#
+# Documents can be trimmed with sparse selectors:
+#   fields  - which Property columns to load (yardi is always loaded)
+#   include - which child collections to fetch (others are skipped)
+#
+# Two engines build the same documents (PROPERTY_DOCUMENT_ENGINE):
+#   python - bulk IN (...) fetches grouped in Python (default)
+#   sql    - the database renders each document as JSON text in the
+#            page query itself (json_build_object/json_agg on Postgres,
+#            json_object/json_group_array on SQLite); the app passes
+#            the text through without re-serializing it
+#
+# Full documents are also materialized in property_documents: write
+# routes call refresh_property_documents() (via app.changes) before
+# committing, and the GET routes serve the stored JSON as is. The row's
+# version is the property's version, bumped by every write.
+# -------------------------------------------------------------------
+
+PROPERTY_DOCUMENT_ENGINE = os.getenv("PROPERTY_DOCUMENT_ENGINE", "python")
+
+
+def sql_engine_enabled():
+    """True when documents should be rendered by the database."""
+    return PROPERTY_DOCUMENT_ENGINE == "sql"
+
+# Property columns, in document order
+PROPERTY_FIELDS = tuple(c.key for c in Property.__table__.columns)
+
+# Child collections a document can include
+PROPERTY_CHILDREN = ("suites", "services", "utilities", "permits", "codes")
+
+# Child model, its id column and its contact join table (if any)
+_CHILD_MODELS = {
+    "suites": (Suite, "suite_id", SuiteContact),
+    "services": (Service, "service_id", ServiceContact),
+    "utilities": (Utility, "utility_id", UtilityContact),
+    "permits": (Permit, None, None),
+    "codes": (Code, None, None),
+}
+
+
+class RowSerializer:
+    """
+    Column projection + tuple-to-dict conversion for one model.
+
+    The column list and output keys are computed once at import, so
+    building a dict from a result row is a single dict(zip(...)).
+    """
+
+    __slots__ = ("columns", "keys")
+
+    def __init__(self, model):
+        self.columns = list(model.__table__.columns)
+        self.keys = tuple(c.key for c in self.columns)
+
+    def index(self, key):
+        """Position of column `key` in a selected row."""
+        return self.keys.index(key)
+
+    def to_dict(self, row):
+        return dict(zip(self.keys, row))
+
+
+# Precomputed serializers for the child tables and contacts
+_SERIALIZERS = {name: RowSerializer(model) for name, (model, _, _) in _CHILD_MODELS.items()}
+_CONTACT_SERIALIZER = RowSerializer(Contact)
+
+
+def property_columns(fields=None):
+    """
+    Property columns to select for the requested fields.
+
+    Args:
+        fields (Iterable[str], optional): Column names; None means all.
+
+    Returns:
+        list[Column]: Columns in document order, always including yardi.
+    """
+    if fields is None:
+        return [getattr(Property, f) for f in PROPERTY_FIELDS]
+    wanted = set(fields) | {"yardi"}
+    return [getattr(Property, f) for f in PROPERTY_FIELDS if f in wanted]
+
+
+async def build_property_documents(db, rows, include=PROPERTY_CHILDREN):
+    """
+    Build nested documents for a batch of properties.
+
+    Args:
+        db (AsyncSession): Database session.
+        rows (list[Row]): Property rows selected with property_columns().
+        include (Iterable[str]): Child collections to fetch and attach.
+
+    Returns:
+        list[dict]: One document per property, in the order given.
+    """
+    if not rows:
+        return []
+
+    include = [name for name in PROPERTY_CHILDREN if name in include]
+    yardis = [r.yardi for r in rows]
+
+    # Bulk fetch the requested children as plain row tuples
+    children = {}
+    for name in include:
+        model = _CHILD_MODELS[name][0]
+        serializer = _SERIALIZERS[name]
+        result = await db.execute(
+            select(*serializer.columns)
+            .where(model.property_yardi.in_(yardis))
+            .order_by(*model.__table__.primary_key.columns)
+        )
+        children[name] = result.all()
+
+    # Contacts for every child that carries them, one joined query per
+    # collection
+    contacts = {}
+    for name in include:
+        _, id_attr, link_model = _CHILD_MODELS[name]
+        if link_model is None:
+            continue
+        id_pos = _SERIALIZERS[name].index(id_attr)
+        ids = [row[id_pos] for row in children[name]]
+        contacts[name] = await ContactLoader(db, name).load_many(ids) if ids else {}
+
+    # Group children (with their contacts) by property_yardi
+    grouped = {}
+    for name in include:
+        _, id_attr, _ = _CHILD_MODELS[name]
+        serializer = _SERIALIZERS[name]
+        yardi_pos = serializer.index("property_yardi")
+        id_pos = serializer.index(id_attr) if id_attr is not None else None
+        by_yardi = defaultdict(list)
+        for row in children[name]:
+            d = serializer.to_dict(row)
+            if id_pos is not None:
+                d["contacts"] = contacts[name][row[id_pos]]
+            by_yardi[row[yardi_pos]].append(d)
+        grouped[name] = by_yardi
+
+    # Assemble final documents
+    keys = rows[0]._fields
+    result = []
+    for row in rows:
+        doc = dict(zip(keys, row))
+        for name in include:
+            doc[name] = grouped[name].get(row.yardi, [])
+        result.append(doc)
+    return result
+
+
+# -------------------------------------------------------------------
+# SQL engine: documents rendered by the database
+# -------------------------------------------------------------------
+
+def _json_value(column, dialect):
+    """SQL expression for `column` as a JSON value (matching orjson output)."""
+    if dialect != "sqlite":
+        return column
+    if isinstance(column.type, Boolean):
+        # SQLite stores booleans as 0/1
+        return case(
+            (column.is_(None), func.json("null")),
+            (column == True, func.json("true")),  # noqa: E712
+            else_=func.json("false"),
+        )
+    if isinstance(column.type, DateTime):
+        # Stored as "YYYY-MM-DD HH:MM:SS.ffffff"; orjson writes ISO 8601
+        # and drops zero microseconds
+        iso = func.replace(column, " ", "T")
+        return case(
+            (func.substr(column, 21) == "000000", func.substr(iso, 1, 19)),
+            else_=iso,
+        )
+    return column
+
+
+def _json_object(pairs, dialect):
+    args = []
+    for key, value in pairs:
+        args += [literal_column(f"'{key}'"), value]
+    if dialect == "postgresql":
+        return func.json_build_object(*args)
+    return func.json_object(*args)
+
+
+def _json_array(obj, stmt, order_by, dialect):
+    """
+    Scalar subquery aggregating `obj` over `stmt`'s rows into a JSON array
+    ([] when there are none), ordered by `order_by`.
+    """
+    if dialect == "postgresql":
+        agg = func.json_agg(aggregate_order_by(obj, *order_by))
+        return stmt.with_only_columns(
+            func.coalesce(agg, literal_column("'[]'::json"))
+        ).scalar_subquery()
+    # SQLite has no ORDER BY inside aggregates (before 3.44): order a
+    # correlated derived table instead, and re-mark its text as JSON
+    rows = stmt.with_only_columns(obj.label("j")).order_by(*order_by).subquery()
+    return func.json(select(func.json_group_array(func.json(rows.c.j))).scalar_subquery())
+
+
+def _contacts_array(model, id_attr, link_model, dialect):
+    pairs = [
+        (key, _json_value(col, dialect))
+        for key, col in zip(_CONTACT_SERIALIZER.keys, _CONTACT_SERIALIZER.columns)
+    ]
+    stmt = (
+        select(Contact.contact_id)
+        .join(link_model, link_model.contact_id == Contact.contact_id)
+        .where(getattr(link_model, id_attr) == getattr(model, id_attr))
+        .correlate(model)
+    )
+    return _json_array(_json_object(pairs, dialect), stmt, [link_model.id], dialect)
+
+
+def _children_array(name, dialect):
+    model, id_attr, link_model = _CHILD_MODELS[name]
+    serializer = _SERIALIZERS[name]
+    pairs = [(key, _json_value(col, dialect)) for key, col in zip(serializer.keys, serializer.columns)]
+    if link_model is not None:
+        pairs.append(("contacts", _contacts_array(model, id_attr, link_model, dialect)))
+    stmt = (
+        select(model.property_yardi)
+        .where(model.property_yardi == Property.yardi)
+        .correlate(Property)
+    )
+    order_by = list(model.__table__.primary_key.columns)
+    return _json_array(_json_object(pairs, dialect), stmt, order_by, dialect)
+
+
+def property_document_column(dialect, columns, include=PROPERTY_CHILDREN):
+    """
+    SQL expression rendering a property's full document as JSON text.
+
+    Add it to a select() over Property; the result column holds the
+    same document build_property_documents() would return, already
+    serialized.
+
+    Args:
+        dialect (str): Database dialect name ("postgresql" or "sqlite").
+        columns (list[Column]): Property columns to include.
+        include (Iterable[str]): Child collections to embed.
+
+    Returns:
+        Label: `document` column (JSON text).
+    """
+    pairs = [(c.key, _json_value(c, dialect)) for c in columns]
+    for name in PROPERTY_CHILDREN:
+        if name in include:
+            pairs.append((name, _children_array(name, dialect)))
+    doc = _json_object(pairs, dialect)
+    if dialect == "postgresql":
+        # Text, so the driver hands back the JSON as is (no decoding)
+        doc = cast(doc, Text)
+    return doc.label("document")
+
+
+# -------------------------------------------------------------------
+# Materialized documents (property_documents)
+# -------------------------------------------------------------------
+
+def dump_document(doc):
+    """Serialize a document exactly as ORJSONResponse would."""
+    return orjson.dumps(doc).decode()
+
+
+async def _sync_documents(db, yardis, write=True, bump=False):
+    """
+    Compare (and unless write=False, fix) the stored documents of `yardis`.
+
+    With bump=True every existing document gets a new version, changed
+    or not (a write happened, even if it is not visible in the body).
+
+    Returns:
+        tuple[dict, list]: yardis per outcome ("missing", "stale",
+        "orphaned") and the PropertyDocument rows created or changed.
+    """
+    # Lock the stored rows before building, so concurrent writers
+    # rebuild (and bump versions) one after the other
+    stmt = select(PropertyDocument).where(PropertyDocument.yardi.in_(yardis))
+    if write:
+        stmt = stmt.with_for_update()
+    stored = {d.yardi: d for d in (await db.scalars(stmt)).all()}
+
+    rows = (
+        await db.execute(
+            select(*property_columns()).where(Property.yardi.in_(yardis)).order_by(Property.yardi)
+        )
+    ).all()
+    bodies = {doc["yardi"]: dump_document(doc) for doc in await build_property_documents(db, rows)}
+
+    outcome = {"missing": [], "stale": [], "orphaned": []}
+    changed = []
+    now = datetime.now()
+    for yardi in yardis:
+        body = bodies.get(yardi)
+        doc = stored.get(yardi)
+        if body is None:
+            if doc is not None:
+                outcome["orphaned"].append(yardi)
+                if write:
+                    # The property is gone: sync clients must drop it
+                    await db.delete(doc)
+                    db.add(
+                        Tombstone(
+                            entity_type="property",
+                            entity_id=yardi,
+                            property_yardi=yardi,
+                            deleted_at=now,
+                        )
+                    )
+        elif doc is None:
+            outcome["missing"].append(yardi)
+            if write:
+                doc = PropertyDocument(yardi=yardi, version=1, body=body, updated_at=now)
+                db.add(doc)
+                changed.append(doc)
+        elif doc.body != body or bump:
+            if doc.body != body:
+                outcome["stale"].append(yardi)
+            if write:
+                doc.body = body
+                doc.version += 1
+                doc.updated_at = now
+                changed.append(doc)
+    return outcome, changed
+
+
+async def refresh_property_documents(db, yardis):
+    """
+    Rebuild the stored documents of `yardis` and bump their versions
+    (not committed).
+
+    Pending changes are flushed first so the new documents see them.
+    The version doubles as the property's version (see app.etags), so
+    it is bumped on every call, including for writes the document does
+    not show (photos); documents of deleted properties are removed.
+
+    Args:
+        db (AsyncSession): Database session.
+        yardis (Iterable[str]): Properties whose documents may have changed.
+
+    Returns:
+        list[PropertyDocument]: Rows created or changed.
+    """
+    yardis = sorted({y for y in yardis if y})
+    if not yardis:
+        return []
+    await db.flush()
+    _, changed = await _sync_documents(db, yardis, bump=True)
+    return changed
+
+
+async def rebuild_property_documents(db, batch_size=500, check=False):
+    """
+    Rebuild (or just compare) every stored document against live data.
+
+    Used for backfills and drift checks; see app.rebuild_documents.
+
+    Args:
+        db (AsyncSession): Database session.
+        batch_size (int): Properties per batch (one commit each).
+        check (bool): Only report differences, write nothing.
+
+    Returns:
+        dict: Number of properties "checked" and of "missing", "stale"
+        and "orphaned" documents found (and fixed, unless check=True).
+    """
+    report = {"checked": 0, "missing": 0, "stale": 0, "orphaned": 0}
+
+    def tally(outcome):
+        for key, found in outcome.items():
+            report[key] += len(found)
+
+    after = None
+    while True:
+        stmt = select(Property.yardi).order_by(Property.yardi).limit(batch_size)
+        if after is not None:
+            stmt = stmt.where(Property.yardi > after)
+        yardis = (await db.scalars(stmt)).all()
+        if not yardis:
+            break
+        after = yardis[-1]
+        report["checked"] += len(yardis)
+        outcome, _ = await _sync_documents(db, yardis, write=not check)
+        tally(outcome)
+        if not check:
+            await db.commit()
+
+    orphans = (
+        await db.scalars(
+            select(PropertyDocument.yardi).where(
+                ~select(Property.yardi).where(Property.yardi == PropertyDocument.yardi).exists()
+            )
+        )
+    ).all()
+    if orphans:
+        outcome, _ = await _sync_documents(db, orphans, write=not check)
+        tally(outcome)
+        if not check:
+            await db.commit()
+    return report
@@ -0,0 +1,121 @@
+from fastapi import Response
+from sqlalchemy import select
+from app.formats import response_format
+from app.models import PropertyDocument
+
+# -------------------------------------------------------------------
+# Conditional GETs
+# Per-property GET endpoints (the property itself and its children)
+# are tagged with the property's version from property_documents,
+# which every write route bumps through app.changes.
+#
+# A route looks the version up first (one primary-key lookup) and
+# answers 304 Not Modified when the client's If-None-Match already
+# names it, before any child row is loaded or serialized:
+#
+#     etag = await property_etag(db, yardi)
+#     if etag_matches(request, etag):
+#         return not_modified(request, etag)
+#     ...
+#     return Response(body, headers=etag_headers(etag, fmt))
+#
+# (app.cache's cached_response/cache_response add these headers too.)
+#
+# JSON and MessagePack bodies of one version are different bytes, so
+# each format has its own strong tag: "3.abc" for JSON, "3.abc-msgpack"
+# for MessagePack (see format_etag). A client's tag only matches when
+# it asks for the same format again.
+# -------------------------------------------------------------------
+
+# Let clients keep the body but revalidate it on every use
+ETAG_CACHE_CONTROL = "private, no-cache"
+
+
+def make_etag(version, updated_at):
+    """
+    Strong ETag for one property version.
+
+    The timestamp keeps tags unique if a property is deleted and
+    re-created (its version then restarts at 1).
+
+    Format:
+        "<version>.<updated_at in microseconds, hex>"
+    """
+    stamp = int(updated_at.timestamp() * 1_000_000)
+    return f'"{version}.{stamp:x}"'
+
+
+async def property_etag(db, yardi):
+    """
+    Current ETag of a property.
+
+    Args:
+        db (AsyncSession): Database session.
+        yardi (str): Property identifier.
+
+    Returns:
+        str | None: ETag, or None if the property has no stored
+        document (unknown property, or not backfilled yet).
+    """
+    row = (
+        await db.execute(
+            select(PropertyDocument.version, PropertyDocument.updated_at)
+            .where(PropertyDocument.yardi == yardi)
+        )
+    ).first()
+    if row is None:
+        return None
+    return make_etag(row.version, row.updated_at)
+
+
+def format_etag(etag, fmt):
+    """
+    Tag of `etag`'s representation in response format `fmt`.
+
+    JSON keeps the version tag as is; other formats add a suffix
+    inside the quotes, e.g. "3.abc" -> "3.abc-msgpack".
+    """
+    if fmt == "json":
+        return etag
+    return f'{etag[:-1]}-{fmt}"'
+
+
+def etag_matches(request, etag):
+    """
+    True if the request's If-None-Match names `etag` in the request's
+    response format (or is "*").
+
+    Uses the weak comparison required for If-None-Match, so a `W/`
+    prefix added by a proxy still matches.
+    """
+    if etag is None:
+        return False
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    etag = format_etag(etag, response_format(request))
+    for candidate in header.split(","):
+        candidate = candidate.strip()
+        if candidate == "*" or candidate.removeprefix("W/") == etag:
+            return True
+    return False
+
+
+def etag_headers(etag, fmt="json"):
+    """
+    Response headers for a tagged representation in format `fmt`.
+
+    The body's format follows the Accept header (app.formats), so
+    caches must key on it too.
+    """
+    return {
+        "ETag": format_etag(etag, fmt),
+        "Cache-Control": ETAG_CACHE_CONTROL,
+        "Vary": "Accept",
+    }
+
+
+def not_modified(request, etag):
+    """Empty 304 response for a matching conditional GET."""
+    return Response(status_code=304, headers=etag_headers(etag, response_format(request)))
+
@@ -0,0 +1,137 @@
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+import asyncio
+import orjson
+import os
+
+# -------------------------------------------------------------------
+# Change Events
+# Live notifications for GET /events (Server-Sent Events): every write
+# route reports what it changed through app.changes, and once the
+# transaction commits each affected property produces one event
+#
+#     {"entity_type": "suite", "entity_id": "12",
+#      "property_yardi": "P100", "version": 7}
+#
+# so clients can invalidate exactly the affected queries instead of
+# polling. `version` is the property's new version (its ETag version).
+#
+# Fan-out is an in-process broker: each connected client gets a
+# bounded queue. A client that falls EVENT_QUEUE_SIZE events behind is
+# dropped (its stream ends with a "dropped" event) rather than letting
+# its backlog grow; it should reconnect and refetch what it shows.
+# Each worker process only sees its own writes' events.
+# -------------------------------------------------------------------
+
+# Events buffered per client before it counts as a slow consumer
+EVENT_QUEUE_SIZE = int(os.getenv("EVENT_QUEUE_SIZE", "256"))
+
+# Idle seconds between keepalive comments on an open stream
+EVENT_KEEPALIVE_SECONDS = float(os.getenv("EVENT_KEEPALIVE_SECONDS", "15"))
+
+# Session.info key holding events of the open transaction
+_PENDING_KEY = "pending_change_events"
+
+
+class EventBroker:
+    """
+    In-process pub/sub with one bounded queue per subscriber.
+
+    publish() never blocks: a subscriber whose queue is full is
+    unsubscribed and told so with a None sentinel.
+    """
+
+    def __init__(self, queue_size=EVENT_QUEUE_SIZE):
+        self.queue_size = queue_size
+        self._subscribers = set()
+        self.published = 0
+        self.dropped = 0
+
+    def subscribe(self):
+        """Register a new subscriber and return its queue."""
+        queue = asyncio.Queue(maxsize=self.queue_size)
+        self._subscribers.add(queue)
+        return queue
+
+    def unsubscribe(self, queue):
+        self._subscribers.discard(queue)
+
+    def publish(self, payload):
+        """Queue `payload` for every subscriber, dropping slow ones."""
+        self.published += 1
+        for queue in list(self._subscribers):
+            try:
+                queue.put_nowait(payload)
+            except asyncio.QueueFull:
+                self._drop(queue)
+
+    def _drop(self, queue):
+        self.unsubscribe(queue)
+        self.dropped += 1
+        # Its backlog is useless now: replace it with the end marker
+        while not queue.empty():
+            queue.get_nowait()
+        queue.put_nowait(None)
+
+    def stats(self):
+        return {
+            "subscribers": len(self._subscribers),
+            "published": self.published,
+            "dropped": self.dropped,
+        }
+
+
+broker = EventBroker()
+
+
+def queue_change_events(db, events):
+    """
+    Hold events until `db`'s transaction commits (not published on
+    rollback).
+
+    Args:
+        db (AsyncSession): Session carrying the change.
+        events (list[dict]): Change events (see module docs).
+    """
+    db.sync_session.info.setdefault(_PENDING_KEY, []).extend(events)
+
+
+@event.listens_for(Session, "after_commit")
+def _publish_pending(session):
+    for payload in session.info.pop(_PENDING_KEY, []):
+        broker.publish(payload)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_pending(session):
+    session.info.pop(_PENDING_KEY, None)
+
+
+def _sse(event_name, payload):
+    return f"event: {event_name}\ndata: {orjson.dumps(payload).decode()}\n\n"
+
+
+async def event_stream(events_broker=broker, keepalive=EVENT_KEEPALIVE_SECONDS):
+    """
+    Server-Sent Events for one client, until it disconnects or is dropped.
+
+    Yields:
+        str: SSE frames: "change" events, keepalive comments, and a
+        final "dropped" event for a slow consumer.
+    """
+    queue = events_broker.subscribe()
+    try:
+        # Reconnect delay hint for EventSource (ms)
+        yield "retry: 3000\n\n"
+        while True:
+            try:
+                payload = await asyncio.wait_for(queue.get(), keepalive)
+            except asyncio.TimeoutError:
+                yield ": keepalive\n\n"
+                continue
+            if payload is None:
+                yield _sse("dropped", {})
+                return
+            yield _sse("change", payload)
+    finally:
+        events_broker.unsubscribe(queue)
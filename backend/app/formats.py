@@ -0,0 +1,98 @@
+from fastapi import Response
+from fastapi.encoders import jsonable_encoder
+import orjson
+
+try:
+    import ormsgpack
+except ImportError:  # optional: without it every response is JSON
+    ormsgpack = None
+
+# -------------------------------------------------------------------
+# Response Formats
+# The property, child and edit-history endpoints answer in JSON by
+# default, or in MessagePack when the client asks for it:
+#
+#     Accept: application/msgpack
+#
+# MessagePack bodies hold the same data as the JSON ones (datetimes as
+# the same ISO 8601 strings) and are smaller and faster to decode.
+# They are encoded with ormsgpack, an optional dependency; without it
+# the Accept header is ignored and JSON is served.
+#
+# Usage in a route:
+#     fmt = response_format(request)
+#     return Response(render(content, fmt), media_type=MEDIA_TYPES[fmt])
+# -------------------------------------------------------------------
+
+MEDIA_TYPES = {"json": "application/json", "msgpack": "application/msgpack"}
+
+# Accept values naming MessagePack (no registered type; all are in use)
+_MSGPACK_TYPES = {"application/msgpack", "application/x-msgpack", "application/vnd.msgpack"}
+_JSON_TYPES = {"application/json", "application/*", "*/*"}
+
+
+def _accept_quality(header, types):
+    """Highest q value the Accept header gives any of `types` (0 if none)."""
+    best = 0.0
+    for item in header.split(","):
+        media, *params = [part.strip() for part in item.split(";")]
+        if media.lower() not in types:
+            continue
+        q = 1.0
+        for param in params:
+            name, _, value = param.partition("=")
+            if name.strip() == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        best = max(best, q)
+    return best
+
+
+def response_format(request):
+    """
+    Format negotiated from the request's Accept header.
+
+    Returns:
+        str: "msgpack" when MessagePack is accepted at least as
+        strongly as JSON (and ormsgpack is installed), else "json".
+    """
+    header = request.headers.get("accept")
+    if not header or ormsgpack is None:
+        return "json"
+    msgpack_q = _accept_quality(header, _MSGPACK_TYPES)
+    if msgpack_q > 0 and msgpack_q >= _accept_quality(header, _JSON_TYPES):
+        return "msgpack"
+    return "json"
+
+
+def render(content, fmt):
+    """
+    Serialize `content` (anything FastAPI can return: dicts, ORM rows'
+    __dict__, datetimes, ...) exactly as the default ORJSONResponse
+    would, or as the equivalent MessagePack.
+    """
+    return dump(jsonable_encoder(content), fmt)
+
+
+def dump(content, fmt):
+    """
+    Serialize plain data (dicts, lists, scalars, datetimes) directly,
+    without the jsonable_encoder walk (see dump_document).
+    """
+    if fmt == "msgpack":
+        return ormsgpack.packb(content)
+    return orjson.dumps(content)
+
+
+def json_to_format(text, fmt):
+    """Re-encode JSON text (stored or SQL-rendered documents) in `fmt`."""
+    if fmt == "msgpack":
+        return ormsgpack.packb(orjson.loads(text))
+    return text.encode()
+
+
+def format_response(content, fmt, headers=None):
+    """Response with `content` rendered in `fmt` (see render)."""
+    return Response(render(content, fmt), media_type=MEDIA_TYPES[fmt], headers=headers)
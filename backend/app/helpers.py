@@ -11,6 +11,9 @@ from app.models import EditHistory
 #   - What entity was changed (entity_type + entity_id)
 #   - The field/values affected (changes, old_value, new_value)
 #   - The action type (add, edit, delete)
+#
+# Entries are only flushed: they commit with the route's own change
+# (one transaction per write, see app.changes).
 # -------------------------------------------------------------------
 
 
@@ -58,12 +61,12 @@ def _display_label(entity_type, entity_obj):
     return None
 
 
-def log_edit(db, edited_by, entity_type, entity_id, field, old_value, new_value, entity_obj=None):
+async def log_edit(db, edited_by, entity_type, entity_id, field, old_value, new_value, entity_obj=None):
     """
     Log an edit action.
 
     Args:
-        db (Session): Database session.
+        db (AsyncSession): Database session.
         edited_by (str): User performing the change.
         entity_type (str): Type of entity (property, suite, etc.).
         entity_id (Any): Entity identifier.
@@ -87,15 +90,15 @@ def log_edit(db, edited_by, entity_type, entity_id, field, old_value, new_value,
         action="edit",
     )
     db.add(record)
-    db.commit()
+    await db.flush()
 
 
-def log_add(db, edited_by, entity_type, entity_id, new_value, entity_obj=None):
+async def log_add(db, edited_by, entity_type, entity_id, new_value, entity_obj=None):
     """
     Log a create action.
 
     Args:
-        db (Session): Database session.
+        db (AsyncSession): Database session.
         edited_by (str): User performing the change.
         entity_type (str): Type of entity (property, suite, etc.).
         entity_id (Any): Entity identifier.
@@ -119,15 +122,15 @@ def log_add(db, edited_by, entity_type, entity_id, new_value, entity_obj=None):
         action="add",
     )
     db.add(record)
-    db.commit()
+    await db.flush()
 
 
-def log_delete(db, edited_by, entity_type, entity_id, old_value, entity_obj=None):
+async def log_delete(db, edited_by, entity_type, entity_id, old_value, entity_obj=None):
     """
     Log a delete action.
 
     Args:
-        db (Session): Database session.
+        db (AsyncSession): Database session.
         edited_by (str): User performing the change.
         entity_type (str): Type of entity (property, suite, etc.).
         entity_id (Any): Entity identifier.
@@ -151,4 +154,4 @@ def log_delete(db, edited_by, entity_type, entity_id, old_value, entity_obj=None
         action="delete",
     )
     db.add(record)
-    db.commit()
+    await db.flush()
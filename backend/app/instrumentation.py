@@ -0,0 +1,251 @@
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+import logging
+import os
+import threading
+import time
+
+# -------------------------------------------------------------------
+# Query Instrumentation
+# Counts SQL statements and total DB time per request using SQLAlchemy
+# cursor events on every Engine. The stats live in a ContextVar that
+# the HTTP middleware in app.main sets for each request, and are
+# reported as `X-DB-Queries` / `Server-Timing` response headers.
+#
+# Optional query budget (N+1 detector):
+#   DB_QUERY_BUDGET=20            max statements per request (0 = off)
+#   DB_QUERY_BUDGET_ACTION=log    "log" a warning or "raise" (500)
+#
+# Slow-query log:
+#   Statements slower than SLOW_QUERY_MS are kept in a bounded ring
+#   buffer (SLOW_QUERY_LOG_SIZE) with their SQL, parameter shapes and
+#   route. Statements slower than SLOW_QUERY_EXPLAIN_MS also get their
+#   plan captured (EXPLAIN on Postgres, EXPLAIN QUERY PLAN on SQLite).
+#   Exposed on GET /admin/slow-queries.
+# -------------------------------------------------------------------
+
+logger = logging.getLogger(__name__)
+
+DB_QUERY_BUDGET = int(os.getenv("DB_QUERY_BUDGET", "0"))
+DB_QUERY_BUDGET_ACTION = os.getenv("DB_QUERY_BUDGET_ACTION", "log")
+
+SLOW_QUERY_MS = float(os.getenv("SLOW_QUERY_MS", "200"))
+SLOW_QUERY_EXPLAIN_MS = float(os.getenv("SLOW_QUERY_EXPLAIN_MS", "1000"))
+SLOW_QUERY_LOG_SIZE = int(os.getenv("SLOW_QUERY_LOG_SIZE", "100"))
+
+# Plan prefix per dialect; statements on other backends are not explained
+_EXPLAIN_PREFIX = {
+    "sqlite": "EXPLAIN QUERY PLAN ",
+    "postgresql": "EXPLAIN ",
+}
+_EXPLAINABLE = ("SELECT", "WITH", "UPDATE", "DELETE")
+
+
+class QueryStats:
+    """
+    Statement count and cumulative DB time for one request.
+    """
+
+    __slots__ = ("count", "duration", "route")
+
+    def __init__(self, route=None):
+        self.count = 0
+        self.duration = 0.0   # seconds
+        self.route = route
+
+    @property
+    def duration_ms(self):
+        return self.duration * 1000
+
+
+class QueryBudgetExceeded(Exception):
+    """Raised (in "raise" mode) when a request runs more statements than allowed."""
+
+    def __init__(self, stats, budget):
+        self.stats = stats
+        self.budget = budget
+        super().__init__(
+            f"{stats.route or 'request'} ran {stats.count} queries (budget {budget})"
+        )
+
+
+# Stats for the request currently being handled (None outside requests)
+_current_stats = ContextVar("query_stats", default=None)
+
+
+@contextmanager
+def track_queries(route=None):
+    """
+    Count statements executed inside the block.
+
+    Usage:
+        with track_queries("GET /suites") as stats:
+            ...
+        stats.count, stats.duration_ms
+
+    Yields:
+        QueryStats: Live counters for the block.
+    """
+    stats = QueryStats(route)
+    token = _current_stats.set(stats)
+    try:
+        yield stats
+    finally:
+        _current_stats.reset(token)
+
+
+def check_query_budget(stats, budget=None, action=None):
+    """
+    Enforce the per-request query budget.
+
+    Args:
+        stats (QueryStats): Stats collected for the request.
+        budget (int, optional): Max statements; defaults to DB_QUERY_BUDGET.
+        action (str, optional): "log" or "raise"; defaults to DB_QUERY_BUDGET_ACTION.
+
+    Raises:
+        QueryBudgetExceeded: If over budget and action is "raise".
+    """
+    budget = DB_QUERY_BUDGET if budget is None else budget
+    action = DB_QUERY_BUDGET_ACTION if action is None else action
+    if budget <= 0 or stats.count <= budget:
+        return
+    if action == "raise":
+        raise QueryBudgetExceeded(stats, budget)
+    logger.warning(
+        "Query budget exceeded: %s ran %d queries (budget %d)",
+        stats.route, stats.count, budget,
+    )
+
+
+def server_timing_header(stats, total_seconds):
+    """
+    Build a `Server-Timing` header value for the request.
+
+    Example:
+        db;dur=4.2;desc="7 queries", app;dur=12.9
+    """
+    return (
+        f'db;dur={stats.duration_ms:.1f};desc="{stats.count} queries", '
+        f"app;dur={total_seconds * 1000:.1f}"
+    )
+
+
+class SlowQueryLog:
+    """
+    Bounded, thread-safe ring buffer of recent slow statements.
+    """
+
+    def __init__(self, maxlen=SLOW_QUERY_LOG_SIZE):
+        self._entries = deque(maxlen=maxlen)
+        self._lock = threading.Lock()
+
+    def record(self, entry):
+        with self._lock:
+            self._entries.append(entry)
+
+    def entries(self, limit=None):
+        """Return recorded entries, newest first."""
+        with self._lock:
+            items = list(reversed(self._entries))
+        return items[:limit] if limit else items
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+slow_query_log = SlowQueryLog()
+
+
+def _param_shape(parameters, executemany=False):
+    """
+    Describe bound parameters by type only (never by value), so the log
+    shows the query's shape without leaking user data.
+
+    Example:
+        ("P100", 5) → ["str", "int"]
+    """
+    if executemany and isinstance(parameters, (list, tuple)) and parameters:
+        return {"rows": len(parameters), "each": _param_shape(parameters[0])}
+    if isinstance(parameters, dict):
+        return {k: type(v).__name__ for k, v in parameters.items()}
+    if isinstance(parameters, (list, tuple)):
+        return [type(v).__name__ for v in parameters]
+    return type(parameters).__name__
+
+
+def _explain(conn, statement, parameters):
+    """
+    Capture the query plan for `statement` on the same connection.
+
+    Runs on a raw DBAPI cursor, so it does not re-enter these events.
+
+    Returns:
+        list[str] | None: Plan lines, or None if not explainable.
+    """
+    prefix = _EXPLAIN_PREFIX.get(conn.dialect.name)
+    if prefix is None or not statement.lstrip().upper().startswith(_EXPLAINABLE):
+        return None
+    try:
+        cursor = conn.connection.dbapi_connection.cursor()
+        try:
+            cursor.execute(prefix + statement, parameters)
+            rows = cursor.fetchall()
+        finally:
+            cursor.close()
+    except Exception as e:
+        return [f"EXPLAIN failed: {e}"]
+    return [" | ".join(str(col) for col in row) for row in rows]
+
+
+def _record_slow_query(conn, statement, parameters, executemany, elapsed):
+    stats = _current_stats.get()
+    elapsed_ms = elapsed * 1000
+    entry = {
+        "at": datetime.now(timezone.utc).isoformat(),
+        "duration_ms": round(elapsed_ms, 3),
+        "route": stats.route if stats is not None else None,
+        "sql": statement[:4000],
+        "params": _param_shape(parameters, executemany),
+        "explain": None,
+    }
+    if elapsed_ms >= SLOW_QUERY_EXPLAIN_MS and not executemany:
+        entry["explain"] = _explain(conn, statement, parameters)
+    slow_query_log.record(entry)
+    logger.warning(
+        "Slow query (%.1f ms) on %s: %s", elapsed_ms, entry["route"], entry["sql"][:200]
+    )
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_start_time", []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    starts = conn.info.get("query_start_time")
+    if not starts:
+        return
+    elapsed = time.perf_counter() - starts.pop()
+
+    stats = _current_stats.get()
+    if stats is not None:
+        stats.count += 1
+        stats.duration += elapsed
+
+    if elapsed * 1000 >= SLOW_QUERY_MS:
+        _record_slow_query(conn, statement, parameters, executemany, elapsed)
+
+
+@event.listens_for(Engine, "handle_error")
+def _handle_error(exception_context):
+    # A failed statement never reaches after_cursor_execute; drop its start time
+    conn = exception_context.connection
+    if conn is not None and conn.info.get("query_start_time"):
+        conn.info["query_start_time"].pop()
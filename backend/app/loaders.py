@@ -0,0 +1,75 @@
+from collections import defaultdict
+from sqlalchemy import select
+from app.models import Contact, SuiteContact, ServiceContact, UtilityContact
+
+# -------------------------------------------------------------------
+# Batched Relation Loaders
+# DataLoader-style helpers that resolve a relation for a whole set of
+# parent rows in one query, instead of one query per row (N+1).
+#
+# A loader lives for one request (or one document batch): results are
+# cached per key, so asking again for a key already loaded costs
+# nothing. Keys are batched explicitly with load_many() rather than by
+# coalescing load() calls per event-loop tick, because an AsyncSession
+# cannot run queries concurrently.
+#
+# Usage:
+#     contacts = await ContactLoader(db, "suites").load_many(suite_ids)
+#     contacts[suite_id] → [contact dict, ...]
+# -------------------------------------------------------------------
+
+# Child collection -> (contact join table, child id column)
+CONTACT_LINKS = {
+    "suites": (SuiteContact, "suite_id"),
+    "services": (ServiceContact, "service_id"),
+    "utilities": (UtilityContact, "utility_id"),
+}
+
+_CONTACT_COLUMNS = list(Contact.__table__.columns)
+_CONTACT_KEYS = tuple(c.key for c in _CONTACT_COLUMNS)
+
+
+class ContactLoader:
+    """
+    Contacts linked to suites, services or utilities.
+
+    One joined query (join table → contacts) per batch; each child's
+    contacts are plain dicts in link order. Children without contacts
+    get an empty list.
+    """
+
+    def __init__(self, db, children):
+        self.db = db
+        self.link_model, self.id_attr = CONTACT_LINKS[children]
+        self._cache = {}
+
+    async def load_many(self, keys):
+        """
+        Contacts for each child id in `keys`, fetching all uncached ones
+        in one query.
+
+        Returns:
+            dict: child id → [contact dict, ...], for every id given.
+        """
+        missing = [k for k in dict.fromkeys(keys) if k not in self._cache]
+        if missing:
+            found = await self._fetch(missing)
+            for key in missing:
+                self._cache[key] = found.get(key, [])
+        return {key: self._cache[key] for key in keys}
+
+    async def load(self, key):
+        return (await self.load_many([key]))[key]
+
+    async def _fetch(self, keys):
+        link_id = getattr(self.link_model, self.id_attr)
+        rows = await self.db.execute(
+            select(link_id, *_CONTACT_COLUMNS)
+            .join(Contact, Contact.contact_id == self.link_model.contact_id)
+            .where(link_id.in_(keys))
+            .order_by(self.link_model.id)
+        )
+        contacts = defaultdict(list)
+        for child_id, *values in rows:
+            contacts[child_id].append(dict(zip(_CONTACT_KEYS, values)))
+        return contacts
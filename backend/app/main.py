@@ -1,18 +1,26 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI, Request
 from fastapi.responses import ORJSONResponse
-from fastapi.middleware.gzip import GZipMiddleware
 from fastapi.staticfiles import StaticFiles
 from fastapi.middleware.cors import CORSMiddleware
 from app.api import (
     properties, suites, services, utilities,
-    codes, permits, contacts, edit_history, property_photos,
+    codes, permits, contacts, edit_history, property_photos, admin, search, events,
+)
+from app import auth
+from app.compression import StreamingGZipMiddleware
+from app.database import READ_STICKY_HEADER, set_sticky_token
+from app.instrumentation import (
+    track_queries, check_query_budget, server_timing_header, QueryBudgetExceeded,
 )
 import time
 import sentry_sdk
 
 # -------------------------------------------------------------------
 # FastAPI Application Entry Point
-# - Sets up middlewares (CORS, GZip, static file serving, timing)
+# - Starts background tasks (JWKS refresher) via the lifespan
+# - Sets up middlewares (CORS, GZip, static file serving, timing,
+#   per-request DB query counting, read-your-writes tokens)
 # - Mounts uploads directory for property photos
 # - Includes all API routers
 # -------------------------------------------------------------------
@@ -22,14 +30,28 @@ sentry_sdk.init(
     send_default_pii=True, # captures user data, IPs, request headers
 )
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    App startup/shutdown.
+
+    Prewarms the Azure AD signing keys and keeps them fresh in the
+    background so requests never wait on key retrieval.
+    """
+    await auth.start_jwks_refresher()
+    yield
+    await auth.stop_jwks_refresher()
+
+
 # Use ORJSON for fast JSON responses
-app = FastAPI(default_response_class=ORJSONResponse)
+app = FastAPI(default_response_class=ORJSONResponse, lifespan=lifespan)
 
 # Serve uploaded files from /uploads
 app.mount("/uploads", StaticFiles(directory="static/uploads"), name="uploads")
 
-# Enable GZip compression for large responses
-app.add_middleware(GZipMiddleware, minimum_size=512)
+# Enable GZip compression for large responses (streams flush per chunk)
+app.add_middleware(StreamingGZipMiddleware, minimum_size=512)
 
 # Allow CORS for frontend apps
 app.add_middleware(
@@ -41,6 +63,8 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],  # Allow all HTTP methods (GET, POST, etc.)
     allow_headers=["*"],  # Allow all headers
+    # Readable by the frontend: conditional GETs, read-your-writes token
+    expose_headers=["ETag", READ_STICKY_HEADER],
 )
 
 
@@ -54,6 +78,20 @@ def read_root():
     return {"status": "ok", "message": "PIS Platform API is running"}
 
 
+@app.get("/ready")
+def read_ready():
+    """
+    Readiness check endpoint.
+    Returns 200 once the API can verify tokens (signing keys loaded),
+    503 otherwise. Point load balancer readiness probes here.
+    """
+    ready = auth.jwks_ready()
+    return ORJSONResponse(
+        {"status": "ready" if ready else "not ready", "jwks": ready},
+        status_code=200 if ready else 503,
+    )
+
+
 @app.middleware("http")
 async def add_process_time_header(request: Request, call_next):
     """
@@ -72,6 +110,53 @@ async def add_process_time_header(request: Request, call_next):
     return resp
 
 
+@app.middleware("http")
+async def add_read_sticky_token(request: Request, call_next):
+    """
+    Middleware that hands a read-your-writes token to clients whose
+    request committed a write (see app.database), so their next reads
+    use the primary whichever worker serves them.
+
+    Args:
+        request (Request): Incoming HTTP request.
+        call_next (function): Executes the next middleware/route.
+
+    Returns:
+        Response: HTTP response, with the token cookie/header after a write.
+    """
+    resp = await call_next(request)
+    set_sticky_token(request, resp)
+    return resp
+
+
+@app.middleware("http")
+async def add_db_query_headers(request: Request, call_next):
+    """
+    Middleware that counts SQL statements and DB time per request.
+
+    Adds `X-DB-Queries` and `Server-Timing` headers. If DB_QUERY_BUDGET
+    is set and DB_QUERY_BUDGET_ACTION is "raise", requests that exceed
+    the budget fail with a 500 so N+1 regressions surface immediately.
+
+    Args:
+        request (Request): Incoming HTTP request.
+        call_next (function): Executes the next middleware/route.
+
+    Returns:
+        Response: HTTP response with DB timing headers.
+    """
+    t0 = time.perf_counter()
+    with track_queries(f"{request.method} {request.url.path}") as stats:
+        resp = await call_next(request)
+    try:
+        check_query_budget(stats)
+    except QueryBudgetExceeded as e:
+        resp = ORJSONResponse({"detail": str(e)}, status_code=500)
+    resp.headers["X-DB-Queries"] = str(stats.count)
+    resp.headers["Server-Timing"] = server_timing_header(stats, time.perf_counter() - t0)
+    return resp
+
+
 # -------------------------------------------------------------------
 # Include API Routers
 # Each router handles a specific entity (properties, suites, etc.).
@@ -85,3 +170,6 @@ app.include_router(permits.router)
 app.include_router(contacts.router)
 app.include_router(edit_history.router)
 app.include_router(property_photos.router)
+app.include_router(admin.router)
+app.include_router(search.router)
+app.include_router(events.router)
@@ -1,4 +1,7 @@
-from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, Boolean
+from sqlalchemy import (
+    Column, Integer, String, Text, DateTime, ForeignKey, Boolean,
+    DDL, Index, UniqueConstraint, event, func, literal_column,
+)
 from sqlalchemy.ext.declarative import declarative_base
 from datetime import datetime
 
@@ -49,6 +52,7 @@ class Property(Base):
     heat_cooling_source = Column(String)
     misc = Column(String)
     active = Column(Boolean, default=True)
+    updated_at = Column(DateTime)              # stamped on every write (see below)
 
 
 class Contact(Base):
@@ -65,6 +69,7 @@ class Contact(Base):
     office_number = Column(String)
     cell_number = Column(String)
     email = Column(String)
+    updated_at = Column(DateTime)              # stamped on every write (see below)
 
 
 class Suite(Base):
@@ -77,7 +82,7 @@ class Suite(Base):
     __tablename__ = "suites"
 
     suite_id = Column(Integer, primary_key=True, autoincrement=True)
-    property_yardi = Column(String, ForeignKey("properties.yardi"), nullable=False)
+    property_yardi = Column(String, ForeignKey("properties.yardi"), nullable=False, index=True)
     suite = Column(String)
     sqft = Column(String)
     name = Column(String, index=True)
@@ -91,6 +96,7 @@ class Suite(Base):
     parking_spaces = Column(Text)
     electrical_amperage = Column(Text)
     misc = Column(Text)
+    updated_at = Column(DateTime)              # stamped on every write (see below)
 
 
 class Service(Base):
@@ -103,13 +109,14 @@ class Service(Base):
     __tablename__ = "services"
 
     service_id = Column(Integer, primary_key=True, autoincrement=True)
-    property_yardi = Column(String, ForeignKey("properties.yardi"), nullable=False)
+    property_yardi = Column(String, ForeignKey("properties.yardi"), nullable=False, index=True)
     service_type = Column(String, index=True)
     vendor = Column(String, index=True)
     notes = Column(Text)
     paid_by = Column(String)
     tenant_specifics = Column(Text)
     suite_specifics = Column(Text)
+    updated_at = Column(DateTime)              # stamped on every write (see below)
 
 
 class Utility(Base):
@@ -122,13 +129,14 @@ class Utility(Base):
     __tablename__ = "utilities"
 
     utility_id = Column(Integer, primary_key=True, autoincrement=True)
-    property_yardi = Column(String, ForeignKey("properties.yardi"), nullable=False)
+    property_yardi = Column(String, ForeignKey("properties.yardi"), nullable=False, index=True)
     service = Column(String, index=True)
     vendor = Column(String, index=True)
     account_number = Column(String)
     meter_number = Column(String)
     notes = Column(Text)
     paid_by = Column(String)
+    updated_at = Column(DateTime)              # stamped on every write (see below)
 
 
 class Code(Base):
@@ -140,10 +148,11 @@ class Code(Base):
     __tablename__ = "codes"
 
     code_id = Column(Integer, primary_key=True, autoincrement=True)
-    property_yardi = Column(String, ForeignKey("properties.yardi"), nullable=False)
+    property_yardi = Column(String, ForeignKey("properties.yardi"), nullable=False, index=True)
     description = Column(String, index=True)
     code = Column(String)
     notes = Column(Text)
+    updated_at = Column(DateTime)              # stamped on every write (see below)
 
 class Permit(Base):
     """
@@ -155,7 +164,7 @@ class Permit(Base):
     __tablename__ = "permits"
 
     permit_id = Column(Integer, primary_key=True, autoincrement=True)
-    property_yardi = Column(String, ForeignKey("properties.yardi"), nullable=False)
+    property_yardi = Column(String, ForeignKey("properties.yardi"), nullable=False, index=True)
     municipality = Column(String, index=True)
     equip = Column(String, index=True)
     permit_number = Column(String)
@@ -165,6 +174,7 @@ class Permit(Base):
     annual_report = Column(Text)
     login_creds = Column(Text)
     notes = Column(Text)
+    updated_at = Column(DateTime)              # stamped on every write (see below)
 
 
 class PropertyPhoto(Base):
@@ -176,9 +186,46 @@ class PropertyPhoto(Base):
     __tablename__ = "property_photos"
 
     id = Column(Integer, primary_key=True, autoincrement=True)
-    property_yardi = Column(String, ForeignKey("properties.yardi"), nullable=False)
+    property_yardi = Column(String, ForeignKey("properties.yardi"), nullable=False, index=True)
     photo_url = Column(String, nullable=False)
     caption = Column(Text)
+    updated_at = Column(DateTime)              # stamped on every write (see below)
+
+
+# -------------------------------------------------------------------
+# Change Tracking
+# `updated_at` is stamped on every insert and update of a property,
+# its child rows and contacts, whatever the request body said, so a
+# client echoing a row back cannot set it. Deletes leave a Tombstone.
+# -------------------------------------------------------------------
+
+# Columns maintained by the app; update routes ignore them in bodies
+TRACKING_COLUMNS = ("updated_at",)
+
+TRACKED_MODELS = (Property, Contact, Suite, Service, Utility, Code, Permit, PropertyPhoto)
+
+
+def _stamp_updated_at(mapper, connection, target):
+    target.updated_at = datetime.now()
+
+
+for _model in TRACKED_MODELS:
+    event.listen(_model, "before_insert", _stamp_updated_at)
+    event.listen(_model, "before_update", _stamp_updated_at)
+
+
+class Tombstone(Base):
+    """
+    Record of a deleted row, so sync clients can drop their copy
+    (see GET /sync).
+    """
+    __tablename__ = "tombstones"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    entity_type = Column(String, nullable=False)   # e.g. "property", "suite"
+    entity_id = Column(String, nullable=False)
+    property_yardi = Column(String, index=True)
+    deleted_at = Column(DateTime, nullable=False, index=True)
 
 
 # -------------------------------------------------------------------
@@ -192,8 +239,8 @@ class SuiteContact(Base):
     __tablename__ = "suite_contacts"
 
     id = Column(Integer, primary_key=True, autoincrement=True)
-    suite_id = Column(Integer, ForeignKey("suites.suite_id", ondelete="CASCADE"), nullable=False)
-    contact_id = Column(Integer, ForeignKey("contacts.contact_id"), nullable=False)
+    suite_id = Column(Integer, ForeignKey("suites.suite_id", ondelete="CASCADE"), nullable=False, index=True)
+    contact_id = Column(Integer, ForeignKey("contacts.contact_id"), nullable=False, index=True)
 
 
 class ServiceContact(Base):
@@ -203,8 +250,8 @@ class ServiceContact(Base):
     __tablename__ = "service_contacts"
 
     id = Column(Integer, primary_key=True, autoincrement=True)
-    service_id = Column(Integer, ForeignKey("services.service_id", ondelete="CASCADE"), nullable=False)
-    contact_id = Column(Integer, ForeignKey("contacts.contact_id"), nullable=False)
+    service_id = Column(Integer, ForeignKey("services.service_id", ondelete="CASCADE"), nullable=False, index=True)
+    contact_id = Column(Integer, ForeignKey("contacts.contact_id"), nullable=False, index=True)
 
 
 class UtilityContact(Base):
@@ -214,8 +261,8 @@ class UtilityContact(Base):
     __tablename__ = "utility_contacts"
 
     id = Column(Integer, primary_key=True, autoincrement=True)
-    utility_id = Column(Integer, ForeignKey("utilities.utility_id", ondelete="CASCADE"), nullable=False)
-    contact_id = Column(Integer, ForeignKey("contacts.contact_id"), nullable=False)
+    utility_id = Column(Integer, ForeignKey("utilities.utility_id", ondelete="CASCADE"), nullable=False, index=True)
+    contact_id = Column(Integer, ForeignKey("contacts.contact_id"), nullable=False, index=True)
 
 
 class EditHistory(Base):
@@ -236,3 +283,84 @@ class EditHistory(Base):
     old_value = Column(Text)
     new_value = Column(Text)
     action = Column(String, index=True)        # "add", "edit", "delete"
+
+
+
+class PropertyDocument(Base):
+    """
+    Materialized nested document for a property (the JSON served by
+    GET /properties and /properties/{yardi}).
+
+    Rebuilt by the write routes in the same transaction as the change;
+    `version` is the property's version, increased by every write to
+    the property or its children (used for ETags), and `updated_at`
+    the time of that write (used by GET /sync).
+    """
+    __tablename__ = "property_documents"
+    __table_args__ = (
+        # Keyset order of the GET /sync feed
+        Index("ix_property_documents_updated_at", "updated_at", "yardi"),
+    )
+
+    yardi = Column(String, ForeignKey("properties.yardi", ondelete="CASCADE"), primary_key=True)
+    version = Column(Integer, nullable=False, default=1)
+    body = Column(Text, nullable=False)          # JSON text
+    updated_at = Column(DateTime, nullable=False)
+
+# -------------------------------------------------------------------
+# Search Index
+# One row per searchable entity with its text concatenated into
+# `content`; maintained by app.search from the write routes.
+#   - Postgres: GIN index on to_tsvector(content)
+#   - SQLite:   FTS5 external-content table kept in sync by triggers
+# -------------------------------------------------------------------
+
+# Text search configuration (no stemming: names, vendors, account numbers)
+SEARCH_TS_CONFIG = "simple"
+
+
+class SearchDocument(Base):
+    """
+    Full-text search entry for a property, suite, service, utility,
+    code or contact.
+    """
+    __tablename__ = "search_documents"
+    __table_args__ = (
+        UniqueConstraint("entity_type", "entity_id", name="uq_search_documents_entity"),
+        Index(
+            "ix_search_documents_tsv",
+            func.to_tsvector(literal_column(f"'{SEARCH_TS_CONFIG}'"), literal_column("content")),
+            postgresql_using="gin",
+        ).ddl_if(dialect="postgresql"),
+    )
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    entity_type = Column(String, nullable=False)   # e.g. "suite"
+    entity_id = Column(String, nullable=False)
+    property_yardi = Column(String, index=True)
+    content = Column(Text, nullable=False)
+
+
+# SQLite: FTS5 index over search_documents.content (rowid = id)
+SQLITE_SEARCH_DDL = [
+    "CREATE VIRTUAL TABLE IF NOT EXISTS search_documents_fts USING fts5("
+    "content, content='search_documents', content_rowid='id')",
+    "CREATE TRIGGER IF NOT EXISTS search_documents_ai AFTER INSERT ON search_documents BEGIN "
+    "INSERT INTO search_documents_fts(rowid, content) VALUES (new.id, new.content); END",
+    "CREATE TRIGGER IF NOT EXISTS search_documents_ad AFTER DELETE ON search_documents BEGIN "
+    "INSERT INTO search_documents_fts(search_documents_fts, rowid, content) "
+    "VALUES ('delete', old.id, old.content); END",
+    "CREATE TRIGGER IF NOT EXISTS search_documents_au AFTER UPDATE ON search_documents BEGIN "
+    "INSERT INTO search_documents_fts(search_documents_fts, rowid, content) "
+    "VALUES ('delete', old.id, old.content); "
+    "INSERT INTO search_documents_fts(rowid, content) VALUES (new.id, new.content); END",
+]
+for _statement in SQLITE_SEARCH_DDL:
+    event.listen(
+        SearchDocument.__table__, "after_create",
+        DDL(_statement).execute_if(dialect="sqlite"),
+    )
+event.listen(
+    SearchDocument.__table__, "before_drop",
+    DDL("DROP TABLE IF EXISTS search_documents_fts").execute_if(dialect="sqlite"),
+)
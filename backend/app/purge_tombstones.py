@@ -0,0 +1,28 @@
+from app.database import AsyncSessionLocal, async_engine
+from app.sync import SYNC_TOMBSTONE_DAYS, purge_tombstones
+import asyncio
+
+# -------------------------------------------------------------------
+# Tombstone Purge Script
+# Deletes sync tombstones older than SYNC_TOMBSTONE_DAYS (see
+# app.sync). Run it on a schedule, e.g. daily:
+#
+#   python -m app.purge_tombstones
+#
+# Delta tokens from before the window already get 410 Gone, so purging
+# never hides a delete from a client.
+# -------------------------------------------------------------------
+
+
+async def main():
+    try:
+        async with AsyncSessionLocal() as db:
+            purged = await purge_tombstones(db)
+    finally:
+        # Close pooled connections so the process can exit
+        await async_engine.dispose()
+    print(f"Purged {purged} tombstones older than {SYNC_TOMBSTONE_DAYS:g} days.")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
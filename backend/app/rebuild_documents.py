@@ -0,0 +1,41 @@
+from app.database import AsyncSessionLocal, async_engine
+from app.documents import rebuild_property_documents
+import argparse
+import asyncio
+import sys
+
+# -------------------------------------------------------------------
+# Property Document Rebuild Script
+# Rebuilds every materialized property document from live data.
+#
+#   python -m app.rebuild_documents            backfill / repair
+#   python -m app.rebuild_documents --check    report drift only
+#
+# With --check nothing is written and the exit status is 1 when any
+# document is missing, stale or orphaned (usable as a scheduled check).
+# -------------------------------------------------------------------
+
+
+async def main(check=False, batch_size=500):
+    try:
+        async with AsyncSessionLocal() as db:
+            report = await rebuild_property_documents(db, batch_size=batch_size, check=check)
+    finally:
+        # Close pooled connections so the process can exit
+        await async_engine.dispose()
+
+    drift = report["missing"] + report["stale"] + report["orphaned"]
+    verb = "found" if check else "fixed"
+    print(
+        f"Checked {report['checked']} properties: {report['missing']} missing, "
+        f"{report['stale']} stale, {report['orphaned']} orphaned documents {verb}."
+    )
+    return 1 if check and drift else 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Rebuild materialized property documents.")
+    parser.add_argument("--check", action="store_true", help="report drift without writing")
+    parser.add_argument("--batch-size", type=int, default=500, help="properties per batch")
+    args = parser.parse_args()
+    sys.exit(asyncio.run(main(args.check, args.batch_size)))
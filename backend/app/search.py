@@ -0,0 +1,185 @@
+from sqlalchemy import delete, func, literal_column, select, text
+from app.models import (
+    Property,
+    Suite,
+    Service,
+    Utility,
+    Code,
+    Contact,
+    SearchDocument,
+    SEARCH_TS_CONFIG,
+)
+from app.changes import contact_property_yardis
+import re
+
+# -------------------------------------------------------------------
+# Full-Text Search
+# Keeps the search_documents index in step with the data and runs
+# ranked searches against it.
+#
+# Write routes call index_entity() after creating/updating an entity
+# and remove_entity() when deleting one; the change is committed with
+# the route's own transaction.
+#
+# Backends (chosen by the session's dialect):
+#   - Postgres: to_tsvector @@ to_tsquery on a GIN index, ts_rank
+#   - SQLite:   FTS5 MATCH on search_documents_fts, bm25 rank
+# -------------------------------------------------------------------
+
+# entity_type -> (model, id attribute, text fields)
+SEARCHABLE = {
+    "property": (Property, "yardi", ("address",)),
+    "suite": (Suite, "suite_id", ("name", "notes")),
+    "service": (Service, "service_id", ("vendor",)),
+    "utility": (Utility, "utility_id", ("account_number",)),
+    "code": (Code, "code_id", ("description",)),
+    "contact": (Contact, "contact_id", ("name",)),
+}
+
+SEARCH_MAX_RESULTS = 100
+
+_TERM_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def search_terms(q):
+    """
+    Split a user query into plain search terms.
+
+    Operators and punctuation are dropped so user input can never form
+    FTS syntax. Example:
+        'Acme "SMUD"-42' → ["Acme", "SMUD", "42"]
+    """
+    return _TERM_RE.findall(q or "")
+
+
+def _content(obj, text_fields):
+    values = [getattr(obj, f, None) for f in text_fields]
+    return " ".join(str(v) for v in values if v not in (None, ""))
+
+
+async def index_entity(db, entity_type, obj):
+    """
+    Add or refresh the search entry for `obj` (not committed).
+
+    Entities whose searchable fields are all empty are removed from the
+    index.
+
+    Args:
+        db (AsyncSession): Database session.
+        entity_type (str): Key of SEARCHABLE (e.g. "suite").
+        obj (Base): The created/updated model instance.
+    """
+    _, id_attr, text_fields = SEARCHABLE[entity_type]
+    entity_id = str(getattr(obj, id_attr))
+    content = _content(obj, text_fields)
+
+    if entity_type == "property":
+        property_yardi = obj.yardi
+    elif entity_type == "contact":
+        # Links may still be pending (sessions do not autoflush)
+        await db.flush()
+        yardis = await contact_property_yardis(db, obj.contact_id)
+        property_yardi = yardis[0] if yardis else None
+    else:
+        property_yardi = obj.property_yardi
+
+    doc = await db.scalar(
+        select(SearchDocument).where(
+            SearchDocument.entity_type == entity_type,
+            SearchDocument.entity_id == entity_id,
+        )
+    )
+    if not content:
+        if doc is not None:
+            await db.delete(doc)
+        return
+    if doc is None:
+        db.add(SearchDocument(
+            entity_type=entity_type,
+            entity_id=entity_id,
+            property_yardi=property_yardi,
+            content=content,
+        ))
+    else:
+        doc.property_yardi = property_yardi
+        doc.content = content
+
+
+async def remove_entity(db, entity_type, entity_id):
+    """
+    Drop the search entry for a deleted entity (not committed).
+
+    Args:
+        db (AsyncSession): Database session.
+        entity_type (str): Key of SEARCHABLE.
+        entity_id (Any): Entity identifier.
+    """
+    await db.execute(
+        delete(SearchDocument).where(
+            SearchDocument.entity_type == entity_type,
+            SearchDocument.entity_id == str(entity_id),
+        )
+    )
+
+
+async def _search_postgres(db, terms, limit):
+    # Every term must match; the last one as a prefix ("acm" finds "Acme")
+    query = " & ".join(f"{t}:*" if i == len(terms) - 1 else t for i, t in enumerate(terms))
+    config = literal_column(f"'{SEARCH_TS_CONFIG}'")
+    vector = func.to_tsvector(config, SearchDocument.content)
+    tsquery = func.to_tsquery(config, query)
+    rank = func.ts_rank(vector, tsquery).label("score")
+    rows = await db.execute(
+        select(
+            SearchDocument.entity_type,
+            SearchDocument.entity_id,
+            SearchDocument.property_yardi,
+            SearchDocument.content,
+            rank,
+        )
+        .where(vector.op("@@")(tsquery))
+        .order_by(rank.desc(), SearchDocument.id)
+        .limit(limit)
+    )
+    return [dict(r._mapping) for r in rows]
+
+
+async def _search_sqlite(db, terms, limit):
+    # Quote each term (FTS5 string), prefix-match the last one
+    query = " ".join(
+        f'"{t}"*' if i == len(terms) - 1 else f'"{t}"' for i, t in enumerate(terms)
+    )
+    rows = await db.execute(
+        text(
+            "SELECT d.entity_type, d.entity_id, d.property_yardi, d.content, "
+            "-bm25(search_documents_fts) AS score "
+            "FROM search_documents_fts "
+            "JOIN search_documents d ON d.id = search_documents_fts.rowid "
+            "WHERE search_documents_fts MATCH :query "
+            "ORDER BY bm25(search_documents_fts), d.id "
+            "LIMIT :limit"
+        ),
+        {"query": query, "limit": limit},
+    )
+    return [dict(r._mapping) for r in rows]
+
+
+async def search(db, q, limit=20):
+    """
+    Ranked full-text search across all indexed entities.
+
+    Args:
+        db (AsyncSession): Database session.
+        q (str): User query; all terms must match, the last as a prefix.
+        limit (int): Maximum number of hits.
+
+    Returns:
+        list[dict]: Hits (entity_type, entity_id, property_yardi,
+        content, score), best first.
+    """
+    terms = search_terms(q)
+    if not terms:
+        return []
+    if db.get_bind().dialect.name == "postgresql":
+        return await _search_postgres(db, terms, limit)
+    return await _search_sqlite(db, terms, limit)
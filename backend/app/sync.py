@@ -0,0 +1,194 @@
+from fastapi import HTTPException
+from sqlalchemy import and_, delete, or_, select
+from datetime import datetime, timedelta
+import base64
+import orjson
+import os
+from app.models import PropertyDocument, Tombstone
+
+# -------------------------------------------------------------------
+# Delta Sync
+# Lets a client keep a local copy of the portfolio and fetch only what
+# changed since its last visit (GET /sync).
+#
+# The feed is property_documents ordered by (updated_at, yardi): every
+# write to a property or its children rewrites the property's stored
+# document, so a changed document is all a client needs to re-download.
+# Deleted rows are reported from tombstones (see app.changes), paged
+# the same way by (deleted_at, id): a page holds up to `limit`
+# documents and up to `limit` tombstones, and has_more stays true until
+# both are exhausted.
+#
+# Sync tokens are opaque to clients. A token is a position in the feed
+# plus a "floor": the time the sync run started, less
+# SYNC_OVERLAP_SECONDS. Writes stamp updated_at before they commit (and
+# a read replica may lag), so a document can appear with a timestamp
+# slightly in the past; the final token of a run points back at the
+# floor, and the next sync re-sends that window. Clients apply changes
+# idempotently: drop the deleted ids, then upsert the documents.
+#
+# Tombstones are kept for SYNC_TOMBSTONE_DAYS. A delta token older than
+# that could miss deletes whose tombstones are gone, so it gets
+# 410 Gone and the client must drop its copy and run a full sync.
+# Purge expired tombstones on a schedule:
+#
+#   python -m app.purge_tombstones
+# -------------------------------------------------------------------
+
+# Seconds of changes re-sent on the next sync (longest write + lag)
+SYNC_OVERLAP_SECONDS = float(os.getenv("SYNC_OVERLAP_SECONDS", "30"))
+
+# Days tombstones (and so delta tokens) stay valid
+SYNC_TOMBSTONE_DAYS = float(os.getenv("SYNC_TOMBSTONE_DAYS", "30"))
+
+# Documents (and tombstones) per GET /sync page
+SYNC_PAGE_SIZE = 500
+
+
+def _timestamp(value):
+    return value.isoformat() if value is not None else None
+
+
+def _parse_timestamp(value):
+    return datetime.fromisoformat(value) if value is not None else None
+
+
+def encode_sync_token(since, after, deleted_since, deleted_after, floor):
+    """
+    Encode a feed position into an opaque, URL-safe token.
+
+    Args:
+        since (datetime | None): updated_at of the last document sent
+            (None before the first page of a full sync).
+        after (str): Its yardi ("" to include every document at `since`).
+        deleted_since (datetime | None): deleted_at of the last
+            tombstone sent; None during a full sync (nothing to delete).
+        deleted_after (int): Its id (0 to include every tombstone at
+            `deleted_since`).
+        floor (datetime | None): Start of the run, less the overlap;
+            None once the run is complete.
+    """
+    payload = orjson.dumps([
+        _timestamp(since), after, _timestamp(deleted_since), deleted_after, _timestamp(floor),
+    ])
+    return base64.urlsafe_b64encode(payload).rstrip(b"=").decode()
+
+
+def decode_sync_token(token):
+    """
+    Decode a token produced by encode_sync_token.
+
+    Returns:
+        tuple: (since, after, deleted_since, deleted_after, floor) as
+        passed to encode_sync_token.
+
+    Raises:
+        HTTPException: If the token is malformed (400 Bad Request).
+    """
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        since, after, deleted_since, deleted_after, floor = orjson.loads(
+            base64.urlsafe_b64decode(padded)
+        )
+        since, deleted_since, floor = map(_parse_timestamp, (since, deleted_since, floor))
+        if not isinstance(after, str) or not isinstance(deleted_after, int):
+            raise ValueError(after)
+    except (ValueError, TypeError, orjson.JSONDecodeError):
+        raise HTTPException(status_code=400, detail="Invalid sync token")
+    return since, after, deleted_since, deleted_after, floor
+
+
+def tombstone_cutoff():
+    """Oldest deleted_at still kept (see SYNC_TOMBSTONE_DAYS)."""
+    return datetime.now() - timedelta(days=SYNC_TOMBSTONE_DAYS)
+
+
+async def purge_tombstones(db):
+    """
+    Delete tombstones older than the retention window and commit.
+
+    Returns:
+        int: Number of tombstones deleted.
+    """
+    result = await db.execute(delete(Tombstone).where(Tombstone.deleted_at < tombstone_cutoff()))
+    await db.commit()
+    return result.rowcount
+
+
+async def property_changes(db, token=None, limit=SYNC_PAGE_SIZE):
+    """
+    One page of the property change feed.
+
+    Args:
+        db (AsyncSession): Database session.
+        token (str, optional): Token from the previous page or sync;
+            None for a full sync.
+        limit (int): Maximum documents, and maximum tombstones, in
+            this page.
+
+    Returns:
+        tuple[dict, list[str]]: Envelope ("token", "has_more" and
+        "deleted": entity type → ids) and the changed documents as
+        stored JSON text, oldest change first.
+
+    Raises:
+        HTTPException: If the token is malformed (400), or older than
+            the tombstone retention window (410: run a full sync).
+    """
+    if token:
+        since, after, deleted_since, deleted_after, floor = decode_sync_token(token)
+    else:
+        since, after, deleted_since, deleted_after, floor = None, "", None, 0, None
+    if deleted_since is not None and deleted_since < tombstone_cutoff():
+        raise HTTPException(status_code=410, detail="Sync token expired; run a full sync")
+    if floor is None:
+        floor = datetime.now() - timedelta(seconds=SYNC_OVERLAP_SECONDS)
+
+    stmt = (
+        select(PropertyDocument.yardi, PropertyDocument.updated_at, PropertyDocument.body)
+        .order_by(PropertyDocument.updated_at, PropertyDocument.yardi)
+        .limit(limit + 1)
+    )
+    if since is not None:
+        stmt = stmt.where(
+            or_(
+                PropertyDocument.updated_at > since,
+                and_(PropertyDocument.updated_at == since, PropertyDocument.yardi > after),
+            )
+        )
+    rows = (await db.execute(stmt)).all()
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    if rows:
+        since, after = rows[-1].updated_at, rows[-1].yardi
+
+    # A full sync starts from nothing, so it has nothing to delete
+    deleted = {}
+    if deleted_since is not None:
+        tombstones = (
+            await db.execute(
+                select(Tombstone.id, Tombstone.entity_type, Tombstone.entity_id, Tombstone.deleted_at)
+                .where(
+                    or_(
+                        Tombstone.deleted_at > deleted_since,
+                        and_(Tombstone.deleted_at == deleted_since, Tombstone.id > deleted_after),
+                    )
+                )
+                .order_by(Tombstone.deleted_at, Tombstone.id)
+                .limit(limit + 1)
+            )
+        ).all()
+        has_more = has_more or len(tombstones) > limit
+        tombstones = tombstones[:limit]
+        for tombstone in tombstones:
+            deleted.setdefault(tombstone.entity_type, []).append(tombstone.entity_id)
+        if tombstones:
+            deleted_since, deleted_after = tombstones[-1].deleted_at, tombstones[-1].id
+
+    if has_more:
+        next_token = encode_sync_token(since, after, deleted_since, deleted_after, floor)
+    else:
+        next_token = encode_sync_token(floor, "", floor, 0, None)
+
+    envelope = {"token": next_token, "has_more": has_more, "deleted": deleted}
+    return envelope, [row.body for row in rows]
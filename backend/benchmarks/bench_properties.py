@@ -0,0 +1,193 @@
+"""
+Benchmark: one GET /properties page, per document assembly strategy.
+
+    cd backend
+    python -m benchmarks.bench_properties --properties 500 --per-page 100
+
+- orm:  the previous implementation - full ORM objects, __dict__
+        copies (with _sa_instance_state), jsonable_encoder, then orjson.
+- rows: app.documents.build_property_documents - explicit column
+        selects returning Row tuples, precomputed serializers, orjson
+        (PROPERTY_DOCUMENT_ENGINE=python).
+- sql:  app.documents.property_document_column - the database renders
+        each document as JSON in the page query; the text is spliced
+        into the response (PROPERTY_DOCUMENT_ENGINE=sql).
+
+All produce the same JSON; the table reports CPU, wall time and peak
+allocations per page.
+
+A second table compares the response formats (app.formats) for the
+same page: JSON and MessagePack body size (raw and gzipped, as sent
+through GZipMiddleware) and encode/decode time.
+"""
+from collections import defaultdict
+import argparse
+import asyncio
+import gzip
+import time
+import orjson
+import ormsgpack
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy import select
+from app.documents import build_property_documents, property_columns, property_document_column
+from app.formats import dump
+from app.models import (
+    Property,
+    Suite,
+    Service,
+    Utility,
+    Permit,
+    Code,
+    SuiteContact,
+    ServiceContact,
+    UtilityContact,
+    Contact,
+)
+from benchmarks.common import measure, print_table, seed_portfolio, session_factory, temp_db_path
+
+
+async def orm_page(db, per_page):
+    """The ORM-object page assembly get_properties used before row tuples."""
+    props = (await db.scalars(select(Property).order_by(Property.yardi).limit(per_page))).all()
+    yardis = [p.yardi for p in props]
+
+    suites = (await db.scalars(select(Suite).where(Suite.property_yardi.in_(yardis)))).all()
+    services = (await db.scalars(select(Service).where(Service.property_yardi.in_(yardis)))).all()
+    utilities = (await db.scalars(select(Utility).where(Utility.property_yardi.in_(yardis)))).all()
+    permits = (await db.scalars(select(Permit).where(Permit.property_yardi.in_(yardis)))).all()
+    codes = (await db.scalars(select(Code).where(Code.property_yardi.in_(yardis)))).all()
+
+    suite_links = (await db.scalars(select(SuiteContact).where(
+        SuiteContact.suite_id.in_([s.suite_id for s in suites] or [None])))).all()
+    service_links = (await db.scalars(select(ServiceContact).where(
+        ServiceContact.service_id.in_([s.service_id for s in services] or [None])))).all()
+    utility_links = (await db.scalars(select(UtilityContact).where(
+        UtilityContact.utility_id.in_([u.utility_id for u in utilities] or [None])))).all()
+    contact_ids = (
+        {l.contact_id for l in suite_links}
+        | {l.contact_id for l in service_links}
+        | {l.contact_id for l in utility_links}
+    )
+    contacts = (await db.scalars(select(Contact).where(Contact.contact_id.in_(contact_ids or [None])))).all()
+    contacts_by_id = {c.contact_id: c.__dict__.copy() for c in contacts}
+
+    def group(children, links, id_attr):
+        by_child = defaultdict(list)
+        for l in links:
+            c = contacts_by_id.get(l.contact_id)
+            if c:
+                by_child[getattr(l, id_attr)].append(c)
+        by_yardi = defaultdict(list)
+        for child in children:
+            d = child.__dict__.copy()
+            if id_attr:
+                d["contacts"] = by_child.get(getattr(child, id_attr), [])
+            by_yardi[child.property_yardi].append(d)
+        return by_yardi
+
+    grouped = {
+        "suites": group(suites, suite_links, "suite_id"),
+        "services": group(services, service_links, "service_id"),
+        "utilities": group(utilities, utility_links, "utility_id"),
+        "permits": group(permits, [], None),
+        "codes": group(codes, [], None),
+    }
+    result = []
+    for prop in props:
+        doc = {c.key: getattr(prop, c.key) for c in Property.__table__.columns}
+        for name, by_yardi in grouped.items():
+            doc[name] = by_yardi.get(prop.yardi, [])
+        result.append(doc)
+    # FastAPI's default path: jsonable_encoder walk, then the response class
+    return orjson.dumps(jsonable_encoder({"properties": result}))
+
+
+async def rows_page(db, per_page):
+    """The row-tuple page assembly used by get_properties now."""
+    props = (await db.execute(
+        select(*property_columns()).order_by(Property.yardi).limit(per_page)
+    )).all()
+    result = await build_property_documents(db, props)
+    return orjson.dumps({"properties": result})
+
+
+async def sql_page(db, per_page):
+    """The SQL document engine: one statement, JSON text passed through."""
+    columns = property_columns()
+    dialect = db.get_bind().dialect.name
+    rows = (await db.execute(
+        select(*columns, property_document_column(dialect, columns))
+        .order_by(Property.yardi)
+        .limit(per_page)
+    )).all()
+    return b'{"properties":[' + ",".join(r.document for r in rows).encode() + b"]}"
+
+
+PATHS = (("orm", orm_page), ("rows", rows_page), ("sql", sql_page))
+
+FORMATS = (
+    ("json", lambda page: dump(page, "json"), orjson.loads),
+    ("msgpack", lambda page: dump(page, "msgpack"), ormsgpack.unpackb),
+)
+
+
+def _mean_ms(fn, arg, repeat):
+    fn(arg)  # warm up
+    t0 = time.perf_counter()
+    for _ in range(repeat):
+        fn(arg)
+    return (time.perf_counter() - t0) / repeat * 1000
+
+
+def format_results(page, repeat=20):
+    """
+    Size and codec time of one page in each response format.
+
+    Returns:
+        dict: format → bytes, gzip_bytes, encode_ms and decode_ms.
+    """
+    results = {}
+    for name, encode, decode in FORMATS:
+        body = encode(page)
+        assert decode(body) == page, f"{name} does not round-trip"
+        results[name] = {
+            "bytes": len(body),
+            "gzip_bytes": len(gzip.compress(body)),
+            "encode_ms": _mean_ms(encode, page, repeat),
+            "decode_ms": _mean_ms(decode, body, repeat),
+        }
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--properties", type=int, default=500)
+    parser.add_argument("--per-page", type=int, default=100)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args(argv)
+
+    url = seed_portfolio(temp_db_path(), properties=args.properties)
+    engine, Session = session_factory(url)
+
+    def runner(page_fn):
+        async def run():
+            async with Session() as db:
+                return await page_fn(db, args.per_page)
+        return run
+
+    bodies = [orjson.loads(asyncio.run(runner(fn)())) for _, fn in PATHS]
+    assert all(body == bodies[0] for body in bodies), "paths disagree"
+
+    results = {
+        name: {**measure(runner(fn), args.repeat), "bytes": len(asyncio.run(runner(fn)()))}
+        for name, fn in PATHS
+    }
+    print_table(f"GET /properties page ({args.per_page} of {args.properties} properties)", results)
+
+    formats = format_results(bodies[0], args.repeat)
+    print_table(f"Response formats ({args.per_page} properties)", formats)
+    return results, formats
+
+
+if __name__ == "__main__":
+    main()
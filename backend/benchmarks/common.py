@@ -0,0 +1,146 @@
+import asyncio
+import os
+import random
+import tempfile
+import time
+import tracemalloc
+from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+from sqlalchemy.pool import NullPool
+from sqlalchemy.orm import Session
+from app.models import (
+    Base,
+    Property,
+    Suite,
+    Service,
+    Utility,
+    Permit,
+    Code,
+    Contact,
+    SuiteContact,
+    ServiceContact,
+    UtilityContact,
+)
+
+# -------------------------------------------------------------------
+# Benchmark Helpers
+# Seeds a throwaway SQLite database with a synthetic portfolio and
+# measures CPU time and memory allocations of async code paths.
+# -------------------------------------------------------------------
+
+
+def seed_portfolio(path, properties=500, seed=42):
+    """
+    Create and fill a SQLite file with `properties` properties, each with
+    a handful of suites, services, utilities, permits, codes and contacts.
+
+    Returns:
+        str: Async SQLAlchemy URL for the database.
+    """
+    rng = random.Random(seed)
+    engine = create_engine(f"sqlite+pysqlite:///{path}")
+    Base.metadata.drop_all(engine)
+    Base.metadata.create_all(engine)
+    words = ["Acme", "Summit", "Harbor", "Oak", "Pine", "Cedar", "Delta", "River"]
+
+    with Session(engine) as db:
+        contact_id = 0
+        for i in range(properties):
+            yardi = f"P{i:05d}"
+            db.add(Property(
+                yardi=yardi,
+                address=f"{i} {rng.choice(words)} St",
+                city=rng.choice(["Davis", "Sacramento", "Roseville", "Auburn"]),
+                state="CA",
+                zip=95600 + rng.randrange(300),
+                building_type=rng.choice(["Office", "Retail", "Industrial"]),
+                total_sq_ft=rng.randrange(5_000, 200_000),
+                prop_manager=rng.choice(["Ann", "Bob", "Cam"]),
+                misc="x" * rng.randrange(0, 200),
+                active=True,
+            ))
+            children = []
+            for kind, model, link in (
+                ("suite", Suite, SuiteContact),
+                ("service", Service, ServiceContact),
+                ("utility", Utility, UtilityContact),
+            ):
+                for j in range(rng.randrange(1, 6)):
+                    if kind == "suite":
+                        child = Suite(property_yardi=yardi, suite=str(100 + j),
+                                      name=f"{rng.choice(words)} Tenant", notes="n" * 80)
+                    elif kind == "service":
+                        child = Service(property_yardi=yardi, service_type="Janitorial",
+                                        vendor=f"{rng.choice(words)} Services", notes="n" * 40)
+                    else:
+                        child = Utility(property_yardi=yardi, service="Electric",
+                                        vendor="SMUD", account_number=str(rng.randrange(10**8)))
+                    children.append((child, link))
+            db.add_all(c for c, _ in children)
+            db.add_all([
+                Permit(property_yardi=yardi, municipality="Davis", permit_number=str(i)),
+                Code(property_yardi=yardi, description="Front door", code=str(rng.randrange(9999))),
+                Code(property_yardi=yardi, description="Roof hatch", code=str(rng.randrange(9999))),
+            ])
+            db.flush()
+            for child, link in children:
+                contact_id += 1
+                db.add(Contact(contact_id=contact_id, name=f"Contact {contact_id}",
+                               email=f"c{contact_id}@example.com"))
+                id_attr = {SuiteContact: "suite_id", ServiceContact: "service_id",
+                           UtilityContact: "utility_id"}[link]
+                db.add(link(**{id_attr: getattr(child, id_attr), "contact_id": contact_id}))
+        db.commit()
+    engine.dispose()
+    return f"sqlite+aiosqlite:///{path}"
+
+
+def temp_db_path():
+    return os.path.join(tempfile.mkdtemp(), "bench.db")
+
+
+def session_factory(url):
+    engine = create_async_engine(url, poolclass=NullPool)
+    return engine, async_sessionmaker(bind=engine, autoflush=False, expire_on_commit=False)
+
+
+def measure(fn, repeat=20):
+    """
+    Run the async callable `fn` `repeat` times and measure it.
+
+    Returns:
+        dict: cpu_ms and wall_ms (mean per call) and peak_kib (peak
+        memory allocated by one call, traced with tracemalloc).
+    """
+    async def run():
+        await fn()  # warm up caches/statement compilation
+        cpu0, wall0 = time.process_time(), time.perf_counter()
+        for _ in range(repeat):
+            await fn()
+        cpu = time.process_time() - cpu0
+        wall = time.perf_counter() - wall0
+
+        tracemalloc.start()
+        base = tracemalloc.get_traced_memory()[0]
+        await fn()
+        peak = tracemalloc.get_traced_memory()[1] - base
+        tracemalloc.stop()
+        return {
+            "cpu_ms": cpu / repeat * 1000,
+            "wall_ms": wall / repeat * 1000,
+            "peak_kib": peak / 1024,
+        }
+
+    return asyncio.run(run())
+
+
+def print_table(title, results):
+    """Print {name: measure() dict} as an aligned table."""
+    print(f"\n{title}")
+    columns = list(next(iter(results.values())).keys())
+    print(f"{'':<16}" + "".join(f"{c:>14}" for c in columns))
+    for name, row in results.items():
+        print(f"{name:<16}" + "".join(
+            f"{row[c]:>14.2f}" if isinstance(row[c], float) else f"{row[c]:>14}"
+            for c in columns
+        ))
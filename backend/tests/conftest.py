@@ -1,41 +1,59 @@
+import os
+import tempfile
 import pytest
 import pytest_asyncio
 from httpx import AsyncClient, ASGITransport
 from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
-from sqlalchemy.pool import StaticPool
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+from sqlalchemy.pool import NullPool
 from app.models import Base
 from app.main import app
 from app.auth import verify_token
-from app.database import get_db
+from app.database import get_async_db, get_read_db, get_read_session_factory
 from app import models
+from app.counts import count_cache
+from app.cache import response_cache
+from app.cache_backends import MemoryBackend
 
-# Use SQLite in-memory for tests
-SQLALCHEMY_DATABASE_URL = "sqlite+pysqlite:///:memory:"
+# Use a throwaway SQLite file for tests. A file (rather than :memory:)
+# lets the sync engine create tables that the async engine then sees.
+_DB_PATH = os.path.join(tempfile.mkdtemp(), "test.db")
+SQLALCHEMY_DATABASE_URL = f"sqlite+pysqlite:///{_DB_PATH}"
+ASYNC_SQLALCHEMY_DATABASE_URL = f"sqlite+aiosqlite:///{_DB_PATH}"
 
 engine = create_engine(
     SQLALCHEMY_DATABASE_URL,
     connect_args={"check_same_thread": False},
-    poolclass = StaticPool
 )
-TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+# NullPool: every session gets its own aiosqlite connection, so nothing
+# is shared across the per-test event loops.
+async_engine = create_async_engine(ASYNC_SQLALCHEMY_DATABASE_URL, poolclass=NullPool)
+TestingSessionLocal = async_sessionmaker(
+    bind=async_engine, autoflush=False, expire_on_commit=False
+)
 
 @pytest.fixture(scope="function", autouse=True)
 def setup_db():
     Base.metadata.drop_all(bind=engine)
     Base.metadata.create_all(bind=engine)
+    # Fresh in-process cache backend per test
+    count_cache.backend = response_cache.backend = MemoryBackend()
     yield
     Base.metadata.drop_all(bind=engine)
 
+@pytest.fixture
+def db_engine():
+    return async_engine
+
 # Provide test DB instead of real Postgres
-def get_test_db():
-    db = TestingSessionLocal()
-    try:
+async def get_test_db():
+    async with TestingSessionLocal() as db:
         yield db
-    finally:
-        db.close()
 
-app.dependency_overrides[get_db] = get_test_db
+app.dependency_overrides[get_async_db] = get_test_db
+app.dependency_overrides[get_read_db] = get_test_db
+app.dependency_overrides[get_read_session_factory] = lambda: TestingSessionLocal
 
 # Bypass auth
 def override_verify_token():
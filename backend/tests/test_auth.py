@@ -1,10 +1,263 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
 import pytest
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import rsa
 from fastapi import Request
-from app.auth import verify_token
+from jose import jwk, jwt
+from app import auth
+from app.auth import verify_token, JWKSCache, TokenCache
 from fastapi import HTTPException
 
+
+# -------------------------------------------------------------------
+# Local JWKS stand-in (replaces login.microsoftonline.com in tests)
+# -------------------------------------------------------------------
+
+def _make_key(kid):
+    private = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    pem = private.private_bytes(
+        serialization.Encoding.PEM,
+        serialization.PrivateFormat.PKCS8,
+        serialization.NoEncryption(),
+    )
+    public = jwk.construct(pem, algorithm="RS256").public_key().to_dict()
+    public["kid"] = kid
+    return pem, public
+
+
+class _JWKSServer:
+    def __init__(self):
+        self.keys = []
+        self.hits = 0
+        self.fail = False
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                server.hits += 1
+                if server.fail:
+                    self.send_response(503)
+                    self.end_headers()
+                    return
+                body = json.dumps({"keys": server.keys}).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.httpd = HTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.httpd.server_port}/keys"
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self.thread.start()
+
+    def close(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+@pytest.fixture
+def jwks_server():
+    server = _JWKSServer()
+    yield server
+    server.close()
+
+
+@pytest.fixture
+def signing_key(jwks_server):
+    pem, public = _make_key("k1")
+    jwks_server.keys = [public]
+    return pem
+
+
+@pytest.fixture
+def jwks_cache(jwks_server, monkeypatch):
+    cache = JWKSCache(jwks_server.url, ttl=60, min_refresh_interval=0, timeout=2)
+    monkeypatch.setattr(auth, "_jwks_cache", cache)
+    monkeypatch.setattr(auth, "_token_cache", TokenCache(maxsize=8))
+    return cache
+
+
+def _issue_token(pem, kid="k1", **claims):
+    now = int(time.time())
+    payload = {
+        "aud": f"api://{auth.AZURE_AD_CLIENT_ID}",
+        "iss": f"https://sts.windows.net/{auth.AZURE_AD_TENANT_ID}/",
+        "iat": now,
+        "exp": now + 600,
+        "name": "Joe Tester",
+        **claims,
+    }
+    return jwt.encode(payload, pem, algorithm="RS256", headers={"kid": kid})
+
+
 def test_verify_token_without_header():
     request = Request({"type": "http", "headers": []})
     with pytest.raises(HTTPException) as excinfo:
         verify_token(request)
     assert excinfo.value.status_code == 401
+
+
+def test_keys_fetched_once_within_ttl(jwks_server, signing_key, jwks_cache):
+    token = _issue_token(signing_key)
+    for _ in range(5):
+        assert verify_token(token)["name"] == "Joe Tester"
+    assert jwks_server.hits == 1
+
+
+def test_unknown_kid_triggers_single_refetch(jwks_server, signing_key, jwks_cache):
+    verify_token(_issue_token(signing_key))
+    assert jwks_server.hits == 1
+
+    # Key rotation: a new kid is published and used
+    pem2, public2 = _make_key("k2")
+    jwks_server.keys.append(public2)
+    assert verify_token(_issue_token(pem2, kid="k2"))["name"] == "Joe Tester"
+    assert jwks_server.hits == 2
+
+    # A kid that really does not exist refetches once, then fails
+    with pytest.raises(HTTPException) as excinfo:
+        verify_token(_issue_token(pem2, kid="nope"))
+    assert excinfo.value.status_code == 401
+    assert jwks_server.hits == 3
+
+
+def test_kid_miss_refetch_is_rate_limited(jwks_server, signing_key, jwks_cache):
+    jwks_cache.min_refresh_interval = 60
+    verify_token(_issue_token(signing_key))
+
+    for _ in range(3):
+        with pytest.raises(HTTPException):
+            verify_token(_issue_token(signing_key, kid="bogus"))
+    assert jwks_server.hits == 1
+
+
+def test_stale_keys_served_when_upstream_down(jwks_server, signing_key, jwks_cache):
+    token = _issue_token(signing_key)
+    verify_token(token)
+
+    # Expire the cache and take the JWKS endpoint down
+    jwks_cache.ttl = 0
+    jwks_server.fail = True
+    auth._token_cache.clear()
+    assert verify_token(token)["name"] == "Joe Tester"
+    assert jwks_cache.stats()["fresh"] is False
+
+
+def test_get_azure_public_keys_uses_cache(jwks_server, signing_key, jwks_cache):
+    keys = auth.get_azure_public_keys()
+    assert [k["kid"] for k in keys] == ["k1"]
+    auth.get_azure_public_keys()
+    assert jwks_server.hits == 1
+
+
+def test_repeat_token_skips_verification(jwks_server, signing_key, jwks_cache, monkeypatch):
+    token = _issue_token(signing_key)
+    verify_token(token)
+
+    # A cache hit must not touch the JWT library at all
+    def boom(*args, **kwargs):
+        raise AssertionError("token was re-verified")
+    monkeypatch.setattr(auth.jwt, "decode", boom)
+
+    for _ in range(3):
+        assert verify_token(token)["name"] == "Joe Tester"
+    assert auth.get_auth_cache_stats()["tokens"]["hits"] == 3
+    assert auth.get_auth_cache_stats()["tokens"]["misses"] == 1
+
+
+def test_cached_token_expires_with_exp(jwks_server, signing_key, jwks_cache):
+    cache = auth._token_cache
+    digest = cache.digest("t")
+    cache.put(digest, "k1", {"exp": time.time() - 1, "name": "old"})
+    assert cache.get(digest) is None
+    assert cache.stats()["size"] == 0
+
+
+def test_cached_token_dropped_when_kid_removed(jwks_server, signing_key, jwks_cache):
+    token = _issue_token(signing_key)
+    verify_token(token)
+
+    # k1 is rotated out: the cached payload must not outlive its key
+    _, public2 = _make_key("k2")
+    jwks_server.keys = [public2]
+    jwks_cache.refresh(force=True)
+    with pytest.raises(HTTPException):
+        verify_token(token)
+
+
+def test_token_cache_is_bounded():
+    cache = TokenCache(maxsize=2)
+    exp = time.time() + 60
+    for i in range(3):
+        cache.put(cache.digest(str(i)), "k1", {"exp": exp, "i": i})
+    assert cache.get(cache.digest("0")) is None
+    assert cache.get(cache.digest("2"))["i"] == 2
+    assert cache.stats()["evictions"] == 1
+
+
+@pytest.mark.asyncio
+async def test_refresher_prewarms_and_serves_without_inline_fetch(jwks_server, signing_key, jwks_cache, monkeypatch):
+    refresher = auth.JWKSRefresher(jwks_cache, interval=60)
+    await refresher.start(prewarm_timeout=5)
+    try:
+        assert jwks_cache.ready
+        assert jwks_server.hits == 1
+
+        # Requests must never fetch inline while the refresher is running
+        def no_fetch():
+            raise AssertionError("request path fetched keys")
+        monkeypatch.setattr(jwks_cache, "_fetch", no_fetch)
+        jwks_cache.ttl = 0
+        assert verify_token(_issue_token(signing_key))["name"] == "Joe Tester"
+        with pytest.raises(HTTPException):
+            verify_token(_issue_token(signing_key, kid="unknown"))
+    finally:
+        await refresher.stop()
+    assert jwks_cache.background_refresh is None
+
+
+@pytest.mark.asyncio
+async def test_refresher_picks_up_rotated_key_on_nudge(jwks_server, signing_key, jwks_cache):
+    import asyncio
+
+    refresher = auth.JWKSRefresher(jwks_cache, interval=60)
+    await refresher.start(prewarm_timeout=5)
+    try:
+        pem2, public2 = _make_key("k2")
+        jwks_server.keys.append(public2)
+        token = _issue_token(pem2, kid="k2")
+
+        # First sight of k2 schedules a refresh instead of blocking
+        with pytest.raises(HTTPException):
+            verify_token(token)
+        for _ in range(100):
+            if jwks_cache.has_kid("k2"):
+                break
+            await asyncio.sleep(0.02)
+        assert verify_token(token)["name"] == "Joe Tester"
+    finally:
+        await refresher.stop()
+
+
+def test_ready_endpoint_reflects_key_availability(jwks_server, signing_key, jwks_cache):
+    from fastapi.testclient import TestClient
+    from app.main import app
+
+    jwks_server.fail = True
+    with TestClient(app) as client:
+        assert client.get("/ready").status_code == 503
+
+    jwks_server.fail = False
+    with TestClient(app) as client:
+        # Lifespan prewarmed the keys before serving
+        res = client.get("/ready")
+        assert res.status_code == 200
+        assert res.json()["jwks"] is True
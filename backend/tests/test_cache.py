@@ -0,0 +1,116 @@
+import asyncio
+import os
+import pytest
+from app.cache import response_cache
+from app.cache_backends import CacheBackend, MemoryBackend, RedisBackend, SQLiteBackend
+
+
+def _backends(tmp_path):
+    yield MemoryBackend(max_entries=3, max_bytes=10)
+    yield SQLiteBackend(str(tmp_path / "cache.sqlite3"), max_entries=3, max_bytes=10)
+    # Redis only when a test server is configured
+    if os.getenv("CACHE_TEST_REDIS_URL"):
+        pytest.importorskip("redis")
+        yield RedisBackend(os.environ["CACHE_TEST_REDIS_URL"], prefix="pis-test:")
+
+
+@pytest.mark.asyncio
+async def test_cache_backends_entries_tags_and_counters(tmp_path):
+    for backend in _backends(tmp_path):
+        await backend.clear()
+        await backend.set("a", b"1", tags=("p1",))
+        await backend.set("b", b"2", tags=("p1", "p2"))
+        await backend.set("c", b"3", tags=("p2",))
+        assert await backend.get("a") == b"1"
+
+        await backend.invalidate("p1")
+        assert await backend.get("a") is None and await backend.get("b") is None
+        assert await backend.get("c") == b"3"
+
+        await backend.set("t", b"x", ttl=0.05)
+        await asyncio.sleep(0.1)
+        assert await backend.get("t") is None, backend.name
+
+        assert await backend.counter("gen") == 0
+        assert await backend.incr("gen") == 1
+        assert await backend.incr("gen") == 2
+        await backend.clear()
+        assert await backend.get("c") is None and await backend.counter("gen") == 0
+
+
+@pytest.mark.asyncio
+async def test_cache_backends_evict_by_count_and_size(tmp_path):
+    for backend in _backends(tmp_path):
+        if backend.name == "redis":
+            continue    # bounded by the server's maxmemory policy
+        for key in "abcd":
+            await backend.set(key, b"12", tags=("p",))
+        assert await backend.get("a") is None           # over count
+        await backend.set("e", b"12345678")             # over size
+        stats = await backend.stats()
+        assert stats["entries"] <= 3 and stats["bytes"] <= 10
+        assert await backend.get("e") == b"12345678"
+        await backend.set("f", b"x" * 11)               # larger than the cache
+        assert await backend.get("f") is None
+        assert stats["evictions"] >= 3
+
+
+def test_incomplete_backend_fails_when_built():
+    class NoCounters(CacheBackend):
+        async def get(self, key):
+            return None
+
+    with pytest.raises(TypeError):
+        NoCounters()
+
+
+@pytest.mark.asyncio
+async def test_sqlite_backend_shared_between_workers(tmp_path):
+    path = str(tmp_path / "shared.sqlite3")
+    worker_a, worker_b = SQLiteBackend(path), SQLiteBackend(path)
+
+    await worker_a.set("response:P1", b"doc", tags=("property:P1",))
+    assert await worker_b.get("response:P1") == b"doc"
+    await worker_b.invalidate("property:P1")
+    assert await worker_a.get("response:P1") is None
+    await worker_a.incr("count-generation:properties")
+    assert await worker_b.counter("count-generation:properties") == 1
+
+
+@pytest.mark.asyncio
+async def test_sqlite_backend_waits_off_the_event_loop(tmp_path):
+    backend = SQLiteBackend(str(tmp_path / "busy.sqlite3"))
+    await backend.set("k", b"v")
+
+    with backend._lock:    # another call holds the connection
+        pending = asyncio.create_task(backend.get("k"))
+        await asyncio.sleep(0.05)    # the loop keeps running meanwhile
+        assert not pending.done()
+    assert await pending == b"v"
+
+
+@pytest.mark.asyncio
+async def test_property_responses_cached_until_write(client):
+    await client.post("/properties", json={"yardi": "C1", "address": "1 Cache St"})
+    await client.post("/suites", json={"suite_id": 1, "property_yardi": "C1", "suite": "A",
+                                       "contacts": [{"name": "Ann"}]})
+
+    for url, params in [("/properties/C1", {}), ("/suites", {"property_yardi": "C1"})]:
+        first = await client.get(url, params=params)
+        again = await client.get(url, params=params)
+        assert again.content == first.content
+        assert again.headers["ETag"] == first.headers["ETag"]
+        assert again.headers["X-DB-Queries"] == "1"    # version lookup only
+
+    # Sparse variants are cached separately
+    sparse = await client.get("/properties/C1", params={"fields": "address", "include": ""})
+    assert sparse.json() == {"yardi": "C1", "address": "1 Cache St"}
+
+    # A write drops the property's entries and moves the version on
+    await client.put("/suites/1", json={"name": "Acme"})
+    assert (await response_cache.stats())["entries"] == 0
+    res = await client.get("/suites", params={"property_yardi": "C1"})
+    assert res.json()[0]["name"] == "Acme"
+
+    res = await client.get("/admin/response-cache")
+    assert {"hits", "misses", "evictions", "invalidations", "bytes"} <= res.json().keys()
@@ -1,3 +1,9 @@
+import asyncio
+import time
+import pytest
+from sqlalchemy import create_engine, event
+from sqlalchemy.pool import NullPool, QueuePool
+from app.auth import verify_token
 from app import database
 
 def test_get_db_yields_and_closes(monkeypatch):
@@ -36,3 +42,171 @@ def test_init_db_import(monkeypatch):
 
     assert called["ran"]
 
+
+def test_to_async_url_maps_drivers():
+    assert database.to_async_url("sqlite:///./local.db").drivername == "sqlite+aiosqlite"
+    url = database.to_async_url("postgresql://u:p@db:5432/pis?sslmode=require")
+    assert url.drivername == "postgresql+asyncpg"
+    assert url.query == {"ssl": "require"}
+
+
+@pytest.mark.asyncio
+async def test_concurrent_requests_overlap_db_waits(client, db_engine):
+    await client.post("/properties", json={"yardi": "P1", "address": "1 Main"})
+
+    # Simulate a slow database: each statement stalls inside the driver
+    # thread, the way network latency to Postgres would.
+    def slow_statement(_sql):
+        time.sleep(0.05)
+
+    def on_connect(dbapi_connection, connection_record):
+        dbapi_connection.run_async(lambda conn: conn.set_trace_callback(slow_statement))
+
+    event.listen(db_engine.sync_engine, "connect", on_connect)
+    try:
+        t0 = time.perf_counter()
+        res = await client.get("/codes", params={"property_yardi": "P1"})
+        single = time.perf_counter() - t0
+        assert res.status_code == 200
+
+        t0 = time.perf_counter()
+        responses = await asyncio.gather(
+            *[client.get("/codes", params={"property_yardi": "P1"}) for _ in range(8)]
+        )
+        batch = time.perf_counter() - t0
+    finally:
+        event.remove(db_engine.sync_engine, "connect", on_connect)
+
+    assert all(r.status_code == 200 for r in responses)
+    # Serialized this would take ~8x a single request
+    assert batch < single * 4
+
+
+def test_pool_options_from_env(monkeypatch):
+    assert database.pool_options("sqlite:///./local.db") == {}
+
+    monkeypatch.setattr(database, "DB_POOL_SIZE", 12)
+    monkeypatch.setattr(database, "DB_POOL_PRE_PING", True)
+    opts = database.pool_options("postgresql://u:p@db/pis")
+    assert opts["pool_size"] == 12
+    assert opts["pool_pre_ping"] is True
+    assert {"max_overflow", "pool_timeout", "pool_recycle"} <= set(opts)
+
+
+def test_pool_stats_track_checkouts(tmp_path):
+    eng = create_engine(
+        f"sqlite:///{tmp_path}/pool.db", poolclass=QueuePool, pool_size=2, max_overflow=0
+    )
+    stats = database.PoolStats()
+    stats.attach(eng)
+
+    c1 = eng.connect()
+    c2 = eng.connect()
+    assert stats.snapshot()["in_use"] == 2
+    c1.close()
+    c2.close()
+
+    snap = stats.snapshot(eng.pool)
+    assert snap["checkouts"] == 2
+    assert snap["in_use"] == 0
+    assert snap["peak_in_use"] == 2
+    assert snap["pool"]["size"] == 2
+
+
+@pytest.mark.asyncio
+async def test_get_async_db_records_checkout_wait(monkeypatch, db_engine):
+    from sqlalchemy.ext.asyncio import async_sessionmaker
+    from starlette.requests import Request
+
+    stats = database.PoolStats()
+    monkeypatch.setattr(database, "pool_stats", stats)
+    monkeypatch.setattr(database, "AsyncSessionLocal", async_sessionmaker(bind=db_engine))
+
+    gen = database.get_async_db(Request({"type": "http", "headers": []}))
+    await gen.__anext__()
+    await gen.aclose()
+    assert stats.snapshot()["checkout_wait_ms"]["count"] == 1
+
+
+@pytest.mark.asyncio
+async def test_admin_db_pool_endpoint(client):
+    res = await client.get("/admin/db-pool")
+    assert res.status_code == 200
+    data = res.json()
+    assert data["pid"] > 0
+    assert "checkout_wait_ms" in data and "pool" in data
+
+
+@pytest.fixture
+def replica(tmp_path, monkeypatch):
+    """
+    Point the primary and the replica at two separate SQLite files.
+    Nothing replicates between them, so a row's location tells us which
+    database served the read.
+    """
+    from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+    from app.main import app
+    from app.models import Base
+
+    factories = {}
+    for name in ("primary", "replica"):
+        path = tmp_path / f"{name}.db"
+        sync_engine = create_engine(f"sqlite:///{path}")
+        Base.metadata.create_all(bind=sync_engine)
+        sync_engine.dispose()
+        async_engine = create_async_engine(f"sqlite+aiosqlite:///{path}", poolclass=NullPool)
+        factories[name] = async_sessionmaker(bind=async_engine, expire_on_commit=False)
+
+    monkeypatch.setattr(database, "READ_REPLICA_ENABLED", True)
+    monkeypatch.setattr(database, "AsyncSessionLocal", factories["primary"])
+    monkeypatch.setattr(database, "AsyncReadSessionLocal", factories["replica"])
+    monkeypatch.delitem(app.dependency_overrides, database.get_async_db)
+    monkeypatch.delitem(app.dependency_overrides, database.get_read_db)
+    return factories
+
+
+@pytest.mark.asyncio
+async def test_reads_stick_to_primary_after_own_write(client, replica, monkeypatch):
+    res = await client.post("/properties", json={"yardi": "R1", "address": "1 Replica Way"})
+    assert res.status_code == 201
+
+    # Same user, inside the sticky window: served by the primary
+    res = await client.get("/properties/R1")
+    assert res.status_code == 200
+
+    # Window elapsed: served by the (empty) replica
+    monkeypatch.setattr(database, "DB_READ_STICKY_SECONDS", 0)
+    res = await client.get("/properties/R1")
+    assert res.status_code == 404
+
+
+@pytest.mark.asyncio
+async def test_read_stickiness_travels_with_the_client(client, replica):
+    from httpx import AsyncClient, ASGITransport
+    from app.main import app
+
+    res = await client.post("/properties", json={"yardi": "R3", "address": "3 Replica Way"})
+    token = res.headers[database.READ_STICKY_HEADER]
+    assert res.cookies[database.READ_STICKY_COOKIE] == token
+
+    # No worker remembers the write: a fresh client (another worker's
+    # view) reads the primary only when it presents the token
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as other:
+        assert (await other.get("/properties/R3")).status_code == 404
+        headers = {database.READ_STICKY_HEADER: token}
+        assert (await other.get("/properties/R3", headers=headers)).status_code == 200
+        forged = {database.READ_STICKY_HEADER: token[:-1] + ("0" if token[-1] != "0" else "1")}
+        assert (await other.get("/properties/R3", headers=forged)).status_code == 404
+
+
+@pytest.mark.asyncio
+async def test_other_users_read_from_replica(client, replica, monkeypatch):
+    from app.main import app
+
+    await client.post("/properties", json={"yardi": "R2", "address": "2 Replica Way"})
+
+    monkeypatch.setitem(app.dependency_overrides, verify_token, lambda: {"name": "Someone Else"})
+    res = await client.get("/properties/R2")
+    assert res.status_code == 404
+    res = await client.get("/properties")
+    assert res.json()["total"] == 0
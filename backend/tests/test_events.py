@@ -0,0 +1,69 @@
+import pytest
+from app.events import EventBroker, broker, event_stream
+
+
+def _drain(queue):
+    items = []
+    while not queue.empty():
+        items.append(queue.get_nowait())
+    return items
+
+
+@pytest.mark.asyncio
+async def test_broker_fans_out_and_drops_slow_consumers():
+    events = EventBroker(queue_size=2)
+    fast, slow = events.subscribe(), events.subscribe()
+
+    events.publish({"n": 1})
+    assert fast.get_nowait() == {"n": 1}
+    events.publish({"n": 2})
+    events.publish({"n": 3})      # slow is now 3 behind: dropped
+
+    assert _drain(fast) == [{"n": 2}, {"n": 3}]
+    assert _drain(slow) == [None]
+    assert events.stats() == {"subscribers": 1, "published": 3, "dropped": 1}
+
+
+@pytest.mark.asyncio
+async def test_event_stream_frames():
+    events = EventBroker(queue_size=1)
+    stream = event_stream(events, keepalive=0.01)
+    assert await anext(stream) == "retry: 3000\n\n"
+    assert await anext(stream) == ": keepalive\n\n"
+
+    events.publish({"entity_type": "suite", "entity_id": "1"})
+    assert await anext(stream) == 'event: change\ndata: {"entity_type":"suite","entity_id":"1"}\n\n'
+
+    events.publish({"n": 1})
+    events.publish({"n": 2})
+    assert await anext(stream) == "event: dropped\ndata: {}\n\n"
+    with pytest.raises(StopAsyncIteration):
+        await anext(stream)
+    assert events.stats()["subscribers"] == 0
+
+
+@pytest.mark.asyncio
+async def test_write_routes_publish_after_commit(client):
+    queue = broker.subscribe()
+    try:
+        await client.post("/properties", json={"yardi": "V1", "address": "1 Live St"})
+        await client.post("/suites", json={"suite_id": 4, "property_yardi": "V1", "suite": "A"})
+        await client.put("/suites/4", json={"name": "Acme"})
+        await client.delete("/suites/4")
+        await client.post("/contacts", json={"name": "Loner"})
+        await client.put("/suites/999", json={"name": "Nope"})    # 404: nothing sent
+        sent = _drain(queue)
+    finally:
+        broker.unsubscribe(queue)
+
+    assert [(e["entity_type"], e["entity_id"], e["property_yardi"]) for e in sent] == [
+        ("property", "V1", "V1"),
+        ("suite", "4", "V1"),
+        ("suite", "4", "V1"),
+        ("suite", "4", "V1"),
+        ("contact", sent[-1]["entity_id"], None),
+    ]
+    # Versions match the property's ETag versions
+    assert [e["version"] for e in sent[:4]] == [1, 2, 3, 4]
+    etag = (await client.get("/properties/V1")).headers["ETag"]
+    assert etag.startswith('"4.')
@@ -0,0 +1,82 @@
+import pytest
+from starlette.requests import Request
+from app.formats import render, response_format
+
+ormsgpack = pytest.importorskip("ormsgpack")
+
+MSGPACK = {"Accept": "application/msgpack"}
+
+
+def _request(accept):
+    headers = [(b"accept", accept.encode())] if accept is not None else []
+    return Request({"type": "http", "headers": headers})
+
+
+@pytest.mark.parametrize("accept, fmt", [
+    (None, "json"),
+    ("application/json, text/plain, */*", "json"),
+    ("application/msgpack", "msgpack"),
+    ("application/x-msgpack, application/json;q=0.5", "msgpack"),
+    ("application/json, application/msgpack;q=0.5", "json"),
+    ("application/msgpack;q=0", "json"),
+])
+def test_response_format_negotiation(accept, fmt):
+    assert response_format(_request(accept)) == fmt
+
+
+def test_render_json_matches_orjson_response():
+    # Same bytes as the default response class: compact, NaN -> null
+    assert render({"a": [1, float("nan")]}, "json") == b'{"a":[1,null]}'
+
+
+async def _both(client, method, url, **kwargs):
+    """Same request as JSON and as MessagePack, decoded."""
+    as_json = await client.request(method, url, **kwargs)
+    packed = await client.request(method, url, headers=MSGPACK, **kwargs)
+    assert as_json.headers["content-type"] == "application/json"
+    assert packed.headers["content-type"] == "application/msgpack"
+    return as_json.json(), ormsgpack.unpackb(packed.content)
+
+
+@pytest.mark.asyncio
+async def test_msgpack_bodies_match_json(client):
+    await client.post("/properties", json={"yardi": "M1", "address": "1 Pack St"})
+    await client.post("/suites", json={"property_yardi": "M1", "suite": "A", "contacts": [{"name": "Ann"}]})
+    await client.post("/codes", json={"property_yardi": "M1", "code": "1234"})
+
+    for method, url, kwargs in [
+        ("GET", "/properties", {}),
+        ("GET", "/properties", {"params": {"fields": "address", "include": "suites"}}),
+        ("GET", "/properties/M1", {}),
+        ("GET", "/properties/M1", {"params": {"include": "codes"}}),
+        ("POST", "/properties/batch-get", {"json": {"yardis": ["M1", "NOPE"]}}),
+        ("GET", "/sync", {}),
+        ("GET", "/suites", {"params": {"property_yardi": "M1"}}),
+        ("GET", "/codes", {"params": {"property_yardi": "M1"}}),
+        ("GET", "/edit-history", {}),
+    ]:
+        as_json, packed = await _both(client, method, url, **kwargs)
+        if url == "/sync":
+            # Tokens depend on the request time
+            assert packed.pop("token") and as_json.pop("token")
+        assert packed == as_json, url
+
+
+@pytest.mark.asyncio
+async def test_formats_cached_separately(client):
+    await client.post("/properties", json={"yardi": "M2", "address": "2 Pack St"})
+
+    first = await client.get("/properties/M2", headers=MSGPACK)
+    as_json = await client.get("/properties/M2")
+    again = await client.get("/properties/M2", headers=MSGPACK)
+
+    assert as_json.json()["address"] == "2 Pack St"
+    assert again.content == first.content
+    assert again.headers["X-DB-Queries"] == "1"    # version lookup only
+    assert again.headers["Vary"] == "Accept"
+    # Each format has its own tag, and only revalidates against it
+    assert again.headers["ETag"] == as_json.headers["ETag"][:-1] + '-msgpack"'
+    res = await client.get("/properties/M2", headers={**MSGPACK, "If-None-Match": as_json.headers["ETag"]})
+    assert res.status_code == 200
+    res = await client.get("/properties/M2", headers={**MSGPACK, "If-None-Match": again.headers["ETag"]})
+    assert res.status_code == 304 and res.headers["ETag"] == again.headers["ETag"]
@@ -0,0 +1,100 @@
+import pytest
+from app import instrumentation
+
+
+async def _property_with_suites(client, yardi, n):
+    await client.post("/properties", json={"yardi": yardi, "address": "1 Count St"})
+    for i in range(n):
+        await client.post("/suites", json={
+            "property_yardi": yardi,
+            "suite": str(100 + i),
+            "contacts": [{"name": f"Tenant {i}"}],
+        })
+
+
+@pytest.mark.asyncio
+async def test_query_count_headers(client):
+    await _property_with_suites(client, "Q1", 1)
+
+    # Version lookup (ETag) + codes
+    res = await client.get("/codes", params={"property_yardi": "Q1"})
+    assert res.status_code == 200
+    assert res.headers["X-DB-Queries"] == "2"
+    assert res.headers["Server-Timing"].startswith("db;dur=")
+    assert 'desc="2 queries"' in res.headers["Server-Timing"]
+
+
+@pytest.mark.asyncio
+async def test_query_budget_raise_mode(client, monkeypatch):
+    await _property_with_suites(client, "Q2", 3)
+    monkeypatch.setattr(instrumentation, "DB_QUERY_BUDGET", 2)
+    monkeypatch.setattr(instrumentation, "DB_QUERY_BUDGET_ACTION", "raise")
+
+    res = await client.get("/codes", params={"property_yardi": "Q2"})
+    assert res.status_code == 200
+
+    res = await client.get("/suites", params={"property_yardi": "Q2"})
+    assert res.status_code == 500
+    assert "budget 2" in res.json()["detail"]
+
+
+def test_query_budget_log_mode(caplog):
+    stats = instrumentation.QueryStats("GET /suites")
+    stats.count = 5
+    instrumentation.check_query_budget(stats, budget=3, action="log")
+    assert "ran 5 queries" in caplog.text
+
+    # Within budget / budget disabled: no complaints
+    instrumentation.check_query_budget(stats, budget=0, action="raise")
+    instrumentation.check_query_budget(stats, budget=5, action="raise")
+
+
+def test_track_queries_outside_requests():
+    from sqlalchemy import create_engine, text
+
+    eng = create_engine("sqlite://")
+    with instrumentation.track_queries() as stats:
+        with eng.connect() as conn:
+            conn.execute(text("select 1"))
+            conn.execute(text("select 2"))
+    assert stats.count == 2
+
+    # Not tracked once the block exits
+    with eng.connect() as conn:
+        conn.execute(text("select 3"))
+    assert stats.count == 2
+
+
+@pytest.mark.asyncio
+async def test_slow_queries_recorded_with_plan(client, monkeypatch):
+    await _property_with_suites(client, "S1", 1)
+    instrumentation.slow_query_log.clear()
+    monkeypatch.setattr(instrumentation, "SLOW_QUERY_MS", 0)
+    monkeypatch.setattr(instrumentation, "SLOW_QUERY_EXPLAIN_MS", 0)
+
+    res = await client.get("/suites", params={"property_yardi": "S1"})
+    assert res.status_code == 200
+    monkeypatch.setattr(instrumentation, "SLOW_QUERY_MS", 10_000)
+
+    res = await client.get("/admin/slow-queries")
+    entries = res.json()["entries"]
+    suite_query = next(e for e in entries if "FROM suites" in e["sql"])
+    assert suite_query["route"] == "GET /suites"
+    assert suite_query["params"] == ["str"]
+    # SQLite EXPLAIN QUERY PLAN output
+    assert any("suites" in line for line in suite_query["explain"])
+
+
+def test_slow_query_log_is_bounded():
+    log = instrumentation.SlowQueryLog(maxlen=2)
+    for i in range(3):
+        log.record({"i": i})
+    assert [e["i"] for e in log.entries()] == [2, 1]
+
+
+def test_param_shape_hides_values():
+    assert instrumentation._param_shape(("secret", 5)) == ["str", "int"]
+    assert instrumentation._param_shape({"code": "1234"}) == {"code": "str"}
+    assert instrumentation._param_shape([("a",), ("b",)], executemany=True) == {
+        "rows": 2, "each": ["str"],
+    }
@@ -0,0 +1,65 @@
+import pytest
+
+
+async def _property_with_children(client, yardi, n):
+    """Property with `n` of every child kind, each with two contacts."""
+    await client.post("/properties", json={"yardi": yardi, "address": "1 Batch St"})
+    for i in range(n):
+        contacts = [{"name": f"{yardi} contact {i}a"}, {"name": f"{yardi} contact {i}b"}]
+        await client.post("/suites", json={"property_yardi": yardi, "suite": str(i), "contacts": contacts})
+        await client.post("/services", json={"property_yardi": yardi, "vendor": f"V{i}", "contacts": contacts})
+        await client.post("/utilities", json={"property_yardi": yardi, "service": f"S{i}", "contacts": contacts})
+        await client.post("/permits", json={"property_yardi": yardi, "permit_number": str(i)})
+        await client.post("/codes", json={"property_yardi": yardi, "code": str(i)})
+
+
+async def _queries(client, url, params=None):
+    res = await client.get(url, params=params)
+    assert res.status_code == 200
+    return int(res.headers["X-DB-Queries"]), res.json()
+
+
+@pytest.mark.asyncio
+async def test_contact_loader_batches_and_caches(client, db_engine):
+    from sqlalchemy import select
+    from sqlalchemy.ext.asyncio import async_sessionmaker
+    from app.instrumentation import track_queries
+    from app.loaders import ContactLoader
+    from app.models import Suite
+
+    await _property_with_children(client, "L1", 3)
+    session = async_sessionmaker(bind=db_engine, expire_on_commit=False)
+    async with session() as db:
+        ids = list(await db.scalars(select(Suite.suite_id).order_by(Suite.suite_id)))
+        loader = ContactLoader(db, "suites")
+        with track_queries() as stats:
+            contacts = await loader.load_many(ids + [999])
+            assert await loader.load(ids[0]) == contacts[ids[0]]   # cached
+    assert stats.count == 1
+    assert [c["name"] for c in contacts[ids[1]]] == ["L1 contact 1a", "L1 contact 1b"]
+    assert contacts[999] == []
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("url, params, budget", [
+    # Version lookup + children + one joined contact query
+    ("/suites", {"property_yardi": "{yardi}"}, 3),
+    ("/services", {"property_yardi": "{yardi}"}, 3),
+    ("/utilities", {"property_yardi": "{yardi}"}, 3),
+    # Version lookup + stored document
+    ("/properties/{yardi}", {}, 2),
+    # Version lookup + property + 5 child collections + 3 contact queries
+    ("/properties/{yardi}", {"fields": "address"}, 10),
+])
+async def test_child_endpoints_query_budget(client, url, params, budget):
+    await _property_with_children(client, "B1", 1)
+    await _property_with_children(client, "B5", 5)
+
+    for yardi, n in (("B1", 1), ("B5", 5)):
+        count, body = await _queries(
+            client, url.format(yardi=yardi), {k: v.format(yardi=yardi) for k, v in params.items()}
+        )
+        assert count == budget, (url, yardi)
+        rows = body.get("suites") if isinstance(body, dict) else body
+        assert len(rows) == n
+        assert all(len(r["contacts"]) == 2 for r in rows)
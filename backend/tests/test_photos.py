@@ -1,8 +1,12 @@
 import pytest
 import io
+from app.api import property_photos
 
 @pytest.mark.asyncio
-async def test_upload_and_crud_photos(client):
+async def test_upload_and_crud_photos(client, tmp_path, monkeypatch):
+    # Keep uploads out of the source tree
+    monkeypatch.setattr(property_photos, "UPLOAD_DIR", str(tmp_path))
+
     # 1. Create property first (FK requirement)
     await client.post("/properties", json={
         "yardi": "P777",
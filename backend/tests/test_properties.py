@@ -1,3 +1,4 @@
+import orjson
 import pytest
 
 @pytest.mark.asyncio
@@ -43,3 +44,491 @@ async def test_property_crud(client):
     updated = res.json()["property"]
     assert updated["address"] == "456 Oak"
 
+
+
+@pytest.mark.asyncio
+async def test_property_keyset_pagination(client):
+    for i in range(5):
+        await client.post("/properties", json={"yardi": f"K{i}", "address": f"{i} Seek St"})
+
+    seen = []
+    res = await client.get("/properties", params={"per_page": 2})
+    body = res.json()
+    seen += [p["yardi"] for p in body["properties"]]
+    while body["next_cursor"]:
+        res = await client.get("/properties", params={"per_page": 2, "after": body["next_cursor"]})
+        assert res.status_code == 200
+        body = res.json()
+        assert body["page"] is None
+        seen += [p["yardi"] for p in body["properties"]]
+
+    assert seen == ["K0", "K1", "K2", "K3", "K4"]
+    assert body["total"] == 5
+
+
+@pytest.mark.asyncio
+async def test_keyset_cursor_stable_under_inserts(client):
+    for y in ["A1", "A3", "A5"]:
+        await client.post("/properties", json={"yardi": y})
+
+    first = (await client.get("/properties", params={"per_page": 2})).json()
+    assert [p["yardi"] for p in first["properties"]] == ["A1", "A3"]
+
+    # A row inserted before the cursor does not shift the next page
+    await client.post("/properties", json={"yardi": "A2"})
+    res = await client.get("/properties", params={"per_page": 2, "after": first["next_cursor"]})
+    assert [p["yardi"] for p in res.json()["properties"]] == ["A5"]
+    assert res.json()["next_cursor"] is None
+
+
+@pytest.mark.asyncio
+async def test_invalid_cursor(client):
+    res = await client.get("/properties", params={"after": "not-a-cursor!"})
+    assert res.status_code == 400
+
+
+@pytest.mark.asyncio
+async def test_property_stream_ndjson(client):
+    for i in range(5):
+        await client.post("/properties", json={"yardi": f"S{i}", "address": f"{i} Stream St"})
+    await client.post("/suites", json={"suite_id": 1, "property_yardi": "S3", "suite": "101"})
+
+    res = await client.get("/properties/stream", params={"chunk_size": 2})
+    assert res.status_code == 200
+    assert res.headers["content-type"].startswith("application/x-ndjson")
+
+    lines = res.content.splitlines()
+    docs = [orjson.loads(line) for line in lines]
+    assert [d["yardi"] for d in docs] == ["S0", "S1", "S2", "S3", "S4"]
+
+    # Same documents as the paginated endpoint
+    paged = (await client.get("/properties", params={"per_page": 100})).json()["properties"]
+    assert docs == paged
+    assert docs[3]["suites"][0]["suite"] == "101"
+
+
+@pytest.mark.asyncio
+async def test_property_stream_flushes_chunks_with_gzip(client):
+    import asyncio
+    import zlib
+    from app.main import app
+
+    for i in range(30):
+        await client.post("/properties", json={"yardi": f"G{i:02}", "address": f"{i} Gzip St"})
+
+    scope = {
+        "type": "http", "method": "GET", "path": "/properties/stream", "raw_path": b"/properties/stream",
+        "root_path": "", "scheme": "http", "query_string": b"chunk_size=5", "server": ("test", 80),
+        "client": ("test", 1), "http_version": "1.1", "headers": [(b"accept-encoding", b"gzip")],
+    }
+    sent, requested = [], asyncio.Event()
+
+    async def receive():
+        if requested.is_set():
+            await asyncio.Event().wait()    # client never disconnects
+        requested.set()
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        sent.append(message)
+
+    await app(scope, receive, send)
+
+    start, *bodies = sent
+    assert dict(start["headers"])[b"content-encoding"] == b"gzip"
+    # The first body message already decodes to the first chunk's lines
+    first = zlib.decompressobj(wbits=31).decompress(bodies[0]["body"])
+    assert [orjson.loads(line)["yardi"] for line in first.splitlines()] == [f"G{i:02}" for i in range(5)]
+    whole = zlib.decompress(b"".join(m["body"] for m in bodies), wbits=31)
+    assert len(whole.splitlines()) == 30
+
+
+@pytest.mark.asyncio
+async def test_property_stream_empty(client):
+    res = await client.get("/properties/stream")
+    assert res.status_code == 200
+    assert res.content == b""
+
+
+@pytest.mark.asyncio
+async def test_property_sparse_fields_and_include(client):
+    await client.post("/properties", json={"yardi": "F1", "address": "1 Card St", "city": "Davis", "state": "CA"})
+    await client.post("/suites", json={"suite_id": 7, "property_yardi": "F1", "suite": "A"})
+
+    # Card list: narrow columns, no children -> count + one property query
+    res = await client.get("/properties", params={"fields": "address,city", "include": ""})
+    assert res.status_code == 200
+    assert res.json()["properties"] == [{"yardi": "F1", "address": "1 Card St", "city": "Davis"}]
+    assert res.headers["X-DB-Queries"] == "2"
+
+    res = await client.get("/properties", params={"fields": "city", "include": "suites"})
+    doc = res.json()["properties"][0]
+    assert set(doc) == {"yardi", "city", "suites"}
+    assert doc["suites"][0]["suite"] == "A"
+
+    res = await client.get("/properties/F1", params={"fields": "state", "include": "suites,codes"})
+    assert res.status_code == 200
+    assert set(res.json()) == {"yardi", "state", "suites", "codes"}
+
+    # Defaults are unchanged: every column and child collection
+    full = (await client.get("/properties/F1")).json()
+    assert {"prop_manager", "suites", "services", "utilities", "permits", "codes"} <= set(full)
+
+
+@pytest.mark.asyncio
+async def test_property_sparse_selectors_validated(client):
+    res = await client.get("/properties", params={"fields": "address,password"})
+    assert res.status_code == 400
+    assert "password" in res.json()["detail"]
+    res = await client.get("/properties/X1", params={"include": "tenants"})
+    assert res.status_code == 400
+
+
+@pytest.mark.asyncio
+async def test_property_batch_get(client):
+    for yardi in ("G1", "G2", "G3"):
+        await client.post("/properties", json={"yardi": yardi, "address": f"{yardi} Grid St"})
+        await client.post("/suites", json={"property_yardi": yardi, "suite": "A", "contacts": [{"name": "Ann"}]})
+
+    # Request order, duplicates once, unknown ids reported separately
+    res = await client.post("/properties/batch-get", json={"yardis": ["G3", "NOPE", "G1", "G3"]})
+    assert res.status_code == 200
+    body = res.json()
+    assert [p["yardi"] for p in body["properties"]] == ["G3", "G1"]
+    assert body["not_found"] == ["NOPE"]
+    assert body["properties"][0] == (await client.get("/properties/G3")).json()
+
+    # Query count does not grow with the batch
+    res = await client.post(
+        "/properties/batch-get", params={"fields": "address"}, json={"yardis": ["G1"]}
+    )
+    one = res.headers["X-DB-Queries"]
+    res = await client.post(
+        "/properties/batch-get", params={"fields": "address"}, json={"yardis": ["G1", "G2", "G3"]}
+    )
+    assert res.headers["X-DB-Queries"] == one
+    assert res.json()["properties"][2]["suites"][0]["contacts"][0]["name"] == "Ann"
+
+    res = await client.post(
+        "/properties/batch-get", params={"fields": "city", "include": ""}, json={"yardis": ["G2"]}
+    )
+    assert res.json() == {"not_found": [], "properties": [{"yardi": "G2", "city": None}]}
+
+    res = await client.post("/properties/batch-get", json={"yardis": []})
+    assert res.json() == {"not_found": [], "properties": []}
+    res = await client.post("/properties/batch-get", json={"yardis": [f"Y{i}" for i in range(501)]})
+    assert res.status_code == 400
+
+
+async def _seed_managed(client):
+    rows = [
+        ("M1", "Davis", "Ann", 95616, True),
+        ("M2", "Sacramento", "Bob", 95814, True),
+        ("M3", "Davis", "Bob", 95616, False),
+        ("M4", None, "Ann", 95814, True),
+        ("M5", "Auburn", "Ann", 95603, True),
+    ]
+    for yardi, city, manager, zip_code, active in rows:
+        await client.post("/properties", json={
+            "yardi": yardi, "city": city, "prop_manager": manager,
+            "zip": zip_code, "active": active,
+        })
+
+
+@pytest.mark.asyncio
+async def test_property_filters(client):
+    await _seed_managed(client)
+
+    res = await client.get("/properties", params={"prop_manager": "Ann", "include": ""})
+    body = res.json()
+    assert [p["yardi"] for p in body["properties"]] == ["M1", "M4", "M5"]
+    assert body["total"] == 3
+
+    # Repeated parameters are an IN match; filters combine with AND
+    res = await client.get("/properties", params=[
+        ("city", "Davis"), ("city", "Auburn"), ("active", "true"), ("include", ""),
+    ])
+    assert [p["yardi"] for p in res.json()["properties"]] == ["M1", "M5"]
+
+    res = await client.get("/properties", params=[("zip", "95814"), ("zip", "95603")])
+    assert res.json()["total"] == 3
+
+    res = await client.get("/properties", params={"zip": "abc"})
+    assert res.status_code == 422
+
+
+@pytest.mark.asyncio
+async def test_property_sort_with_cursor(client):
+    await _seed_managed(client)
+
+    async def walk(sort):
+        seen, params = [], {"per_page": 2, "sort": sort, "fields": "yardi", "include": ""}
+        body = (await client.get("/properties", params=params)).json()
+        seen += [p["yardi"] for p in body["properties"]]
+        while body["next_cursor"]:
+            body = (await client.get("/properties", params={**params, "after": body["next_cursor"]})).json()
+            seen += [p["yardi"] for p in body["properties"]]
+        return seen
+
+    # NULL cities sort last ascending, first descending; yardi breaks ties
+    assert await walk("city") == ["M5", "M1", "M3", "M2", "M4"]
+    assert await walk("-city") == ["M4", "M2", "M3", "M1", "M5"]
+    assert await walk("-yardi") == ["M5", "M4", "M3", "M2", "M1"]
+
+    # Offset paging honours the same order
+    res = await client.get("/properties", params={"sort": "city", "page": 2, "per_page": 2})
+    assert [p["yardi"] for p in res.json()["properties"]] == ["M3", "M2"]
+
+    # Only the requested fields come back, whatever the sort key
+    res = await client.get("/properties", params={"sort": "city", "fields": "address", "include": ""})
+    assert all(set(p) == {"yardi", "address"} for p in res.json()["properties"])
+
+    res = await client.get("/properties", params={"sort": "misc"})
+    assert res.status_code == 400
+
+
+@pytest.mark.asyncio
+async def test_property_count_cached_per_filter(client):
+    await _seed_managed(client)
+
+    res = await client.get("/properties", params={"prop_manager": "Ann", "include": ""})
+    assert res.json()["total"] == 3
+    assert res.headers["X-DB-Queries"] == "2"
+
+    # Same filters again: the count comes from the cache
+    res = await client.get("/properties", params={"prop_manager": "Ann", "include": "", "page": 2})
+    assert res.json()["total"] == 3
+    assert res.headers["X-DB-Queries"] == "1"
+
+    # Writes invalidate it (create and filter-column updates)
+    await client.post("/properties", json={"yardi": "M6", "prop_manager": "Ann"})
+    res = await client.get("/properties", params={"prop_manager": "Ann", "include": ""})
+    assert res.json()["total"] == 4
+    await client.put("/properties/M6", json={"prop_manager": "Bob"})
+    res = await client.get("/properties", params={"prop_manager": "Ann", "include": ""})
+    assert res.json()["total"] == 3
+
+
+@pytest.mark.asyncio
+async def test_property_count_modes(client):
+    await _seed_managed(client)
+
+    res = await client.get("/properties", params={"count": "none", "include": ""})
+    body = res.json()
+    assert body["total"] is None and body["total_pages"] is None
+    assert res.headers["X-DB-Queries"] == "1"
+
+    # No planner statistics on SQLite: estimate falls back to the exact count
+    body = (await client.get("/properties", params={"count": "estimate"})).json()
+    assert body["total"] == 5
+    assert body["total_estimated"] is False
+
+    res = await client.get("/properties", params={"count": "approx"})
+    assert res.status_code == 422
+
+
+async def _seed_documents(client, db_engine):
+    from datetime import datetime
+    from sqlalchemy import insert
+    from app.models import Property
+
+    async with db_engine.begin() as conn:
+        await conn.execute(insert(Property), [
+            {"yardi": "D1", "address": "1 Doc St", "coe": datetime(2021, 5, 1), "active": True},
+            {"yardi": "D2", "address": "2 Doc St", "coe": datetime(2022, 6, 2, 9, 30, 0, 250000), "active": False},
+            {"yardi": "D3", "address": None, "coe": None, "active": None},
+        ])
+    await client.post("/suites", json={
+        "suite_id": 1, "property_yardi": "D1", "suite": "A", "name": "Acme",
+        "contacts": [{"name": "Ann"}, {"name": "Bob"}],
+    })
+    await client.post("/suites", json={"suite_id": 2, "property_yardi": "D1", "suite": "B"})
+    await client.post("/services", json={"service_id": 1, "property_yardi": "D2", "vendor": "SMUD",
+                                         "contacts": [{"name": "Cam"}]})
+    await client.post("/utilities", json={"utility_id": 1, "property_yardi": "D2", "service": "Water"})
+    await client.post("/permits", json={"permit_id": 1, "property_yardi": "D3", "permit_number": "9"})
+    await client.post("/codes", json={"code_id": 1, "property_yardi": "D1", "code": "1234"})
+
+
+@pytest.mark.asyncio
+async def test_sql_document_engine_matches_python(client, db_engine, monkeypatch):
+    from app import documents
+
+    await _seed_documents(client, db_engine)
+    requests = [
+        ("/properties", {"per_page": 2}),
+        ("/properties", {"per_page": 100, "sort": "-yardi"}),
+        ("/properties", {"fields": "address,coe", "include": "suites,permits"}),
+        ("/properties", {"active": "false", "include": ""}),
+    ]
+
+    monkeypatch.setattr(documents, "PROPERTY_DOCUMENT_ENGINE", "python")
+    expected = [(await client.get(url, params=params)).json() for url, params in requests]
+    expected_stream = (await client.get("/properties/stream")).content.splitlines()
+
+    monkeypatch.setattr(documents, "PROPERTY_DOCUMENT_ENGINE", "sql")
+    for (url, params), want in zip(requests, expected):
+        res = await client.get(url, params=params)
+        assert res.status_code == 200
+        assert res.headers["content-type"] == "application/json"
+        assert res.json() == want
+
+    # Cursor from the SQL engine continues the same walk
+    second = (await client.get("/properties", params={"per_page": 2, "after": expected[0]["next_cursor"]})).json()
+    assert [p["yardi"] for p in second["properties"]] == ["D3"]
+
+    stream = (await client.get("/properties/stream", params={"chunk_size": 2})).content.splitlines()
+    assert [orjson.loads(line) for line in stream] == [orjson.loads(line) for line in expected_stream]
+
+    # One statement for the documents (plus the count)
+    res = await client.get("/properties", params={"per_page": 100, "count": "none", "fields": "address"})
+    assert res.headers["X-DB-Queries"] == "1"
+
+
+async def _stored_document(db_engine, yardi):
+    from sqlalchemy import select
+    from app.models import PropertyDocument
+
+    async with db_engine.connect() as conn:
+        row = (await conn.execute(
+            select(PropertyDocument.version, PropertyDocument.body).where(PropertyDocument.yardi == yardi)
+        )).first()
+    return (row.version, orjson.loads(row.body)) if row else None
+
+
+@pytest.mark.asyncio
+async def test_property_document_maintained_on_write(client, db_engine):
+    await client.post("/properties", json={"yardi": "M1", "address": "1 Main"})
+    version, doc = await _stored_document(db_engine, "M1")
+    assert version == 1 and doc["address"] == "1 Main" and doc["suites"] == []
+
+    res = await client.post("/suites", json={
+        "suite_id": 1, "property_yardi": "M1", "suite": "A", "contacts": [{"name": "Ann"}],
+    })
+    version, doc = await _stored_document(db_engine, "M1")
+    assert version == 2
+    contact_id = doc["suites"][0]["contacts"][0]["contact_id"]
+
+    # A contact edit reaches every property it is linked to
+    await client.put(f"/contacts/{contact_id}", json={"name": "Anne"})
+    version, doc = await _stored_document(db_engine, "M1")
+    assert version == 3 and doc["suites"][0]["contacts"][0]["name"] == "Anne"
+
+    # Every write bumps the version, even one the document does not show
+    await client.post("/property-photos", data={"property_yardi": "M1", "photo_url": "/uploads/a.jpg"})
+    assert (await _stored_document(db_engine, "M1"))[0] == 4
+
+    # Moving a child rebuilds both properties
+    await client.post("/properties", json={"yardi": "M2", "address": "2 Main"})
+    await client.put("/suites/1", json={"property_yardi": "M2"})
+    assert (await _stored_document(db_engine, "M1"))[1]["suites"] == []
+    assert [s["suite_id"] for s in (await _stored_document(db_engine, "M2"))[1]["suites"]] == [1]
+
+    # Reads serve the stored document as is
+    _, doc = await _stored_document(db_engine, "M2")
+    res = await client.get("/properties/M2")
+    assert res.headers["content-type"] == "application/json"
+    assert res.json() == doc
+    listed = (await client.get("/properties")).json()["properties"]
+    assert listed[1] == doc
+
+
+@pytest.mark.asyncio
+async def test_write_and_document_share_one_transaction(client, db_engine, monkeypatch):
+    from app.api import properties, suites
+
+    async def fail(*args, **kwargs):
+        raise RuntimeError("rebuild failed")
+
+    await client.post("/properties", json={"yardi": "T1", "address": "old"})
+    monkeypatch.setattr(properties, "record_property_changes", fail)
+    monkeypatch.setattr(suites, "record_property_changes", fail)
+
+    # A failed rebuild rolls the row change (and its history) back too
+    with pytest.raises(RuntimeError):
+        await client.put("/properties/T1", json={"address": "new"})
+    with pytest.raises(RuntimeError):
+        await client.post("/suites", json={"property_yardi": "T1", "suite": "A"})
+
+    assert (await client.get("/properties/T1", params={"fields": "address"})).json()["address"] == "old"
+    assert (await client.get("/suites", params={"property_yardi": "T1"})).json() == []
+    history = (await client.get("/edit-history")).json()["edit_history"]
+    assert [h["action"] for h in history] == ["add"]
+    assert (await _stored_document(db_engine, "T1"))[0] == 1
+
+
+@pytest.mark.asyncio
+async def test_rebuild_property_documents(client, db_engine):
+    from datetime import datetime
+    from sqlalchemy import insert, update
+    from app.documents import rebuild_property_documents, PROPERTY_FIELDS
+    from app.models import Property, PropertyDocument
+    from sqlalchemy.ext.asyncio import async_sessionmaker
+
+    session = async_sessionmaker(bind=db_engine, autoflush=False, expire_on_commit=False)
+
+    # D1-D3 get documents from their child writes; D4 (inserted directly)
+    # has none, D2's is tampered with and GONE's property does not exist
+    await _seed_documents(client, db_engine)
+    async with db_engine.begin() as conn:
+        await conn.execute(insert(Property), [{"yardi": "D4", "address": "4 Doc St"}])
+        await conn.execute(insert(PropertyDocument), [
+            {"yardi": "GONE", "version": 1, "body": "{}", "updated_at": datetime(2024, 1, 1)},
+        ])
+        await conn.execute(update(PropertyDocument).where(PropertyDocument.yardi == "D2").values(body="{}"))
+
+    expected = (await client.get("/properties", params={"fields": ",".join(PROPERTY_FIELDS)})).json()
+
+    async with session() as db:
+        report = await rebuild_property_documents(db, batch_size=2, check=True)
+    assert report == {"checked": 4, "missing": 1, "stale": 1, "orphaned": 1}
+
+    async with session() as db:
+        await rebuild_property_documents(db, batch_size=2)
+    async with session() as db:
+        report = await rebuild_property_documents(db, check=True)
+    assert report == {"checked": 4, "missing": 0, "stale": 0, "orphaned": 0}
+    assert await _stored_document(db_engine, "GONE") is None
+    assert (await client.get("/properties")).json()["properties"] == expected["properties"]
+
+
+@pytest.mark.asyncio
+async def test_property_conditional_get(client):
+    await client.post("/properties", json={"yardi": "E1", "address": "1 Tag St"})
+    await client.post("/suites", json={"suite_id": 1, "property_yardi": "E1", "suite": "A"})
+
+    res = await client.get("/properties/E1")
+    etag = res.headers["ETag"]
+    assert etag.startswith('"') and res.headers["Cache-Control"] == "private, no-cache"
+
+    # A current tag costs one lookup and returns no body
+    res = await client.get("/properties/E1", headers={"If-None-Match": etag})
+    assert res.status_code == 304
+    assert res.content == b""
+    assert res.headers["ETag"] == etag
+    assert res.headers["X-DB-Queries"] == "1"
+    res = await client.get("/properties/E1", headers={"If-None-Match": f'"x", W/{etag}'})
+    assert res.status_code == 304
+
+    # Child endpoints share the property's tag
+    for url, params in [
+        ("/suites", {"property_yardi": "E1"}),
+        ("/services", {"property_yardi": "E1"}),
+        ("/utilities", {"property_yardi": "E1"}),
+        ("/codes", {"property_yardi": "E1"}),
+        ("/permits", {"property_yardi": "E1"}),
+        ("/property-photos/E1", {}),
+    ]:
+        res = await client.get(url, params=params, headers={"If-None-Match": etag})
+        assert res.status_code == 304, url
+
+    # Any child write moves the tag on
+    await client.put("/suites/1", json={"name": "Renamed"})
+    res = await client.get("/suites", params={"property_yardi": "E1"}, headers={"If-None-Match": etag})
+    assert res.status_code == 200
+    assert res.json()[0]["name"] == "Renamed"
+    assert res.headers["ETag"] != etag
+
+    # Unknown properties are never tagged
+    res = await client.get("/codes", params={"property_yardi": "NOPE"}, headers={"If-None-Match": "*"})
+    assert res.status_code == 200 and "ETag" not in res.headers
@@ -0,0 +1,80 @@
+import pytest
+from app.search import search_terms
+
+
+async def _seed(client):
+    await client.post("/properties", json={"yardi": "P1", "address": "100 Main St"})
+    await client.post("/properties", json={"yardi": "P2", "address": "200 Oak Ave"})
+    await client.post("/suites", json={
+        "suite_id": 1, "property_yardi": "P1", "suite": "101",
+        "name": "Acme Dental", "notes": "Tenant since 2019",
+        "contacts": [{"name": "Wile Coyote"}],
+    })
+    await client.post("/services", json={"service_id": 1, "property_yardi": "P2", "vendor": "SMUD"})
+    await client.post("/utilities", json={"utility_id": 1, "property_yardi": "P2", "account_number": "ACCT-7731"})
+    await client.post("/codes", json={"code_id": 1, "property_yardi": "P1", "description": "Roof hatch"})
+
+
+def _hits(res):
+    assert res.status_code == 200
+    return [(h["entity_type"], h["entity_id"], h["property_yardi"]) for h in res.json()["results"]]
+
+
+@pytest.mark.asyncio
+async def test_search_across_entities(client):
+    await _seed(client)
+
+    assert _hits(await client.get("/search", params={"q": "acme"})) == [("suite", "1", "P1")]
+    assert _hits(await client.get("/search", params={"q": "smud"})) == [("service", "1", "P2")]
+    assert _hits(await client.get("/search", params={"q": "7731"})) == [("utility", "1", "P2")]
+    assert _hits(await client.get("/search", params={"q": "roof"})) == [("code", "1", "P1")]
+    assert _hits(await client.get("/search", params={"q": "oak"})) == [("property", "P2", "P2")]
+    # Nested contacts resolve their property through the suite
+    assert _hits(await client.get("/search", params={"q": "coyote"}))[0][0] == "contact"
+    assert _hits(await client.get("/search", params={"q": "coyote"}))[0][2] == "P1"
+
+    # Last term is a prefix; all terms must match
+    assert _hits(await client.get("/search", params={"q": "tenant acm"})) == [("suite", "1", "P1")]
+    assert _hits(await client.get("/search", params={"q": "acme smud"})) == []
+
+
+@pytest.mark.asyncio
+async def test_search_ranking(client):
+    await client.post("/properties", json={"yardi": "R1", "address": "1 Acme Way"})
+    await client.post("/suites", json={
+        "suite_id": 5, "property_yardi": "R1", "name": "Acme", "notes": "Acme Acme warehouse",
+    })
+    hits = (await client.get("/search", params={"q": "acme"})).json()["results"]
+    assert [h["entity_type"] for h in hits] == ["suite", "property"]
+    assert hits[0]["score"] >= hits[1]["score"]
+
+
+@pytest.mark.asyncio
+async def test_search_index_follows_writes(client):
+    await _seed(client)
+
+    await client.put("/suites/1", json={"name": "Bolt Fitness"})
+    assert _hits(await client.get("/search", params={"q": "acme"})) == []
+    assert _hits(await client.get("/search", params={"q": "bolt"})) == [("suite", "1", "P1")]
+
+    await client.put("/properties/P1", json={"address": "9 Elm Ct"})
+    assert _hits(await client.get("/search", params={"q": "elm"})) == [("property", "P1", "P1")]
+    assert _hits(await client.get("/search", params={"q": "main"})) == []
+
+    await client.delete("/services/1")
+    assert _hits(await client.get("/search", params={"q": "smud"})) == []
+
+    res = await client.post("/contacts", json={"name": "Road Runner", "utility_id": 1})
+    contact_id = res.json()["contact_id"]
+    assert _hits(await client.get("/search", params={"q": "runner"})) == [("contact", str(contact_id), "P2")]
+    await client.delete(f"/contacts/{contact_id}")
+    assert _hits(await client.get("/search", params={"q": "runner"})) == []
+
+
+@pytest.mark.asyncio
+async def test_search_input_is_not_fts_syntax(client):
+    await _seed(client)
+    for q in ['"', "acme OR", "NEAR(acme)", "*", "a:* & !b"]:
+        res = await client.get("/search", params={"q": q})
+        assert res.status_code == 200
+    assert search_terms('Acme "SMUD"-42') == ["Acme", "SMUD", "42"]
@@ -0,0 +1,123 @@
+import pytest
+from datetime import datetime, timedelta
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import async_sessionmaker
+from app import sync
+from app.models import Tombstone
+
+
+async def _sync(client, since=None, **params):
+    if since is not None:
+        params["since"] = since
+    res = await client.get("/sync", params=params)
+    assert res.status_code == 200
+    return res.json()
+
+
+@pytest.fixture
+def no_overlap(monkeypatch):
+    monkeypatch.setattr(sync, "SYNC_OVERLAP_SECONDS", 0)
+
+
+@pytest.mark.asyncio
+async def test_sync_sends_only_changes(client, no_overlap):
+    for yardi in ("S1", "S2", "S3"):
+        await client.post("/properties", json={"yardi": yardi, "address": f"{yardi} Sync St"})
+    await client.post("/suites", json={"suite_id": 1, "property_yardi": "S2", "suite": "A"})
+
+    # Full sync: every document, nothing deleted
+    full = await _sync(client)
+    assert sorted(p["yardi"] for p in full["properties"]) == ["S1", "S2", "S3"]
+    assert full["deleted"] == {} and full["has_more"] is False
+
+    # Nothing changed since
+    idle = await _sync(client, full["token"])
+    assert idle["properties"] == [] and idle["deleted"] == {}
+
+    # A child write re-sends its property only
+    await client.put("/suites/1", json={"name": "Acme"})
+    delta = await _sync(client, idle["token"])
+    assert [p["yardi"] for p in delta["properties"]] == ["S2"]
+    assert delta["properties"][0]["suites"][0]["name"] == "Acme"
+
+    # Deletes leave tombstones
+    await client.delete("/suites/1")
+    delta = await _sync(client, delta["token"])
+    assert [p["yardi"] for p in delta["properties"]] == ["S2"]
+    assert delta["properties"][0]["suites"] == []
+    assert delta["deleted"] == {"suite": ["1"]}
+
+
+@pytest.mark.asyncio
+async def test_sync_pages_and_overlap(client, monkeypatch):
+    for yardi in ("S1", "S2", "S3"):
+        await client.post("/properties", json={"yardi": yardi})
+
+    seen, token, pages = [], None, 0
+    while True:
+        page = await _sync(client, token, limit=2)
+        seen += [p["yardi"] for p in page["properties"]]
+        token, pages = page["token"], pages + 1
+        if not page["has_more"]:
+            break
+    assert sorted(seen) == ["S1", "S2", "S3"] and pages == 2
+
+    # Recent writes are sent again on the next sync (default overlap)
+    assert len((await _sync(client, token))["properties"]) == 3
+
+    res = await client.get("/sync", params={"since": "not-a-token"})
+    assert res.status_code == 400
+
+
+@pytest.mark.asyncio
+async def test_sync_pages_tombstones(client, no_overlap):
+    await client.post("/properties", json={"yardi": "T1"})
+    for suite_id in (1, 2, 3):
+        await client.post("/suites", json={"suite_id": suite_id, "property_yardi": "T1", "suite": "A"})
+    token = (await _sync(client))["token"]
+    for suite_id in (1, 2, 3):
+        await client.delete(f"/suites/{suite_id}")
+
+    deleted, pages = [], 0
+    while True:
+        page = await _sync(client, token, limit=2)
+        deleted += page["deleted"].get("suite", [])
+        token, pages = page["token"], pages + 1
+        if not page["has_more"]:
+            break
+    assert deleted == ["1", "2", "3"] and pages == 2
+
+
+@pytest.mark.asyncio
+async def test_expired_tokens_and_tombstones(client, db_engine):
+    old = datetime.now() - timedelta(days=sync.SYNC_TOMBSTONE_DAYS + 1)
+    res = await client.get("/sync", params={"since": sync.encode_sync_token(old, "", old, 0, None)})
+    assert res.status_code == 410
+
+    session = async_sessionmaker(bind=db_engine, expire_on_commit=False)
+    async with session() as db:
+        db.add_all([
+            Tombstone(entity_type="suite", entity_id="1", deleted_at=old),
+            Tombstone(entity_type="suite", entity_id="2", deleted_at=datetime.now()),
+        ])
+        await db.commit()
+        assert await sync.purge_tombstones(db) == 1
+        assert (await db.execute(select(Tombstone.entity_id))).scalars().all() == ["2"]
+
+
+@pytest.mark.asyncio
+async def test_updated_at_stamped_and_not_writable(client):
+    await client.post("/properties", json={"yardi": "U1", "address": "1 Stamp St"})
+    created = (await client.get("/properties/U1")).json()["updated_at"]
+    assert created is not None
+
+    # Clients echoing a row back cannot set it
+    res = await client.put(
+        "/properties/U1", json={"address": "2 Stamp St", "updated_at": "2000-01-01T00:00:00"}
+    )
+    assert res.status_code == 200
+    updated = (await client.get("/properties/U1")).json()["updated_at"]
+    assert updated > created
+
+    history = (await client.get("/edit-history")).json()["edit_history"]
+    assert [h["field"] for h in history if h["action"] == "edit"] == ["address"]